@@ -15,6 +15,12 @@ REQUIRED_FIELDS_V1 = ["name", "font", "header_bg", "header_font_color"]
 # New (v2) Fields
 REQUIRED_FIELDS_V2 = ["name", "fonts", "colors"]
 
+# Analytics rule conditions understood by excel-generation
+CONDITIONS = [
+    "lessThan", "lessThanOrEqual", "greaterThan", "greaterThanOrEqual",
+    "equal", "notEqual", "between", "notBetween", "top", "bottom", "colorScale",
+]
+
 def validate_hex(color: str) -> bool:
     """Check if string is a valid hex color code (e.g. #ffffff or ffffff)."""
     # Remove hash if present
@@ -69,6 +75,14 @@ def validate_brand(file_path: Path) -> bool:
                 if "condition" not in rule:
                      print(f"Error: Missing 'condition' in analytics rule index {idx}")
                      valid = False
+                elif rule["condition"] not in CONDITIONS:
+                    print(f"Error: Unknown condition '{rule['condition']}' in analytics rule index {idx}")
+                    valid = False
+                elif rule["condition"] in ("between", "notBetween"):
+                    value = rule.get("value")
+                    if not isinstance(value, list) or len(value) != 2:
+                        print(f"Error: '{rule['condition']}' needs a [low, high] value in analytics rule index {idx}")
+                        valid = False
             if not rules:
                 print("Info: 'analytics' section present but contains no rules.")
                 
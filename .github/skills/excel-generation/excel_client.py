@@ -0,0 +1,161 @@
+"""Thin client for the warm excel_skill daemon.
+
+Takes the same arguments as excel_skill.py. If a daemon started with
+`excel_skill.py serve` is listening, the call is forwarded to it and skips
+importing pandas/openpyxl; otherwise it falls back to running in-process.
+Only the standard library is imported until the fallback is needed.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+def default_socket_path() -> Path:
+    """Socket path shared by `serve` and the client (override with EXCEL_SKILL_SOCKET)."""
+    if os.environ.get("EXCEL_SKILL_SOCKET"):
+        return Path(os.environ["EXCEL_SKILL_SOCKET"])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return Path(runtime_dir) / f"excel-skill-{uid}.sock"
+
+
+def default_token_path() -> Path:
+    """Owner-only file holding the token of a TCP daemon (override with EXCEL_SKILL_TOKEN_FILE)."""
+    if os.environ.get("EXCEL_SKILL_TOKEN_FILE"):
+        return Path(os.environ["EXCEL_SKILL_TOKEN_FILE"])
+    return default_socket_path().with_suffix(".token")
+
+
+def _tcp_port(path: Path | None) -> int | None:
+    port = os.environ.get("EXCEL_SKILL_PORT")
+    return int(port) if port and path is None else None
+
+
+def connect(path: Path | None = None, timeout: float | None = None) -> socket.socket:
+    """Connect to the daemon: EXCEL_SKILL_PORT (localhost TCP) or the Unix socket."""
+    port = _tcp_port(path)
+    if port is not None:
+        return socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path or default_socket_path()))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def ping(path: Path | None = None, timeout: float = 1.0) -> bool:
+    """True if a daemon answers on path (or the default address)."""
+    try:
+        with connect(path, timeout=timeout) as sock:
+            send_message(sock, _authenticated({"command": "ping"}, path))
+            return read_message(sock).get("code") == 0
+    except (OSError, ValueError):
+        return False
+
+
+def _authenticated(request: dict[str, Any], path: Path | None = None) -> dict[str, Any]:
+    """request with the TCP daemon's token added; a Unix socket is protected by its file mode instead."""
+    if _tcp_port(path) is not None:
+        try:
+            request["token"] = default_token_path().read_text(encoding="utf-8").strip()
+        except OSError:
+            pass  # the daemon rejects the request
+    return request
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def read_message(sock: socket.socket) -> dict[str, Any]:
+    """Read one newline-terminated JSON message; ConnectionError if the peer closes first."""
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = sock.recv(1 << 16)
+        if not chunk:
+            raise ConnectionError("the daemon closed the connection before replying")
+        buf.extend(chunk)
+    return json.loads(buf.decode("utf-8"))
+
+
+def _reads_stdin(argv: list[str]) -> bool:
+    """Whether argv's -i/--input value is '-' (stdin); '-' given to any other option does not count."""
+    for i, arg in enumerate(argv):
+        if arg == "--":
+            break
+        if arg in ("-i", "--input"):
+            value = argv[i + 1] if i + 1 < len(argv) else None
+        elif arg.startswith("--input="):
+            value = arg[len("--input="):]
+        elif arg.startswith("-i") and not arg.startswith("--"):
+            value = arg[2:]
+        else:
+            continue
+        if value == "-":
+            return True
+    return False
+
+
+def call(argv: list[str]) -> int | None:
+    """Run argv on the daemon and relay its output; None if no daemon is reachable.
+
+    If the daemon goes away after stdin was read, sys.stdin is replaced by
+    an in-memory copy so the in-process fallback still sees the input.
+    """
+    try:
+        sock = connect()
+    except OSError:
+        return None
+    data = None
+    try:
+        with sock:
+            request: dict[str, Any] = _authenticated({"argv": argv, "cwd": os.getcwd()})
+            # Stdin input ('-i -') is read here and shipped with the request; binary
+            # data (an .xlsx to re-brand) is base64-encoded
+            if _reads_stdin(argv):
+                data = sys.stdin.buffer.read()
+                try:
+                    request["stdin"] = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    request["stdin_b64"] = base64.b64encode(data).decode("ascii")
+            send_message(sock, request)
+            response = read_message(sock)
+    except (OSError, ValueError):
+        if data is not None:
+            sys.stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)), encoding="utf-8")
+        return None
+    if "stdout_b64" in response:
+        sys.stdout.buffer.write(base64.b64decode(response["stdout_b64"]))
+        sys.stdout.buffer.flush()
+    else:
+        sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("code", 3))
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    code = call(argv)
+    if code is not None:
+        return code
+
+    # No daemon: pay the import cost and run in-process
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import excel_skill
+    return excel_skill.main(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
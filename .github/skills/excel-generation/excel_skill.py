@@ -5,30 +5,261 @@ This is a copy of the workspace utility so the skill folder is self-contained.
 from __future__ import annotations
 
 import argparse
+import base64
+import contextlib
+import copy
+import csv
+import datetime
+import functools
+import hashlib
+import hmac
+import importlib
+import io
+import itertools
 import json
+import math
+import numbers
+import os
+import pickle
+import queue
+import re
+import secrets
+import shutil
+import signal
+import socketserver
 import sys
+import threading
+import time
+import warnings
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterable, Iterator, Sequence, TextIO
+from xml.sax.saxutils import escape as xml_escape
+from xml.sax.saxutils import unescape as xml_unescape
 
-import pandas as pd
-import re
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, Color
-from openpyxl.formatting.rule import CellIsRule, Rule
-from openpyxl.styles.differential import DifferentialStyle
-from openpyxl.chart import BarChart, LineChart, Reference, Series
-from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
+if TYPE_CHECKING:
+    import pandas as pd
+    from openpyxl.styles import Alignment, Border, Font, PatternFill
+    from openpyxl.styles.cell_style import StyleArray
+    from openpyxl.styles.differential import DifferentialStyle
+    from openpyxl.workbook import Workbook
+    from openpyxl.worksheet.table import Table
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    pandas and openpyxl account for most of the start-up time, and small
+    record inputs never need them (see records_excel). On first use the
+    module-level name is rebound to the real module, so later lookups cost
+    nothing extra.
+    """
+
+    def __init__(self, name: str, alias: str) -> None:
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+if not TYPE_CHECKING:
+    pd = _LazyModule("pandas", "pd")
+# Used per cell by _style_array, where a function-level import would be too slow
+_cell_style = _LazyModule("openpyxl.styles.cell_style", "_cell_style")
+
+__version__ = "0.1.0"
+
+# Rows converted per slice when streaming a DataFrame into a write-only sheet
+STREAM_CHUNK_ROWS = 10_000
+# Rows per batch yielded by iter_input
+INPUT_CHUNK_ROWS = 50_000
+# Characters read per block when incrementally parsing JSON
+JSON_READ_BLOCK = 1 << 16
+# JSON inputs up to this size and record count are written without pandas
+FAST_PATH_MAX_BYTES = 1 << 20
+FAST_PATH_MAX_ROWS = 10_000
+# Excel's row limit per sheet; one row goes to the header
+EXCEL_MAX_ROWS = 1_048_576
+# Points an Insights chart plots; larger data is aggregated down to this many
+# (brand option "insights_max_points")
+INSIGHTS_MAX_POINTS = 1_000
+# Distinct X values a streamed write aggregates by before falling back to runs of rows
+INSIGHTS_MAX_CATEGORIES = 10_000
+# Sheet holding the aggregated data an Insights chart plots
+INSIGHTS_DATA_SHEET = "Insights Data"
+# Text columns with at most this share of distinct values become categoricals (optimize_dtypes)
+CATEGORY_MAX_RATIO = 0.5
+# Deflate level of each engine="native" compression setting; None stores the parts uncompressed
+NATIVE_COMPRESSION = {"store": None, "fast": 1, "best": 9}
+# Default size limit of an output cache (--cache-dir)
+CACHE_MAX_BYTES = 1 << 30
+# Characters Excel writes as _xHHHH_ escapes in strings (\r included, which XML would normalize)
+_ESCAPED_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f]")
+# Text that already reads as an _xHHHH_ escape; its underscore is escaped in turn
+_LITERAL_ESCAPE = re.compile(r"(_x[0-9a-fA-F]{4}_)")
+# Extra xml_escape entities for attribute values
+_XML_QUOTE = {'"': "&quot;"}
+# A worksheet <row> element, including the self-closing form Excel writes for formatted empty rows
+_ROW_ELEMENT = re.compile(rb"<row\b[^>]*?(?:/>|>.*?</row>)", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class PhaseRecord:
+    """Measurements of one instrumented phase, as passed to the profile hook.
+
+    peak_rss_mb is the process's peak resident memory when the phase ended
+    (None where the platform does not report it); a jump between phases
+    shows which one raised it. depth is the nesting level, 0 for outer phases.
+    """
+    phase: str
+    sheet: str | None
+    wall: float
+    cpu: float
+    peak_rss_mb: float | None
+    rows: int | None
+    cells: int | None
+    depth: int
+    start: float
+
+
+# Called with a PhaseRecord as each phase ends; None disables instrumentation
+_profile_hook: Callable[[PhaseRecord], None] | None = None
+_phase_depth = 0
+
+
+class _Phase:
+    """Context manager timing one phase; rows and cells may be set inside the block."""
+
+    __slots__ = ("name", "sheet", "rows", "cells", "_wall", "_cpu", "_depth")
+
+    def __init__(self, name: str, sheet: str | None, rows: int | None, cells: int | None) -> None:
+        self.name, self.sheet, self.rows, self.cells = name, sheet, rows, cells
+
+    def __enter__(self) -> _Phase:
+        global _phase_depth
+        self._depth = _phase_depth
+        _phase_depth += 1
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        global _phase_depth
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        _phase_depth = self._depth
+        hook = _profile_hook
+        if hook is not None:
+            hook(PhaseRecord(self.name, self.sheet, wall, cpu, _peak_rss_mb(), self.rows, self.cells,
+                             self._depth, self._wall))
+
+
+class _NoPhase:
+    """Shared stand-in returned by _phase while profiling is off."""
+
+    __slots__ = ()
+    rows = cells = None
+
+    def __enter__(self) -> _NoPhase:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def _phase(name: str, sheet: str | None = None, rows: int | None = None, cells: int | None = None) -> Any:
+    """Time the enclosed block as a profiling phase; a no-op unless a hook is set."""
+    if _profile_hook is None:
+        return _NO_PHASE
+    return _Phase(name, sheet, rows, cells)
 
 
-def load_input(input_path: str | Path) -> pd.DataFrame:
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def set_profile_hook(hook: Callable[[PhaseRecord], None] | None) -> Callable[[PhaseRecord], None] | None:
+    """Install hook to receive a PhaseRecord per phase (None turns profiling off).
+
+    Returns the previous hook so callers can restore it.
+    """
+    global _profile_hook
+    previous, _profile_hook = _profile_hook, hook
+    return previous
+
+
+@contextlib.contextmanager
+def profiling(hook: Callable[[PhaseRecord], None] | None = None) -> Iterator[list[PhaseRecord]]:
+    """Collect the PhaseRecords of the enclosed calls into the yielded list.
+
+    Records are also forwarded to hook, if given.
+    """
+    records: list[PhaseRecord] = []
+
+    def collect(record: PhaseRecord) -> None:
+        records.append(record)
+        if hook is not None:
+            hook(record)
+
+    previous = set_profile_hook(collect)
+    try:
+        yield records
+    finally:
+        set_profile_hook(previous)
+
+
+def format_profile(records: list[PhaseRecord], fmt: str = "table") -> str:
+    """Render PhaseRecords in start order, as an indented table or as JSON."""
+    records = sorted(records, key=lambda r: r.start)
+    if fmt == "json":
+        return json.dumps([{k: v for k, v in vars(r).items() if k != "start"} for r in records], indent=2)
+    lines = [f"{'phase':<32} {'sheet':<16} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'rows':>10} {'cells':>12}"]
+    for r in records:
+        name = "  " * r.depth + r.phase
+        peak = "" if r.peak_rss_mb is None else f"{r.peak_rss_mb:.1f}"
+        rows = "" if r.rows is None else f"{r.rows:,}"
+        cells = "" if r.cells is None else f"{r.cells:,}"
+        lines.append(f"{name:<32} {r.sheet or '':<16} {r.wall:9.3f} {r.cpu:9.3f} {peak:>9} {rows:>10} {cells:>12}")
+    return "\n".join(lines)
+
+
+def load_input(input_path: str | Path, max_records: int | None = None) -> pd.DataFrame | list[dict[str, Any]]:
+    """Load the input as a DataFrame.
+
+    With max_records, a JSON record list of at most that many flat records
+    (from stdin or a file under FAST_PATH_MAX_BYTES) is returned as the
+    parsed list instead, for the pandas-free records_excel path.
+    """
     p = Path(input_path)
     if str(input_path) == "-":
         raw = sys.stdin.read()
         data = json.loads(raw)
+        if max_records is not None and _infer_record_columns(data) and len(data) <= max_records:
+            return data
         return pd.DataFrame(data)
     if not p.exists():
         raise FileNotFoundError(f"Input file not found: {p}")
-    if p.suffix.lower() in (".json", ".ndjson"):
+    if max_records is not None and p.suffix.lower() in (".json", ".ndjson", ".jsonl"):
+        records = _load_small_records(p, max_records)
+        if records is not None:
+            return records
+    if p.suffix.lower() in (".ndjson", ".jsonl"):
+        return pd.read_json(p, orient="records", lines=True)
+    if p.suffix.lower() == ".json":
         return pd.read_json(p, orient="records")
     if p.suffix.lower() in (".csv", ".tsv"):
         sep = "\t" if p.suffix.lower() == ".tsv" else ","
@@ -41,63 +272,690 @@ def load_input(input_path: str | Path) -> pd.DataFrame:
         raise ValueError("Unsupported input format; provide .json or .csv or use stdin JSON")
 
 
-def load_brand(brand_path: str | Path | None) -> dict[str, Any] | None:
-    if not brand_path:
+def load_sheets(input_path: str | Path) -> dict[str, pd.DataFrame | list[dict[str, Any]]] | None:
+    """Load a multi-sheet input as {sheet name: DataFrame or records}, else None.
+
+    A directory supplies one sheet per .csv/.tsv/.json/.ndjson/.jsonl file,
+    named after the file and in file name order; a JSON file whose top
+    level is an object of record lists supplies one sheet per key. Any
+    other input (including stdin) is a single sheet for load_input.
+    """
+    p = Path(input_path)
+    if str(input_path) == "-":
         return None
-    p = Path(brand_path)
-    if not p.exists():
-        print(f"Warning: Brand file not found: {p}", file=sys.stderr)
+    if p.is_dir():
+        files = sorted(f for f in p.iterdir() if f.suffix.lower() in (".csv", ".tsv", ".json", ".ndjson", ".jsonl"))
+        if not files:
+            raise ValueError(f"No .csv/.tsv/.json/.ndjson files in {p}")
+        return {f.stem: load_input(f) for f in files}
+    if p.suffix.lower() != ".json" or not p.exists():
+        return None
+    with p.open(encoding="utf-8") as fh:
+        head = fh.read(JSON_READ_BLOCK).lstrip()
+    if not head.startswith("{"):
+        return None
+    data = json.loads(p.read_text(encoding="utf-8"))
+    if not data or not all(isinstance(records, list) for records in data.values()):
+        return None
+    return data
+
+
+def optimize_dtypes(df: pd.DataFrame, parse_dates: bool = False) -> pd.DataFrame:
+    """Return df with smaller dtypes that write the same workbook.
+
+    Integer columns are downcast to the smallest integer type that holds
+    them, float64 columns to float32 when every distinct value and its text
+    form survive the round trip, and text columns with at most
+    CATEGORY_MAX_RATIO distinct values become categoricals. With
+    parse_dates, text columns named like dates or times (the Insights
+    heuristic) are parsed into datetime64 when every value parses; unlike
+    the other conversions this changes the output, writing them as Excel
+    dates instead of text.
+    """
+    with _phase("optimize_dtypes", rows=len(df), cells=df.size):
+        types = pd.api.types
+        converted = {}
+        for col in df.columns:
+            values = df[col]
+            if types.is_bool_dtype(values.dtype):
+                continue
+            if types.is_integer_dtype(values.dtype):
+                if len(values):
+                    converted[col] = pd.to_numeric(values, downcast="integer")
+            elif values.dtype == "float64":
+                distinct = values.dropna().unique()
+                narrow = distinct.astype("float32")
+                # The text check keeps widths and written values identical (e.g. 0.1f stays 0.10000000149011612)
+                if (narrow.astype("float64") == distinct).all() and \
+                        [str(v) for v in narrow] == [str(v) for v in distinct.tolist()]:
+                    converted[col] = values.astype("float32")
+            elif values.dtype == object or types.is_string_dtype(values.dtype):
+                if types.infer_dtype(values, skipna=True) != "string":
+                    continue
+                if parse_dates and _is_time_axis(col):
+                    try:
+                        parsed = pd.to_datetime(values, errors="coerce")
+                    except (TypeError, ValueError):  # e.g. mixed time zones
+                        parsed = None
+                    if parsed is not None and parsed.notna().sum() == values.notna().sum():
+                        converted[col] = parsed
+                        continue
+                if values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+                    converted[col] = values.astype("category")
+        if not converted:
+            return df
+        out = df.copy(deep=False)
+        for col, values in converted.items():
+            out[col] = values
+        return out
+
+
+def _load_small_records(p: Path, max_records: int) -> list[dict[str, Any]] | None:
+    """Parse a small JSON/NDJSON file as records, or None if it needs pandas.
+
+    Files that pd.read_json would reinterpret (date-named columns, numeric
+    strings) are left to pandas so both paths produce the same workbook.
+    """
+    if p.stat().st_size > FAST_PATH_MAX_BYTES:
+        return None
+    text = p.read_text(encoding="utf-8")
+    try:
+        if p.suffix.lower() == ".json":
+            records = json.loads(text)
+        else:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError:
+        return None
+    if not isinstance(records, list) or len(records) > max_records:
         return None
+    inferred = _infer_record_columns(records)
+    if inferred is None or _read_json_converts(records, *inferred):
+        return None
+    return records
+
+
+def _read_json_converts(records: list[dict[str, Any]], columns: list[str], kinds: list[str]) -> bool:
+    """True if pd.read_json would convert a column that records_excel writes as-is."""
+    for col, kind in zip(columns, kinds):
+        name = col.lower()
+        # read_json's default date columns
+        if name.endswith(("_at", "_time")) or name.startswith("timestamp") or name in ("modified", "date", "datetime"):
+            return True
+        if kind == "text":
+            # String columns that all parse as numbers are coerced to numbers
+            try:
+                for record in records:
+                    value = record.get(col)
+                    if value is not None:
+                        float(value)
+            except (TypeError, ValueError):
+                continue
+            return True
+    return False
+
+
+def iter_input(input_path: str | Path, chunksize: int = INPUT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the input as DataFrames of at most chunksize rows.
+
+    NDJSON and CSV/TSV are read through pandas' chunked readers; JSON arrays
+    (from a file or stdin) are decoded one record at a time, so the full
+    dataset is never held in memory.
+    """
+    if str(input_path) == "-":
+        return _batch_records(_iter_json_records(sys.stdin), chunksize)
+    p = Path(input_path)
+    if not p.exists():
+        raise FileNotFoundError(f"Input file not found: {p}")
+    suffix = p.suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return _iter_reader(pd.read_json(p, orient="records", lines=True, chunksize=chunksize))
+    if suffix in (".csv", ".tsv"):
+        sep = "\t" if suffix == ".tsv" else ","
+        return _iter_reader(pd.read_csv(p, sep=sep, chunksize=chunksize))
+    return _batch_records(_iter_json_file(p), chunksize)
+
+
+def _iter_reader(reader: Any) -> Iterator[pd.DataFrame]:
+    with reader:
+        yield from reader
+
+
+def _iter_json_file(p: Path) -> Iterator[Any]:
+    with p.open(encoding="utf-8") as fh:
+        yield from _iter_json_records(fh)
+
+
+def _iter_json_records(fh: TextIO) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array, or successive top-level
+    values for NDJSON/concatenated JSON, reading fh in fixed-size blocks."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    eof = False
+    started = in_array = False
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                break
+            block = fh.read(JSON_READ_BLOCK)
+            eof = not block
+            buf, pos = block, 0
+            continue
+        if not started:
+            started = True
+            if buf[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+        if in_array and buf[pos] == "]":
+            break
+        try:
+            value, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Record straddles the block boundary; pull in more text and retry
+            if eof:
+                raise
+            block = fh.read(JSON_READ_BLOCK)
+            eof = not block
+            buf, pos = buf[pos:] + block, 0
+            continue
+        yield value
+
+
+def _batch_records(records: Iterable[Any], chunksize: int) -> Iterator[pd.DataFrame]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunksize:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+def _prefetch(batches: Iterable[pd.DataFrame], depth: int = 2) -> Iterator[pd.DataFrame]:
+    """Read batches on a background thread so parsing overlaps with writing.
+
+    If the consumer stops early (or the iterator is closed), the reader is
+    told to stop and joined, and batches is closed if it is a generator.
+    """
+    q: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Bounded waits, so a consumer that went away cannot block the reader forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if not put(batch):
+                    break
+        except BaseException as ex:  # re-raised in the consumer
+            put(ex)
+        finally:
+            if stop.is_set() and hasattr(batches, "close"):
+                batches.close()
+            put(done)
+
+    reader = threading.Thread(target=produce, daemon=True)
+    reader.start()
     try:
-        data = json.loads(p.read_text(encoding="utf-8"))
-        
-        # Backward Compatibility: Convert v1 to v2 schema internally
-        if "colors" not in data:
-            return {
-                "name": data.get("name", "Unknown"),
-                "fonts": {
-                    "heading": data.get("font", "Arial"),
-                    "body": data.get("font", "Arial")
-                },
-                "colors": {
-                    "primary": data.get("header_bg", "#ffffff"), # Map header_bg to primary
-                    "background": "#ffffff",
-                    "text": "#000000",
-                    "header_text": data.get("header_font_color", "#000000"),
-                    "borders": "#b0aea5" 
-                },
-                "excel": {
-                    "show_gridlines": True, # Default for lazy
-                    "header_borders": False
-                }
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+
+
+def load_brand(brand_path: str | Path | None) -> dict[str, Any] | None:
+    """Load a brand file and return its normalized (v2) data, or None with a warning."""
+    compiled = compile_brand(brand_path)
+    return copy.deepcopy(compiled.data) if compiled else None
+
+
+def _normalize_brand(data: dict[str, Any]) -> dict[str, Any]:
+    # Backward Compatibility: Convert v1 to v2 schema internally
+    if "colors" not in data:
+        return {
+            "name": data.get("name", "Unknown"),
+            "fonts": {
+                "heading": data.get("font", "Arial"),
+                "body": data.get("font", "Arial")
+            },
+            "colors": {
+                "primary": data.get("header_bg", "#ffffff"), # Map header_bg to primary
+                "background": "#ffffff",
+                "text": "#000000",
+                "header_text": data.get("header_font_color", "#000000"),
+                "borders": "#b0aea5" 
+            },
+            "excel": {
+                "show_gridlines": True, # Default for lazy
+                "header_borders": False
             }
-        return data
+        }
+    return data
+
+
+# Brand rule conditions that test each cell's value -> xlsxwriter "cell" criteria
+CELL_CONDITIONS = {
+    "lessThan": "less than",
+    "lessThanOrEqual": "less than or equal to",
+    "greaterThan": "greater than",
+    "greaterThanOrEqual": "greater than or equal to",
+    "equal": "equal to",
+    "notEqual": "not equal to",
+    "between": "between",
+    "notBetween": "not between",
+}
+# Brand rule conditions that rank a column's cells against each other
+RANK_CONDITIONS = ("top", "bottom", "colorScale")
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """An analytics rule with its regex, condition and styles resolved.
+
+    operator is the brand condition: an openpyxl CellIsRule operator, or
+    one of RANK_CONDITIONS. value is the operand; a [low, high] pair for
+    between/notBetween and the rank N for top/bottom.
+    """
+    regex: re.Pattern
+    operator: str
+    criteria: str  # xlsxwriter "cell" criteria; empty for RANK_CONDITIONS
+    value: Any
+    xlsx_format: dict[str, str]
+    percent: bool = False  # top/bottom: N is a percentage of the cells
+    colors: tuple[str, ...] = ()  # colorScale: "#rrggbb" of the minimum, (midpoint,) maximum
+
+    @property
+    def ranked(self) -> bool:
+        """True when the result for a cell depends on the other cells of its range."""
+        return self.operator in RANK_CONDITIONS
+
+    @property
+    def signature(self) -> tuple:
+        """Everything but the column pattern; rules with equal signatures format cells alike."""
+        return (self.operator, json.dumps(self.value, default=str), tuple(sorted(self.xlsx_format.items())),
+                self.percent, self.colors)
+
+    def formulas(self) -> list[str]:
+        """The operands of a cell rule as Excel formulas."""
+        values = self.value if self.operator in ("between", "notBetween") else [self.value]
+        return [_cf_operand(v) for v in values]
+
+    def openpyxl_rule(self) -> Any:
+        """A new openpyxl Rule; each range needs its own, as add() assigns its priority."""
+        from openpyxl.formatting.rule import CellIsRule, ColorScaleRule, Rule
+
+        if self.operator == "colorScale":
+            ends = ["FF" + c[1:] for c in self.colors]
+            if len(ends) == 3:
+                return ColorScaleRule(start_type="min", start_color=ends[0], mid_type="percentile", mid_value=50,
+                                      mid_color=ends[1], end_type="max", end_color=ends[2])
+            return ColorScaleRule(start_type="min", start_color=ends[0], end_type="max", end_color=ends[1])
+        if self.operator in ("top", "bottom"):
+            return Rule(type="top10", rank=int(self.value), percent=self.percent or None,
+                        bottom=self.operator == "bottom" or None, dxf=self.dxf)
+        rule = CellIsRule(operator=self.operator, formula=self.formulas(), stopIfTrue=True)
+        rule.dxf = self.dxf
+        return rule
+
+    def xlsxwriter_options(self, fmt: Any) -> dict[str, Any]:
+        """conditional_format options for this rule, with fmt as its DXF Format."""
+        if self.operator == "colorScale":
+            names = ("min_color", "mid_color", "max_color") if len(self.colors) == 3 else ("min_color", "max_color")
+            return {"type": f"{len(self.colors)}_color_scale", **dict(zip(names, self.colors))}
+        if self.operator in ("top", "bottom"):
+            options = {"type": self.operator, "value": int(self.value), "format": fmt}
+            if self.percent:
+                options["criteria"] = "%"
+            return options
+        options = {"type": "cell", "criteria": self.criteria, "format": fmt, "stop_if_true": True}
+        formulas = self.formulas()
+        if len(formulas) == 2:
+            options.update(minimum=formulas[0], maximum=formulas[1])
+        else:
+            options["value"] = formulas[0]
+        return options
+
+    @functools.cached_property
+    def dxf(self) -> DifferentialStyle:
+        """openpyxl differential style, built on first use from xlsx_format."""
+        from openpyxl.styles import Color, Font, PatternFill
+        from openpyxl.styles.differential import DifferentialStyle
+
+        font = fill = None
+        if "font_color" in self.xlsx_format:
+            font = Font(color=Color(rgb="FF" + self.xlsx_format["font_color"][1:]))
+        if "bg_color" in self.xlsx_format:
+            color = Color(rgb="FF" + self.xlsx_format["bg_color"][1:])
+            fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        return DifferentialStyle(font=font, fill=fill)
+
+
+@dataclass(frozen=True)
+class CompiledBrand:
+    """A validated, normalized brand with every derived style prebuilt.
+
+    Build with compile_brand, which memoizes by content hash. get() reads
+    the normalized data like a dict, so option lookups work on either form.
+    The openpyxl style objects are built on first access, so runs that only
+    use xlsxwriter never import openpyxl.
+    """
+    key: str
+    data: dict[str, Any]
+    palette: list[str]
+    rules: list[CompiledRule]
+    xlsx_formats: dict[str, dict[str, Any]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    @functools.cached_property
+    def header_font(self) -> Font:
+        from openpyxl.styles import Font
+        colors = self.data.get("colors", {})
+        return Font(name=self.data.get("fonts", {}).get("heading", "Arial"), bold=True,
+                    color=_hex(colors.get("header_text", "000000")))
+
+    @functools.cached_property
+    def header_fill(self) -> PatternFill:
+        from openpyxl.styles import PatternFill
+        c_primary = _hex(self.data.get("colors", {}).get("primary", "ffffff"))
+        return PatternFill(start_color=c_primary, end_color=c_primary, fill_type="solid")
+
+    @functools.cached_property
+    def header_alignment(self) -> Alignment:
+        from openpyxl.styles import Alignment
+        return Alignment(horizontal="left", vertical="center")
+
+    @functools.cached_property
+    def header_border(self) -> Border:
+        from openpyxl.styles import Border, Side
+        c_borders = _hex(self.data.get("colors", {}).get("borders", "b0aea5"))
+        return Border(bottom=Side(border_style="thin", color=c_borders))
+
+    @functools.cached_property
+    def body_font(self) -> Font:
+        from openpyxl.styles import Font
+        return Font(name=self.data.get("fonts", {}).get("body", "Arial"))
+
+    @functools.cached_property
+    def alt_fill(self) -> PatternFill:
+        from openpyxl.styles import PatternFill
+        return PatternFill(start_color="f9f9f9", end_color="f9f9f9", fill_type="solid")
+
+
+# Branding functions accept the raw normalized dict or its compiled form
+BrandLike = dict[str, Any] | CompiledBrand
+
+# Writers save to a path or a writable binary file object; None writes to an
+# in-memory buffer and returns its bytes (see _open_output)
+ExcelOutput = str | Path | BinaryIO | None
+
+# Bump when CompiledBrand changes shape so on-disk caches are not reused
+BRAND_CACHE_VERSION = 3
+_COMPILED_BRANDS: dict[str, CompiledBrand] = {}
+
+
+def compile_brand(
+    brand: str | Path | dict[str, Any] | CompiledBrand | None,
+    cache_dir: str | Path | None = None,
+) -> CompiledBrand | None:
+    """Return the CompiledBrand for a brand file path, brand dict or CompiledBrand.
+
+    Results are memoized in-process by a hash of the brand content, and with
+    cache_dir also pickled to disk so other processes skip compilation.
+    Missing or invalid brand files give a warning and None, like load_brand.
+    """
+    if not brand:
+        return None
+    if isinstance(brand, CompiledBrand):
+        return brand
+
+    if isinstance(brand, (str, Path)):
+        p = Path(brand)
+        if not p.exists():
+            print(f"Warning: Brand file not found: {p}", file=sys.stderr)
+            return None
+        raw = p.read_bytes()
+        data = None
+    else:
+        data = brand
+        raw = json.dumps(brand, sort_keys=True, default=str).encode("utf-8")
+    key = hashlib.sha256(raw + f"|v{BRAND_CACHE_VERSION}".encode()).hexdigest()
+
+    if key in _COMPILED_BRANDS:
+        return _COMPILED_BRANDS[key]
+
+    cache_file = Path(cache_dir) / f"brand-{key}.pickle" if cache_dir else None
+    if cache_file and cache_file.exists():
+        try:
+            compiled = pickle.loads(cache_file.read_bytes())
+            _COMPILED_BRANDS[key] = compiled
+            return compiled
+        except Exception:
+            pass  # stale or corrupt entry; recompile below
+
+    try:
+        if data is None:
+            data = _normalize_brand(json.loads(raw.decode("utf-8")))
+        compiled = _build_compiled_brand(key, data)
     except Exception as e:
         print(f"Warning: Failed to parse brand file: {e}", file=sys.stderr)
         return None
 
+    _COMPILED_BRANDS[key] = compiled
+    if cache_file:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(compiled))
+        tmp.replace(cache_file)
+    return compiled
+
+
+def _cf_operand(value: Any) -> str:
+    """A rule value as a conditional-format formula: numbers as is, "=..." as a
+    formula, other text as a quoted string."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if text.startswith("="):
+        return text[1:]
+    try:
+        float(text)
+        return text
+    except ValueError:
+        return '"' + text.replace('"', '""') + '"'
+
+
+def _hex(value: str) -> str:
+    c = value.replace("#", "")
+    if len(c) not in (3, 6) or re.fullmatch(r"[0-9a-fA-F]+", c) is None:
+        raise ValueError(f"Invalid hex color: {value!r}")
+    return c
+
+
+def _build_compiled_brand(key: str, data: dict[str, Any]) -> CompiledBrand:
+    colors = data.get("colors", {})
+
+    # Validate every color up front; the style objects are built lazily
+    for name, default in (("primary", "ffffff"), ("header_text", "000000"), ("borders", "b0aea5")):
+        _hex(colors.get(name, default))
+
+    palette = [
+        _hex(colors.get("primary", "d97757")),
+        _hex(colors.get("secondary", "6a9bcc")),
+        _hex(colors.get("tertiary", "788c5d"))
+    ]
+
+    rules = []
+    for idx, rule in enumerate(data.get("analytics", {}).get("rules", [])):
+        pattern = rule.get("column_pattern")
+        condition = rule.get("condition")
+        style = rule.get("style", {})
+
+        if not pattern or not condition:
+            continue
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            print(f"Warning: Skipping analytics rule {idx}: bad column_pattern: {e}", file=sys.stderr)
+            continue
+
+        xlsx_format = {}
+        if "font_color" in style:
+            xlsx_format["font_color"] = "#" + _hex(style["font_color"])
+        if "bg_color" in style:
+            xlsx_format["bg_color"] = "#" + _hex(style["bg_color"])
+
+        value = rule.get("value")
+        colors: tuple[str, ...] = ()
+        if condition in ("between", "notBetween"):
+            if not isinstance(value, list) or len(value) != 2:
+                print(f"Warning: Skipping analytics rule {idx}: {condition} needs a [low, high] value", file=sys.stderr)
+                continue
+        elif condition in ("top", "bottom"):
+            value = 10 if value is None else value
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                print(f"Warning: Skipping analytics rule {idx}: {condition} needs a positive whole number", file=sys.stderr)
+                continue
+        elif condition == "colorScale":
+            ends = [style.get("min_color", "ffffff"), style.get("mid_color"), style.get("max_color", palette[0])]
+            colors = tuple("#" + _hex(c) for c in ends if c)
+        elif condition not in CELL_CONDITIONS:
+            print(f"Warning: Analytics rule {idx}: unknown condition {condition!r}; using lessThan", file=sys.stderr)
+            condition = "lessThan"
+
+        rules.append(CompiledRule(
+            regex=regex,
+            operator=condition,
+            criteria=CELL_CONDITIONS.get(condition, ""),
+            value=value,
+            xlsx_format=xlsx_format,
+            percent=bool(rule.get("percent", False)),
+            colors=colors,
+        ))
+
+    return CompiledBrand(
+        key=key,
+        data=data,
+        palette=palette,
+        rules=rules,
+        xlsx_formats=compile_xlsxwriter_formats(data),
+    )
+
+
+def _open_output(output: ExcelOutput) -> Path | BinaryIO:
+    """Where a writer saves: output's path (its directory created), output
+    itself when it is a file object, or a new buffer when output is None."""
+    if output is None:
+        return io.BytesIO()
+    if hasattr(output, "write"):
+        return output
+    out = Path(output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    return out
+
+
+def _output_result(output: ExcelOutput, out: Path | BinaryIO) -> Path | BinaryIO | bytes:
+    """A writer's return value: the path or file object written, or the bytes for output=None."""
+    return out.getvalue() if output is None else out
+
 
 def generate_excel(
-    df: pd.DataFrame,
-    output: str | Path,
+    df: pd.DataFrame | Iterable[pd.DataFrame] | list[dict[str, Any]],
+    output: ExcelOutput = None,
     sheet_name: str = "Sheet1",
     engine: str | None = None,
-    brand: dict[str, Any] | None = None,
-) -> Path:
-    out = Path(output)
-    out.parent.mkdir(parents=True, exist_ok=True)
-    
+    brand: BrandLike | None = None,
+    mode: str = "normal",
+    rows_per_sheet: int | None = None,
+    compression: str = "fast",
+) -> Path | BinaryIO | bytes:
+    """Write df to output, branded when a brand is given.
+
+    Rows past Excel's sheet limit, or past rows_per_sheet, continue on
+    further sheets ("Sheet1 (2)", "Sheet1 (3)", ...) written through the
+    streaming writers. engine="native" uses native_excel, which always
+    streams and takes compression ("store", "fast" or "best"). An iterable
+    of DataFrame batches is always streamed. Input without any columns
+    raises ValueError.
+
+    output may be a path, a writable binary file object (returned once the
+    workbook is written to it) or None, which returns the workbook as bytes
+    without writing a file.
+    """
+    out = _open_output(output)
+    brand = compile_brand(brand)
+
+    if mode not in ("normal", "stream"):
+        raise ValueError(f"Unknown mode: {mode!r} (expected 'normal' or 'stream')")
+
+    if isinstance(df, list) and (not df or isinstance(df[0], dict)):
+        # Small record lists skip pandas entirely
+        if (df and mode == "normal" and engine in (None, "xlsxwriter")
+                and len(df) <= FAST_PATH_MAX_ROWS and rows_per_sheet is None and _rule_styling(brand) == "live"
+                and _infer_record_columns(df)):
+            return _output_result(output, records_excel(df, out, sheet_name=sheet_name, brand=brand))
+        df = pd.DataFrame(df)
+    if isinstance(df, pd.DataFrame):
+        if not len(df.columns):
+            raise ValueError("Nothing to write: the input has no columns")
+    elif mode == "normal":
+        # Batches (e.g. from iter_input) are only known as they arrive, so they are streamed
+        mode = "stream"
+
+    if engine == "native":
+        return _output_result(output, native_excel(df, out, sheet_name=sheet_name, brand=brand,
+                                                   rows_per_sheet=rows_per_sheet, compression=compression))
+
+    if mode == "normal" and (rows_per_sheet is not None or len(df) > EXCEL_MAX_ROWS - 1):
+        # to_excel can only fill one sheet; the streaming writers partition
+        mode = "stream"
+
+    # xlsxwriter has a native branding backend; streaming maps to constant_memory
+    if engine == "xlsxwriter" and (brand or mode == "stream"):
+        return _output_result(output, xlsxwriter_excel(df, out, sheet_name=sheet_name, brand=brand,
+                                                       constant_memory=mode == "stream", rows_per_sheet=rows_per_sheet))
+
+    if mode == "stream":
+        if engine and engine != "openpyxl":
+            print("Warning: Streaming mode supports 'openpyxl' or 'xlsxwriter'; using openpyxl.", file=sys.stderr)
+        return _output_result(output, stream_excel(df, out, sheet_name=sheet_name, brand=brand,
+                                                   rows_per_sheet=rows_per_sheet))
+
     # Force openpyxl if branding is requested, as we need it for styling
     if brand and not engine:
         engine = "openpyxl"
 
     # If not using openpyxl, just write and return
     if engine != "openpyxl" and brand:
-        print("Warning: Branding requires 'openpyxl' engine. Styles may not be applied.", file=sys.stderr)
+        print("Warning: Branding requires the 'openpyxl' or 'xlsxwriter' engine. Styles may not be applied.", file=sys.stderr)
+
+    writer = pd.ExcelWriter(out, engine=engine or "openpyxl")
+    try:
+        with _phase("to_excel", sheet_name, rows=len(df), cells=df.size):
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
 
-    with pd.ExcelWriter(out, engine=engine or "openpyxl") as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-        
         # Apply branding if possible
         if brand and hasattr(writer, "book"):
             workbook = writer.book
@@ -105,195 +963,3311 @@ def generate_excel(
             apply_branding(worksheet, df, brand)
             apply_conditional_formatting(worksheet, brand)
             generate_insights(workbook, df, brand)
+    except BaseException:
+        writer.close()
+        raise
 
-    return out
+    # Closing the writer is what zips and saves the workbook
+    with _phase("save"):
+        writer.close()
+    return _output_result(output, out)
+
+
+def stream_excel(
+    df: pd.DataFrame | Iterable[pd.DataFrame],
+    output: ExcelOutput = None,
+    sheet_name: str = "Sheet1",
+    brand: BrandLike | None = None,
+    rows_per_sheet: int | None = None,
+) -> Path | BinaryIO | bytes:
+    """Write df through an openpyxl write-only sheet, styling rows as they are emitted.
+
+    Each column gets one pre-styled cell per row kind (header, body, alternating
+    body) that is re-used for every row, so no per-cell objects accumulate and
+    memory stays flat regardless of the number of rows.
+
+    df may also be an iterable of DataFrame batches (see iter_input); batches
+    are read ahead on a background thread and written as they arrive. Columns
+    are fixed by the first batch.
+
+    Rows past Excel's sheet limit, or past rows_per_sheet, continue on a new
+    sheet named by _part_name. Every part gets the header, branding and
+    conditional formats; the Insights chart then shows totals across all
+    parts (see _InsightsTotals).
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import Cell
+    from openpyxl.utils import get_column_letter
+
+    out = _open_output(output)
+    part_rows = _partition_size(rows_per_sheet)
+    # Ranked rules can only be evaluated statically over a whole column on one sheet
+    whole = isinstance(df, pd.DataFrame) and len(df) <= part_rows
+
+    df, batches = _open_batches(df)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    columns = [str(c) for c in df.columns]
+    widths = compute_column_widths(df, **_autosize_options(brand))
+    static = _static_rules(brand, columns, ranked=whole)
+
+    header_cells = [Cell(ws, row=1, column=idx, value=name) for idx, name in enumerate(columns, 1)]
+    body_cells = [Cell(ws, row=1, column=idx) for idx in range(1, len(columns) + 1)]
+    alt_cells = body_cells
+
+    if brand:
+        opts = brand.get("excel", {})
+        ids = compile_brand_styles(wb, brand)
+
+        for cell in header_cells:
+            st = _style_array(cell)
+            st.fontId = ids["header_font"]
+            st.fillId = ids["header_fill"]
+            st.alignmentId = ids["header_alignment"]
+            if opts.get("header_borders", False):
+                st.borderId = ids["header_border"]
+        for cell in body_cells:
+            _style_array(cell).fontId = ids["body_font"]
+        if opts.get("alternating_rows", False):
+            alt_cells = [Cell(ws, row=1, column=idx) for idx in range(1, len(columns) + 1)]
+            for cell in alt_cells:
+                st = _style_array(cell)
+                st.fontId = ids["body_font"]
+                st.fillId = ids["alt_fill"]
+
+    if static:
+        rule_ids = _static_style_ids(wb, brand, static.rules)
+        # Restyled copies of the body/alternating cells by (column, rule, alternating)
+        rule_cells: dict[tuple[int, int, bool], Any] = {}
+
+        def with_rule_cells(cells: list[Any], hits: list[tuple[int, int]], alt: bool) -> list[Any]:
+            cells = list(cells)
+            for col, code in hits:
+                cell = rule_cells.get((col, code, alt))
+                if cell is None:
+                    cell = rule_cells[(col, code, alt)] = Cell(ws, row=1, column=col + 1)
+                    st = cell._style = copy.copy(_style_array(cells[col]))
+                    font_id, fill_id = rule_ids[code]
+                    if font_id is not None:
+                        st.fontId = font_id
+                    if fill_id is not None:
+                        st.fillId = fill_id
+                cells[col] = cell
+            return cells
+
+    def start_part(ws: Any) -> None:
+        # Column widths must be set before the first row is written
+        for idx, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+        if brand:
+            ws.sheet_view.showGridLines = brand.get("excel", {}).get("show_gridlines", True)
+        # append() can leave an unstyled cell holding the next cell's type; rebind the names
+        for cell, name in zip(header_cells, columns):
+            cell.value = name
+        ws.append(header_cells)
+
+    x_col, y_cols = _pick_chart_columns(df)
+    max_points, how, hidden = _insights_options(brand)
+    totals = _InsightsTotals(columns, str(x_col), [str(c) for c in y_cols], how, max_points) if brand and y_cols else None
+
+    # (worksheet, data rows) of each finished part
+    parts: list[tuple[Any, int]] = []
+    start_part(ws)
+    phase = _phase("write_rows", ws.title).__enter__()
+    row_idx = 0
+    rows = _iter_static_rows(df.columns, batches, static) if static else _iter_row_values(df.columns, batches)
+    for values in rows:
+        if static:
+            values, hits = values
+        if row_idx == part_rows:
+            phase.rows, phase.cells = row_idx, row_idx * len(columns)
+            phase.__exit__(None, None, None)
+            parts.append((ws, row_idx))
+            ws = wb.create_sheet(_part_name(sheet_name, len(parts) + 1))
+            start_part(ws)
+            phase = _phase("write_rows", ws.title).__enter__()
+            row_idx = 0
+        row_idx += 1
+        # Alternating rows start on the first data row, matching apply_branding
+        cells = alt_cells if row_idx % 2 == 1 else body_cells
+        if static and hits:
+            cells = with_rule_cells(cells, hits, row_idx % 2 == 1)
+        for cell, value in zip(cells, values):
+            cell.value = value
+        ws.append(cells)
+        if totals:
+            totals.add(values)
+    phase.rows, phase.cells = row_idx, row_idx * len(columns)
+    phase.__exit__(None, None, None)
+    parts.append((ws, row_idx))
+
+    if brand:
+        for part_ws, n_rows in parts:
+            apply_conditional_formatting_region(part_ws, brand, tuple(header_cells), 2, n_rows + 1,
+                                                rules=static.live if static else None)
+        # A chart can only plot one sheet's rows, and only a bounded number of them usefully
+        if len(parts) == 1 and not (max_points and row_idx > max_points):
+            generate_insights(wb, df, brand, n_rows=row_idx)
+        elif totals:
+            table_columns, rows = totals.table()
+            data_ws = _add_insights_data(wb, table_columns, rows, hidden)
+            aggregate = pd.DataFrame(rows, columns=table_columns)
+            generate_insights(wb, aggregate, brand, data_sheet=data_ws, chart_columns=(table_columns[0], table_columns[1:]))
+
+    with _phase("save"):
+        wb.save(out)
+    return _output_result(output, out)
+
+
+def _partition_size(rows_per_sheet: int | None) -> int:
+    """Data rows per sheet: rows_per_sheet, capped by Excel's row limit."""
+    limit = EXCEL_MAX_ROWS - 1
+    if rows_per_sheet is None:
+        return limit
+    if rows_per_sheet < 1:
+        raise ValueError(f"rows_per_sheet must be at least 1, got {rows_per_sheet}")
+    return min(rows_per_sheet, limit)
+
+
+def _part_name(sheet_name: str, part: int) -> str:
+    """Name of the part-th (1-based) sheet of a partitioned write: "Sheet1", "Sheet1 (2)", ..."""
+    if part == 1:
+        return sheet_name
+    suffix = f" ({part})"
+    # Excel sheet names are at most 31 characters
+    return sheet_name[:31 - len(suffix)] + suffix
+
+
+class _InsightsTotals:
+    """Running per-X aggregates of the Insights chart columns of a streamed write.
+
+    A streamed write never holds all rows, so the chart data is gathered
+    row by row: Y sums and counts by X value and, in case there turn out to
+    be more than INSIGHTS_MAX_CATEGORIES distinct X values, by runs of
+    consecutive rows (_Buckets).
+    """
+
+    def __init__(self, columns: list[str], x_col: str, y_cols: list[str], how: str = "sum",
+                 max_points: int | None = INSIGHTS_MAX_POINTS) -> None:
+        self.x_col = x_col
+        self.y_cols = y_cols[:3]
+        self.x_idx = columns.index(x_col)
+        self.y_idx = [columns.index(c) for c in self.y_cols]
+        self.how = how
+        self.max_points = max_points
+        self.by_x: dict[Any, tuple[list[float], list[int]]] | None = {}
+        self.buckets = _Buckets(max_points or INSIGHTS_MAX_POINTS)
+
+    def add(self, values: Sequence[Any]) -> None:
+        ys = [_chart_number(values[i]) for i in self.y_idx]
+        x = values[self.x_idx]
+        self.buckets.add(x, ys)
+        if self.by_x is None or x is None:
+            return
+        key = x if isinstance(x, (str, int, float)) else str(x)
+        acc = self.by_x.get(key)
+        if acc is None:
+            if len(self.by_x) >= INSIGHTS_MAX_CATEGORIES:
+                self.by_x = None
+                return
+            acc = self.by_x[key] = ([0.0] * len(ys), [0] * len(ys))
+        _accumulate(acc, ys)
+
+    def table(self) -> tuple[list[str], list[list[Any]]]:
+        """Header and rows (X value followed by the aggregated Y values) to chart."""
+        header = [self.x_col, *self.y_cols]
+        if self.by_x is not None:
+            accs = list(self.by_x.values())
+            return header, _insights_rows(self.x_col, list(self.by_x), [a[0] for a in accs], [a[1] for a in accs],
+                                          self.how, self.max_points)
+        return header, self.buckets.rows(self.how, _is_time_axis(self.x_col))
+
+
+class _Buckets:
+    """Streamed chart points merged into at most max_points runs of consecutive rows.
+
+    Runs double in length whenever there are 2 * max_points of them, so
+    memory stays constant however many rows are added.
+    """
+
+    def __init__(self, max_points: int) -> None:
+        self.max_points = max_points
+        self.width = 1
+        # [first X, last X, rows, (Y sums, Y counts)]
+        self.buckets: list[list[Any]] = []
+
+    def add(self, x: Any, ys: list[float | None]) -> None:
+        if not self.buckets or self.buckets[-1][2] == self.width:
+            if len(self.buckets) == 2 * self.max_points:
+                self._merge()
+            self.buckets.append([x, x, 0, ([0.0] * len(ys), [0] * len(ys))])
+        bucket = self.buckets[-1]
+        bucket[1] = x
+        bucket[2] += 1
+        _accumulate(bucket[3], ys)
+
+    def _merge(self) -> None:
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            pair = self.buckets[i:i + 2]
+            first, last = pair[0], pair[-1]
+            sums = [sum(b[3][0][k] for b in pair) for k in range(len(first[3][0]))]
+            counts = [sum(b[3][1][k] for b in pair) for k in range(len(first[3][1]))]
+            merged.append([first[0], last[1], sum(b[2] for b in pair), (sums, counts)])
+        self.buckets = merged
+        self.width *= 2
+
+    def rows(self, how: str, time_axis: bool) -> list[list[Any]]:
+        """One row per run: on a time axis its first X value and Y averages, otherwise
+        "first - last" X values and the Y aggregates."""
+        while len(self.buckets) > self.max_points:
+            self._merge()
+        rows = []
+        for first, last, _, (sums, counts) in self.buckets:
+            if time_axis:
+                # A downsampled series: each run is plotted at its average
+                rows.append([first, *(_aggregate("mean", s, c) for s, c in zip(sums, counts))])
+            else:
+                label = first if first == last else f"{first} - {last}"
+                rows.append([label, *(_aggregate(how, s, c) for s, c in zip(sums, counts))])
+        return rows
+
+
+def _chart_number(value: Any) -> float | None:
+    """value if it can be summed for a chart, else None."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return value
+    return None
+
+
+def _accumulate(acc: tuple[list[float], list[int]], ys: list[float | None]) -> None:
+    sums, counts = acc
+    for i, y in enumerate(ys):
+        if y is not None:
+            sums[i] += y
+            counts[i] += 1
+
+
+def _aggregate(how: str, total: float, count: int) -> float | None:
+    if how == "sum":
+        return total
+    return total / count if count else None
+
+
+def _insights_rows(
+    x_col: Any,
+    xs: list[Any],
+    sums: list[list[float]],
+    counts: list[list[int]],
+    how: str,
+    max_points: int | None,
+) -> list[list[Any]]:
+    """Chart rows (X value, aggregated Y values) from the Y sums and counts per distinct X.
+
+    A time axis is sorted by X; past max_points rows it is downsampled with
+    LTTB on the first Y column. Any other axis keeps its first-seen order
+    and, past max_points rows, the max_points - 1 largest categories by the
+    first Y column, with the rest folded into an "Other" category.
+    """
+    order = list(range(len(xs)))
+    time_axis = _is_time_axis(x_col)
+    if time_axis:
+        try:
+            order.sort(key=xs.__getitem__)
+        except TypeError:  # mixed X types; keep the input order
+            pass
+    rows = [[xs[i], *(_aggregate(how, s, c) for s, c in zip(sums[i], counts[i]))] for i in order]
+    if not max_points or len(rows) <= max_points:
+        return rows
+    if time_axis:
+        return [rows[i] for i in _lttb([row[1] for row in rows], max_points)]
+
+    ranked = sorted(order, key=lambda i: abs(rows[i][1] or 0.0), reverse=True)
+    rest = ranked[max_points - 1:]
+    n = len(sums[0])
+    other = [_aggregate(how, sum(sums[i][k] for i in rest), sum(counts[i][k] for i in rest)) for k in range(n)]
+    return [rows[i] for i in sorted(ranked[:max_points - 1])] + [["Other", *other]]
+
+
+def _aggregate_frame(df: pd.DataFrame, x_col: Any, y_cols: list[Any], how: str, max_points: int) -> list[list[Any]]:
+    """Vectorized counterpart of _insights_rows for a whole DataFrame."""
+    time_axis = _is_time_axis(x_col)
+    try:
+        grouped = df.groupby(x_col, sort=time_axis)[y_cols]
+        table = grouped.sum() if how == "sum" else grouped.mean()
+    except TypeError:  # mixed X types cannot be sorted; keep the input order
+        grouped = df.groupby(x_col, sort=False)[y_cols]
+        table = grouped.sum() if how == "sum" else grouped.mean()
+
+    other = None
+    if len(table) > max_points:
+        if time_axis:
+            table = table.iloc[_lttb(table.iloc[:, 0].tolist(), max_points)]
+        else:
+            top = table.iloc[:, 0].abs().nlargest(max_points - 1, keep="first").index
+            rest = df.loc[~df[x_col].isin(top), y_cols]
+            other = ["Other", *(rest.sum() if how == "sum" else rest.mean()).tolist()]
+            table = table[table.index.isin(top)]
+
+    rows = [[x, *ys] for x, ys in zip(table.index.tolist(), table.to_numpy(dtype=float).tolist())]
+    if other:
+        rows.append(other)
+    # Groups without numeric values (mean of nothing) become blank cells
+    return [[None if isinstance(v, float) and math.isnan(v) else v for v in row] for row in rows]
+
+
+def _lttb(values: list[float | None], n_out: int) -> list[int]:
+    """Indices of n_out points chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves the visual shape of a
+    series. Points are taken as evenly spaced; missing values count as 0.
+    """
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+    y = [v if v is not None and math.isfinite(v) else 0.0 for v in values]
+    every = (n - 2) / (n_out - 2)
+    picked = [0]
+    a = 0
+    for i in range(n_out - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        next_lo = min(hi, n - 1)
+        next_hi = max(min(int((i + 2) * every) + 1, n), next_lo + 1)
+        avg_x = (next_lo + next_hi - 1) / 2
+        avg_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        ax, ay = a, y[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+
+def _insights_options(brand: BrandLike | None) -> tuple[int | None, str, bool]:
+    """(max chart points or None, "sum" or "mean", hide the data sheet) from the brand's excel options."""
+    opts = brand.get("excel", {}) if brand else {}
+    max_points = opts.get("insights_max_points", INSIGHTS_MAX_POINTS)
+    how = opts.get("insights_aggregate", "sum")
+    if how not in ("sum", "mean"):
+        raise ValueError(f"insights_aggregate must be 'sum' or 'mean', got {how!r}")
+    if max_points is not None and max_points < 3:
+        raise ValueError(f"insights_max_points must be at least 3, got {max_points}")
+    return max_points, how, bool(opts.get("insights_data_hidden", False))
+
+
+def _add_insights_data(workbook: Any, columns: list[str], rows: list[list[Any]], hidden: bool) -> Any:
+    """Write the aggregated chart data to a new INSIGHTS_DATA_SHEET of an openpyxl workbook."""
+    ws = workbook.create_sheet(INSIGHTS_DATA_SHEET)
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+    if hidden:
+        ws.sheet_state = "hidden"
+    return ws
+
+
+def xlsxwriter_excel(
+    df: pd.DataFrame | Iterable[pd.DataFrame],
+    output: ExcelOutput = None,
+    sheet_name: str = "Sheet1",
+    brand: BrandLike | None = None,
+    constant_memory: bool = False,
+    rows_per_sheet: int | None = None,
+    insights: bool = True,
+) -> Path | BinaryIO | bytes:
+    """Write df with xlsxwriter, applying the brand natively.
+
+    The brand is translated into xlsxwriter Formats, conditional_format calls
+    and a native chart, giving the same result as the openpyxl branding path.
+    Cells are written row by row, so constant_memory (rows flushed to disk as
+    they are completed) can be used for very large outputs. df may also be an
+    iterable of DataFrame batches, and rows are partitioned across sheets,
+    as for stream_excel. insights=False leaves out the Insights chart.
+    """
+    out = _open_output(output)
+    # Ranked rules can only be evaluated statically over a whole column on one sheet
+    whole = isinstance(df, pd.DataFrame) and len(df) <= _partition_size(rows_per_sheet)
+
+    df, batches = _open_batches(df)
+    x_col, y_cols = _pick_chart_columns(df)
+    columns = [str(c) for c in df.columns]
+    static = _static_rules(brand, columns, ranked=whole)
+    return _output_result(output, _write_xlsxwriter(
+        out,
+        sheet_name,
+        brand,
+        columns=columns,
+        widths=compute_column_widths(df, **_autosize_options(brand)),
+        # Datetime columns need a number format or Excel shows the serial number
+        is_datetime=[pd.api.types.is_datetime64_any_dtype(dtype) for dtype in df.dtypes],
+        rows=_iter_static_rows(df.columns, batches, static) if static else _iter_row_values(df.columns, batches),
+        chart=(str(x_col), [str(c) for c in y_cols]),
+        constant_memory=constant_memory,
+        rows_per_sheet=rows_per_sheet,
+        static=static,
+        insights=insights,
+    ))
+
+
+def records_excel(
+    records: list[dict[str, Any]],
+    output: ExcelOutput = None,
+    sheet_name: str = "Sheet1",
+    brand: BrandLike | None = None,
+) -> Path | BinaryIO | bytes:
+    """Write a list of flat record dicts with xlsxwriter, without pandas.
+
+    The fast path for small inputs: column kinds, widths and the Insights
+    chart columns are inferred from the records the way the DataFrame path
+    would, and the output matches xlsxwriter_excel for the same data.
+    Raises ValueError if the records are not flat dicts of scalars.
+    """
+    inferred = _infer_record_columns(records)
+    if inferred is None:
+        raise ValueError("records_excel needs a list of flat dicts with scalar values")
+    columns, kinds = inferred
+
+    out = _open_output(output)
+    x_col, y_cols = _choose_chart_columns(columns, kinds)
+    return _output_result(output, _write_xlsxwriter(
+        out,
+        sheet_name,
+        brand,
+        columns=[str(c) for c in columns],
+        widths=_record_column_widths(columns, kinds, records, **_autosize_options(brand)),
+        is_datetime=[False] * len(columns),
+        rows=([record.get(col) for col in columns] for record in records),
+        chart=(str(x_col), [str(c) for c in y_cols]),
+    ))
+
+
+def generate_workbook(
+    sheets: dict[str, pd.DataFrame | list[dict[str, Any]]],
+    output: ExcelOutput = None,
+    brand: BrandLike | None = None,
+    mode: str = "normal",
+    rows_per_sheet: int | None = None,
+    insights_sheet: str | None = None,
+    workers: int | None = None,
+) -> Path | BinaryIO | bytes:
+    """Write several DataFrames (or record lists) as the sheets of one workbook.
+
+    Each sheet is rendered and branded by xlsxwriter_excel in its own worker
+    process (workers=1 renders them in turn in this process), and the
+    per-sheet packages are then assembled into output once, with one
+    style table and one shared strings table (see _assemble_workbook).
+    With a brand, the Insights chart plots insights_sheet, by default the
+    first sheet with a numeric column. mode="stream" renders in xlsxwriter's
+    constant_memory mode, whose strings are written inline. When output is
+    a file object or None (see generate_excel), the per-sheet packages are
+    kept in memory instead of a temporary directory.
+    """
+    import tempfile
+
+    if mode not in ("normal", "stream"):
+        raise ValueError(f"Unknown mode: {mode!r} (expected 'normal' or 'stream')")
+    if not sheets:
+        raise ValueError("generate_workbook needs at least one sheet")
+    brand = compile_brand(brand)
+    frames = {name: pd.DataFrame(df) if isinstance(df, list) else df for name, df in sheets.items()}
+    folded = [name.lower() for name in frames]
+    if len(set(folded)) != len(folded):
+        raise ValueError("Sheet names must be unique (ignoring case)")
+
+    if insights_sheet is None:
+        insights_sheet = next((name for name, df in frames.items() if _pick_chart_columns(df)[1]), None)
+    elif insights_sheet not in frames:
+        raise ValueError(f"Unknown insights sheet: {insights_sheet!r}")
+
+    out = _open_output(output)
+    in_memory = not isinstance(out, Path)
+    with contextlib.nullcontext() if in_memory else tempfile.TemporaryDirectory(prefix="excel-sheets-") as tmp:
+        jobs = [(df, None if in_memory else Path(tmp) / f"sheet{idx}.xlsx", name, brand, mode == "stream",
+                 rows_per_sheet, name == insights_sheet)
+                for idx, (name, df) in enumerate(frames.items())]
+        with _phase("render_sheets", rows=sum(len(df) for df in frames.values())):
+            if workers == 1 or len(jobs) == 1:
+                packages = [_render_sheet(job) for job in jobs]
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    packages = list(pool.map(_render_sheet, jobs))
+        with _phase("assemble"):
+            _assemble_workbook(packages, out)
+    return _output_result(output, out)
+
+
+def _render_sheet(job: tuple) -> Path | bytes:
+    """Process-pool worker for generate_workbook: write one sheet's package (as bytes without a path)."""
+    df, path, name, brand, constant_memory, rows_per_sheet, insights = job
+    return xlsxwriter_excel(df, path, sheet_name=name, brand=brand, constant_memory=constant_memory,
+                            rows_per_sheet=rows_per_sheet, insights=insights)
+
+
+def _write_xlsxwriter(
+    out: Path | BinaryIO,
+    sheet_name: str,
+    brand: BrandLike | None,
+    columns: list[str],
+    widths: list[float],
+    is_datetime: list[bool],
+    rows: Iterable[Iterable[Any]],
+    chart: tuple[str, list[str]],
+    constant_memory: bool = False,
+    rows_per_sheet: int | None = None,
+    static: _StaticRules | None = None,
+    insights: bool = True,
+) -> Path | BinaryIO:
+    """Shared xlsxwriter writer for xlsxwriter_excel and records_excel; returns out.
+
+    rows yields one sequence of cell values per data row, with None for
+    missing values; chart is the (x column, y columns) pair for Insights.
+    With static, rows yields (values, hits) pairs instead (see
+    _iter_static_rows) and the matched cells get the rule styles.
+    Rows are partitioned across sheets as in stream_excel.
+    """
+    import xlsxwriter
+
+    part_rows = _partition_size(rows_per_sheet)
+    # A file object target is also assembled in memory, unless rows are flushed to disk
+    in_memory = not isinstance(out, Path) and not constant_memory
+    wb = xlsxwriter.Workbook(str(out) if isinstance(out, Path) else out,
+                             {"constant_memory": constant_memory, "nan_inf_to_errors": True, "in_memory": in_memory})
+    ws = wb.add_worksheet(sheet_name)
+
+    date_props = {"num_format": "yyyy-mm-dd hh:mm:ss"}
+
+    if brand:
+        props = compile_brand(brand).xlsx_formats
+        header_fmt = wb.add_format(props["header"])
+        body_fmts = [wb.add_format({**props["body"], **(date_props if d else {})}) for d in is_datetime]
+        alt_fmts = body_fmts
+        if brand.get("excel", {}).get("alternating_rows", False):
+            alt_fmts = [wb.add_format({**props["alt"], **(date_props if d else {})}) for d in is_datetime]
+    else:
+        header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        date_fmt = wb.add_format(date_props)
+        body_fmts = alt_fmts = [date_fmt if d else None for d in is_datetime]
+
+    # Formats of cells styled by a static rule, by (column, rule, alternating)
+    rule_fmts: dict[tuple[int, int, bool], Any] = {}
+
+    def rule_format(col: int, code: int, alt: bool) -> Any:
+        fmt = rule_fmts.get((col, code, alt))
+        if fmt is None:
+            style = dict(static.rules[code].xlsx_format)
+            if "bg_color" in style:
+                style["pattern"] = 1
+            base = props["alt" if alt and alt_fmts is not body_fmts else "body"]
+            fmt = rule_fmts[(col, code, alt)] = wb.add_format(
+                {**base, **(date_props if is_datetime[col] else {}), **style})
+        return fmt
+
+    def start_part(ws: Any) -> None:
+        for idx, width in enumerate(widths):
+            ws.set_column(idx, idx, width)
+        if brand and not brand.get("excel", {}).get("show_gridlines", True):
+            ws.hide_gridlines(2)
+        ws.write_row(0, 0, columns, header_fmt)
+
+    x_col, y_cols = chart
+    max_points, how, hidden = _insights_options(brand)
+    insights = bool(insights and brand and y_cols)
+    totals = _InsightsTotals(columns, x_col, y_cols, how, max_points) if insights else None
+
+    # (worksheet, data rows) of each finished part
+    parts: list[tuple[Any, int]] = []
+    start_part(ws)
+    phase = _phase("write_rows", ws.name).__enter__()
+    row_idx = 0
+    for values in rows:
+        if static:
+            values, hits = values
+        if row_idx == part_rows:
+            phase.rows, phase.cells = row_idx, row_idx * len(columns)
+            phase.__exit__(None, None, None)
+            parts.append((ws, row_idx))
+            ws = wb.add_worksheet(_part_name(sheet_name, len(parts) + 1))
+            start_part(ws)
+            phase = _phase("write_rows", ws.name).__enter__()
+            row_idx = 0
+        row_idx += 1
+        # Alternating rows start on the first data row, matching apply_branding
+        fmts = alt_fmts if row_idx % 2 == 1 else body_fmts
+        if static and hits:
+            fmts = list(fmts)
+            for col, code in hits:
+                fmts[col] = rule_format(col, code, row_idx % 2 == 1)
+        for col_idx, value in enumerate(values):
+            if value is None:
+                if fmts[col_idx] is not None:
+                    ws.write_blank(row_idx, col_idx, None, fmts[col_idx])
+            else:
+                ws.write(row_idx, col_idx, value, fmts[col_idx])
+        if totals:
+            totals.add(values)
+    phase.rows, phase.cells = row_idx, row_idx * len(columns)
+    phase.__exit__(None, None, None)
+    parts.append((ws, row_idx))
+
+    if brand:
+        for part_ws, n_rows in parts:
+            apply_conditional_formatting_xlsxwriter(wb, part_ws, brand, columns, 1, n_rows,
+                                                    rules=static.live if static else None)
+        # A chart can only plot one sheet's rows, and only a bounded number of them usefully
+        if insights and len(parts) == 1 and not (max_points and row_idx > max_points):
+            _add_chart_xlsxwriter(wb, sheet_name, columns, x_col, y_cols, brand, n_rows=row_idx)
+        elif totals:
+            table_columns, table_rows = totals.table()
+            data_ws = wb.add_worksheet(INSIGHTS_DATA_SHEET)
+            data_ws.write_row(0, 0, table_columns)
+            if is_datetime[columns.index(x_col)]:
+                data_ws.set_column(0, 0, 20, wb.add_format(date_props))
+            for idx, row in enumerate(table_rows, 1):
+                data_ws.write_row(idx, 0, row)
+            if hidden:
+                data_ws.hide()
+            _add_chart_xlsxwriter(wb, INSIGHTS_DATA_SHEET, table_columns, table_columns[0], table_columns[1:],
+                                  brand, n_rows=len(table_rows))
+
+    with _phase("save"):
+        wb.close()
+    return out
+
+
+def compile_xlsxwriter_formats(brand: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Translate the brand into xlsxwriter format properties keyed by role.
+
+    Mirrors compile_brand_styles; callers add column-specific properties
+    (e.g. num_format) before passing them to Workbook.add_format.
+    """
+    fonts = brand.get("fonts", {})
+    colors = brand.get("colors", {})
+    opts = brand.get("excel", {})
+
+    c_primary = colors.get("primary", "ffffff").replace("#", "")
+    c_header_text = colors.get("header_text", "000000").replace("#", "")
+    c_borders = colors.get("borders", "b0aea5").replace("#", "")
+
+    header = {
+        "bold": True,
+        "font_name": fonts.get("heading", "Arial"),
+        "font_color": "#" + c_header_text,
+        "bg_color": "#" + c_primary,
+        "pattern": 1,
+        "align": "left",
+        "valign": "vcenter",
+    }
+    if opts.get("header_borders", False):
+        header.update({"bottom": 1, "bottom_color": "#" + c_borders})
+    body = {"font_name": fonts.get("body", "Arial")}
+    alt = {**body, "bg_color": "#f9f9f9", "pattern": 1}
+    return {"header": header, "body": body, "alt": alt}
+
+
+def apply_conditional_formatting_xlsxwriter(
+    workbook: Any,
+    worksheet: Any,
+    brand: BrandLike,
+    columns: list[str],
+    start_row: int,
+    end_row: int,
+    rules: list[CompiledRule] | None = None,
+) -> None:
+    """xlsxwriter counterpart of apply_conditional_formatting_region (0-based rows)."""
+    from xlsxwriter.utility import xl_range
+
+    with _phase("conditional_formatting", worksheet.name, rows=end_row - start_row + 1):
+        if rules is None:
+            rules = compile_brand(brand).rules
+        if not rules or end_row < start_row:
+            return
+
+        names = {idx: name for idx, name in enumerate(columns, 1) if name}
+        formats: dict[tuple, Any] = {}
+        for rule, boxes in _plan_conditional_formats(rules, [(names, start_row + 1, end_row + 1)]):
+            key = tuple(sorted(rule.xlsx_format.items()))
+            if key not in formats:
+                formats[key] = workbook.add_format(rule.xlsx_format)
+            r1, c1, r2, c2 = boxes[0]
+            options = rule.xlsxwriter_options(formats[key])
+            options["multi_range"] = " ".join(xl_range(b[0] - 1, b[1] - 1, b[2] - 1, b[3] - 1) for b in boxes)
+            worksheet.conditional_format(r1 - 1, c1 - 1, r2 - 1, c2 - 1, options)
+
+
+def generate_insights_xlsxwriter(
+    workbook: Any,
+    sheet_name: str,
+    df: pd.DataFrame,
+    brand: BrandLike,
+    n_rows: int | None = None,
+) -> None:
+    """xlsxwriter counterpart of generate_insights, using a native chart."""
+    if n_rows is None:
+        n_rows = len(df)
+    x_col, y_cols = _pick_chart_columns(df)
+    _add_chart_xlsxwriter(workbook, sheet_name, [str(c) for c in df.columns], str(x_col), [str(c) for c in y_cols], brand, n_rows)
+
+
+def _add_chart_xlsxwriter(
+    workbook: Any,
+    sheet_name: str,
+    columns: list[str],
+    x_col: str | None,
+    y_cols: list[str],
+    brand: BrandLike,
+    n_rows: int,
+) -> None:
+    with _phase("insights", sheet_name, rows=n_rows):
+        if not y_cols or not n_rows:
+            return
+
+        is_line = _is_time_axis(x_col)
+        chart = workbook.add_chart({"type": "line" if is_line else "column"})
+        chart.set_title({"name": f"{' & '.join(y_cols[:2])} by {x_col}"})
+        chart.set_style(10)
+        # 20cm x 10cm, the size used by the openpyxl chart
+        chart.set_size({"width": 756, "height": 378})
+
+        x_col_idx = columns.index(x_col)
+        palette = compile_brand(brand).palette
+        for i, y_col in enumerate(y_cols[:3]):
+            y_col_idx = columns.index(y_col)
+            color = "#" + palette[i % len(palette)]
+            series = {
+                "name": [sheet_name, 0, y_col_idx],
+                "categories": [sheet_name, 1, x_col_idx, n_rows, x_col_idx],
+                "values": [sheet_name, 1, y_col_idx, n_rows, y_col_idx],
+                "line": {"color": color},
+            }
+            if not is_line:
+                series["fill"] = {"color": color}
+            chart.add_series(series)
+
+        workbook.add_worksheet("Insights").insert_chart("B2", chart)
+
+
+def native_excel(
+    df: pd.DataFrame | Iterable[pd.DataFrame],
+    output: ExcelOutput = None,
+    sheet_name: str = "Sheet1",
+    brand: BrandLike | None = None,
+    rows_per_sheet: int | None = None,
+    compression: str = "fast",
+) -> Path | BinaryIO | bytes:
+    """Write df with the built-in streaming XLSX writer (engine="native").
+
+    Sheet XML is rendered a batch at a time straight from the DataFrame's
+    column arrays and streamed into the zip, so memory stays bounded like
+    constant_memory mode, except that text goes to one interned shared
+    strings table. The styles are a fixed table compiled from the brand;
+    the branding, conditional formats and Insights chart match
+    xlsxwriter_excel. compression is one of NATIVE_COMPRESSION: "store"
+    (no deflate), "fast" (level 1) or "best" (level 9). df may also be an
+    iterable of DataFrame batches, partitioned across sheets as for
+    stream_excel.
+    """
+    return fan_out_excel(df, [(brand, output)], sheet_name=sheet_name, rows_per_sheet=rows_per_sheet,
+                         compression=compression, workers=1)[0]
+
+
+def fan_out_excel(
+    df: pd.DataFrame | Iterable[pd.DataFrame],
+    targets: Sequence[tuple[BrandLike | None, ExcelOutput]],
+    sheet_name: str = "Sheet1",
+    rows_per_sheet: int | None = None,
+    compression: str = "fast",
+    workers: int | None = None,
+) -> list[Path | BinaryIO | bytes]:
+    """Write df once per (brand, output) target with the native engine.
+
+    The data is typed, measured and serialized once: each batch's cell
+    values are rendered to XML a single time, against one shared strings
+    table, and reused by every workbook. Only the brand-specific layers are
+    applied per target: cell formats and static rule styles, conditional
+    formats, column widths, gridlines and the Insights chart and palette.
+    Column widths and Insights aggregates are computed once per distinct
+    setting. Each workbook is the one native_excel writes for its brand.
+
+    With workers > 1 (default: one per target, up to the CPU count) the
+    targets' rows are assembled and compressed on that many threads, which
+    overlap in zlib. Returns one result per target, as native_excel would.
+    """
+    if compression not in NATIVE_COMPRESSION:
+        raise ValueError(f"Unknown compression: {compression!r} (expected one of {', '.join(NATIVE_COMPRESSION)})")
+    if not targets:
+        raise ValueError("fan_out_excel needs at least one target")
+    part_rows = _partition_size(rows_per_sheet)
+    whole = isinstance(df, pd.DataFrame) and len(df) <= part_rows
+
+    df, batches = _open_batches(df)
+    source_columns = df.columns
+    columns = [str(c) for c in df.columns]
+    is_datetime = [pd.api.types.is_datetime64_any_dtype(dtype) for dtype in df.dtypes]
+    x_col, y_cols = _pick_chart_columns(df)
+    chartable = x_col is not None and bool(y_cols)
+    if chartable:
+        x_col, y_cols = str(x_col), [str(c) for c in y_cols]
+        x_idx = columns.index(x_col)
+        x_numeric = is_datetime[x_idx] or pd.api.types.is_numeric_dtype(df.dtypes.iloc[x_idx])
+        chart_idx = [columns.index(c) for c in (x_col, *y_cols[:3])]
+
+    strings: dict[str, int] = {}
+    widths: dict[tuple, list[float]] = {}
+    # Streamed batches are not kept, so their chart data is aggregated as they are written
+    totals: dict[tuple, _InsightsTotals] = {}
+    books: list[_NativeTarget] = []
+    pool = None
+    try:
+        for brand, output in targets:
+            target = _NativeTarget(output, brand, NATIVE_COMPRESSION[compression], strings, columns, is_datetime, whole)
+            books.append(target)
+            autosize = _autosize_options(target.brand)
+            key = tuple(sorted(autosize.items()))
+            if key not in widths:
+                widths[key] = compute_column_widths(df, **autosize)
+            target.widths = widths[key]
+            target.insights = bool(target.brand and chartable)
+            if target.insights and not whole and target.totals_key not in totals:
+                totals[target.totals_key] = _InsightsTotals([columns[i] for i in chart_idx], x_col, y_cols,
+                                                            target.how, target.max_points)
+
+        if workers is None:
+            workers = min(len(books), os.cpu_count() or 1)
+        if workers > 1 and len(books) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            pool = ThreadPoolExecutor(max_workers=workers)
+
+        def each(fn: Callable[[_NativeTarget], None]) -> None:
+            for _ in pool.map(fn, books) if pool else map(fn, books):
+                pass
+
+        n_rows = 0
+        parts: list[tuple[str, int]] = []
+        name = None
+        for batch in batches:
+            if list(batch.columns) != list(source_columns):
+                batch = batch.reindex(columns=source_columns)
+            if totals:
+                chart_cols = batch.iloc[:, chart_idx]
+                for values in _iter_row_values(chart_cols.columns, [chart_cols]):
+                    for total in totals.values():
+                        total.add(values)
+            start = 0
+            while start < len(batch) or name is None:
+                if name is None or n_rows == part_rows:
+                    if name is not None:
+                        for t in books:
+                            t.book.end_sheet(t.sheet, columns, n_rows, t.live)
+                        parts.append((name, n_rows))
+                    name = _part_name(sheet_name, len(parts) + 1)
+                    for t in books:
+                        t.sheet = t.book.start_sheet(name, t.widths)
+                        t.sheet.write(t.book.header_row(columns, t.header))
+                    n_rows = 0
+                chunk = batch.iloc[start:start + min(part_rows - n_rows, STREAM_CHUNK_ROWS)]
+                if not len(chunk):
+                    break
+                with _phase("write_rows", name, rows=len(chunk), cells=chunk.size):
+                    bodies = books[0].book.cell_bodies(chunk)
+                    first_row = n_rows + 2
+                    each(lambda t: t.sheet.write(t.book.rows(chunk, first_row, t.body, t.alt, t.static, bodies)))
+                n_rows += len(chunk)
+                start += len(chunk)
+        for t in books:
+            t.book.end_sheet(t.sheet, columns, n_rows, t.live)
+        parts.append((name, n_rows))
+
+        tables: dict[tuple, tuple[list[str], list[list[Any]]]] = {}
+        for t in books:
+            if not t.insights:
+                continue
+            book = t.book
+            if len(books) > 1:
+                # The data sheets are shared; Insights Data text is this workbook's own
+                book.strings = dict(book.strings)
+            if len(parts) == 1 and not (t.max_points and n_rows > t.max_points):
+                book.add_chart(sheet_name, columns, x_col, y_cols, n_rows, x_numeric)
+                continue
+            if t.totals_key not in tables:
+                with _phase("insights", rows=sum(rows for _, rows in parts)):
+                    if totals:
+                        tables[t.totals_key] = totals[t.totals_key].table()
+                    else:
+                        tables[t.totals_key] = ([x_col, *y_cols[:3]], _aggregate_frame(
+                            df.set_axis(columns, axis=1), x_col, y_cols[:3], t.how, t.max_points))
+            table_columns, table_rows = tables[t.totals_key]
+            table = pd.DataFrame(table_rows, columns=table_columns)
+            x_date = is_datetime[x_idx]
+            data_styles = [book.date_xf if x_date and idx == 0 else 0 for idx in range(len(table_columns))]
+            data = book.start_sheet(INSIGHTS_DATA_SHEET, [20.0] if x_date else [], hidden=t.hidden, branded=False)
+            data.write(book.header_row(table_columns, [0] * len(table_columns)))
+            data.write(book.rows(table, 2, data_styles, data_styles, None))
+            book.end_sheet(data, table_columns, len(table_rows), [])
+            book.add_chart(INSIGHTS_DATA_SHEET, table_columns, table_columns[0], table_columns[1:], len(table_rows),
+                           x_date or pd.api.types.is_numeric_dtype(table.dtypes.iloc[0]))
+        for t in books:
+            with _phase("save"):
+                t.book.close()
+    except BaseException:
+        for t in books:
+            t.book.abort()
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+    return [_output_result(t.output, t.out) for t in books]
+
+
+class _NativeTarget:
+    """One brand's workbook in fan_out_excel, with the layers that depend on the brand."""
+
+    def __init__(self, output: ExcelOutput, brand: BrandLike | None, level: int | None, strings: dict[str, int],
+                 columns: list[str], is_datetime: list[bool], whole: bool) -> None:
+        self.output = output
+        self.brand = compile_brand(brand)
+        self.out = _open_output(output)
+        self.book = _NativeWorkbook(self.out, self.brand, level, strings)
+        self.header, self.body, self.alt = self.book.column_styles(is_datetime)
+        self.static = _static_rules(self.brand, columns, ranked=whole)
+        # Rules left as conditional formats; None writes all of the brand's rules
+        self.live = self.static.live if self.static else None
+        self.max_points, self.how, self.hidden = _insights_options(self.brand)
+        self.totals_key = (self.how, self.max_points)
+        self.widths: list[float] = []
+        self.insights = False
+        self.sheet: _NativeSheet | None = None
+
+
+class _NativeSheet:
+    """One worksheet of a _NativeWorkbook, streamed into its zip member."""
+
+    def __init__(self, zf: Any, part: str, name: str, hidden: bool) -> None:
+        self.name = name
+        self.part = part
+        self.hidden = hidden
+        self.drawing: str | None = None
+        self.fh = zf.open(part, "w", force_zip64=True)
+
+    def write(self, xml: str) -> None:
+        self.fh.write(xml.encode("utf-8"))
+
+
+class _NativeWorkbook:
+    """The package written by native_excel: sheets, shared strings and a fixed style table.
+
+    Cell formats, fonts, fills, borders and differential formats are
+    interned as XML snippets (see _Interned) and written to styles.xml on
+    close, together with the shared strings, workbook and content types.
+    """
+
+    def __init__(self, out: Path | BinaryIO, brand: BrandLike | None, level: int | None,
+                 strings: dict[str, int] | None = None) -> None:
+        import zipfile
+
+        self.out = out
+        # Paths are written next to the output and moved into place; file objects directly
+        self.tmp = out.with_name(out.name + ".tmp") if isinstance(out, Path) else None
+        self.brand = compile_brand(brand)
+        compress = zipfile.ZIP_STORED if level is None else zipfile.ZIP_DEFLATED
+        self.zf = zipfile.ZipFile(self.tmp or out, "w", compress, compresslevel=level)
+        self.sheets: list[_NativeSheet] = []
+        self.charts = 0
+        # Workbooks written from the same data can share one strings table (see fan_out_excel)
+        self.strings: dict[str, int] = {} if strings is None else strings
+        self.string_refs = 0
+        self.fonts, self.fills, self.borders, self.xfs, self.dxfs = (_Interned() for _ in range(5))
+        # Excel reserves the first two fills
+        self.fonts.add(['<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'])
+        self.fills.add(['<fill><patternFill patternType="none"/></fill>', '<fill><patternFill patternType="gray125"/></fill>'])
+        self.borders.add(["<border><left/><right/><top/><bottom/><diagonal/></border>"])
+        self.xfs.add(['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'])
+        self.date_xf = self.xf({"num_format": "yyyy-mm-dd hh:mm:ss"})
+
+    def xf(self, props: dict[str, Any]) -> int:
+        """Cell format id for xlsxwriter-style format properties (as in compile_xlsxwriter_formats)."""
+        font = fill = border = align = ""
+        attrs = ' numFmtId="164" applyNumberFormat="1"' if props.get("num_format") else ' numFmtId="0"'
+        if props.get("bold") or props.get("font_name") or props.get("font_color"):
+            color = f'<color rgb="FF{props["font_color"][1:].upper()}"/>' if props.get("font_color") else ""
+            name = f'<name val="{xml_escape(props.get("font_name", "Calibri"), _XML_QUOTE)}"/>'
+            font = f'<font>{"<b/>" if props.get("bold") else ""}<sz val="11"/>{color}{name}<family val="2"/></font>'
+        attrs += f' fontId="{self.fonts.add([font])[0] if font else 0}"'
+        if props.get("bg_color"):
+            fill = (f'<fill><patternFill patternType="solid"><fgColor rgb="FF{props["bg_color"][1:].upper()}"/>'
+                    '<bgColor indexed="64"/></patternFill></fill>')
+        attrs += f' fillId="{self.fills.add([fill])[0] if fill else 0}"'
+        if props.get("border"):
+            sides = "".join(f'<{side} style="thin"><color auto="1"/></{side}>' for side in ("left", "right", "top", "bottom"))
+            border = f"<border>{sides}<diagonal/></border>"
+        elif props.get("bottom"):
+            color = f'<color rgb="FF{props["bottom_color"][1:].upper()}"/>' if props.get("bottom_color") else '<color auto="1"/>'
+            border = f'<border><left/><right/><top/><bottom style="thin">{color}</bottom><diagonal/></border>'
+        attrs += f' borderId="{self.borders.add([border])[0] if border else 0}" xfId="0"'
+        attrs += "".join(flag for flag, used in ((' applyFont="1"', font), (' applyFill="1"', fill),
+                                                  (' applyBorder="1"', border)) if used)
+        if props.get("align") or props.get("valign"):
+            valign = {"vcenter": "center"}.get(props.get("valign"), props.get("valign"))
+            align = "<alignment" + "".join(f' {key}="{value}"' for key, value in (
+                ("horizontal", props.get("align")), ("vertical", valign)) if value) + "/>"
+            attrs += ' applyAlignment="1"'
+        xml = f"<xf{attrs}>{align}</xf>" if align else f"<xf{attrs}/>"
+        return self.xfs.add([xml])[0]
+
+    def column_styles(self, is_datetime: list[bool]) -> tuple[list[int], list[int], list[int]]:
+        """Header, body and alternating-row cell format ids per column."""
+        date = {"num_format": "yyyy-mm-dd hh:mm:ss"}
+        if not self.brand:
+            header = self.xf({"bold": True, "border": 1, "align": "center", "valign": "top"})
+            body = [self.date_xf if d else 0 for d in is_datetime]
+            return [header] * len(is_datetime), body, body
+        props = self.brand.xlsx_formats
+        header = self.xf(props["header"])
+        body = [self.xf({**props["body"], **(date if d else {})}) for d in is_datetime]
+        alt = body
+        if self.brand.get("excel", {}).get("alternating_rows", False):
+            alt = [self.xf({**props["alt"], **(date if d else {})}) for d in is_datetime]
+        return [header] * len(is_datetime), body, alt
+
+    def string(self, text: str) -> int:
+        idx = self.strings.get(text)
+        if idx is None:
+            idx = self.strings[text] = len(self.strings)
+        return idx
+
+    def start_sheet(self, name: str, widths: list[float], hidden: bool = False, branded: bool = True) -> _NativeSheet:
+        sheet = _NativeSheet(self.zf, f"xl/worksheets/sheet{len(self.sheets) + 1}.xml", name, hidden)
+        self.sheets.append(sheet)
+        view = ' tabSelected="1"' if len(self.sheets) == 1 else ""
+        if branded and self.brand and not self.brand.get("excel", {}).get("show_gridlines", True):
+            view = ' showGridLines="0"' + view
+        cols = "".join(f'<col min="{idx}" max="{idx}" width="{_native_width(width)}" customWidth="1"/>'
+                       for idx, width in enumerate(widths, 1))
+        sheet.write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheetViews><sheetView{view} workbookViewId="0"/></sheetViews><sheetFormatPr defaultRowHeight="15"/>'
+            + (f"<cols>{cols}</cols>" if cols else "") + "<sheetData>"
+        )
+        return sheet
+
+    def header_row(self, columns: list[str], styles: list[int]) -> str:
+        cells = []
+        for idx, (name, style) in enumerate(zip(columns, styles), 1):
+            s = f' s="{style}"' if style else ""
+            cells.append(f'<c r="{_column_letter(idx)}1"{s} t="s"><v>{self.string(name)}</v></c>')
+        self.string_refs += len(columns)
+        return f'<row r="1">{"".join(cells)}</row>'
+
+    def cell_bodies(self, frame: pd.DataFrame) -> tuple[list[list[str | None]], int]:
+        """Each column's cell bodies (see _cell_bodies) and their shared string references."""
+        columns, refs = [], 0
+        for col in range(len(frame.columns)):
+            bodies, col_refs = self._cell_bodies(frame.iloc[:, col])
+            columns.append(bodies)
+            refs += col_refs
+        return columns, refs
+
+    def rows(self, frame: pd.DataFrame, first_row: int, body: list[int], alt: list[int],
+             static: _StaticRules | None, bodies: tuple[list[list[str | None]], int] | None = None) -> str:
+        """<row> elements for frame, whose first row goes to sheet row first_row.
+
+        Each column is rendered to complete <c> elements in one pass over its
+        array; the rows are then joined column by column. bodies is
+        cell_bodies(frame), which workbooks sharing a strings table can
+        compute once between them.
+        """
+        cell_bodies, refs = bodies or self.cell_bodies(frame)
+        self.string_refs += refs
+        n_rows = len(frame)
+        row_refs = [str(row) for row in range(first_row, first_row + n_rows)]
+        # Alternating rows start on the first data row (sheet row 2), i.e. on even rows
+        is_alt = [first_row % 2 == 0, first_row % 2 == 1] * (n_rows // 2 + 1)
+        codes = dict(static.codes(frame)) if static else {}
+        formats: dict[tuple[int, int, bool], str] = {}
+
+        def rule_style(col: int, code: int, alternate: bool) -> str:
+            key = (col, code, alternate)
+            if key not in formats:
+                props = self.brand.xlsx_formats
+                base = props["alt" if alternate and alt is not body else "body"]
+                is_date = pd.api.types.is_datetime64_any_dtype(frame.dtypes.iloc[col])
+                date = {"num_format": "yyyy-mm-dd hh:mm:ss"} if is_date else {}
+                formats[key] = f' s="{self.xf({**base, **date, **static.rules[code].xlsx_format})}"'
+            return formats[key]
+
+        columns = []
+        for col in range(len(frame.columns)):
+            prefix = f'<c r="{_column_letter(col + 1)}'
+            pair = [f' s="{body[col]}"' if body[col] else "", f' s="{alt[col]}"' if alt[col] else ""]
+            styles = [pair[a] for a in is_alt[:n_rows]]
+            if col in codes:
+                for i in (codes[col] >= 0).nonzero()[0].tolist():
+                    styles[i] = rule_style(col, int(codes[col][i]), is_alt[i])
+            columns.append([
+                f'{prefix}{ref}"{style}{cell}' if cell is not None else f'{prefix}{ref}"{style}/>' if style else ""
+                for ref, style, cell in zip(row_refs, styles, cell_bodies[col])
+            ])
+        return "".join(f'<row r="{ref}">{"".join(cells)}</row>' for ref, cells in zip(row_refs, zip(*columns)))
+
+    def _cell_bodies(self, values: pd.Series) -> tuple[list[str | None], int]:
+        """The part of each <c> after its style attribute (None for a missing
+        value), and how many of them reference a shared string."""
+        dtype = values.dtype
+        if pd.api.types.is_bool_dtype(dtype) and not values.hasnans:
+            return [' t="b"><v>1</v></c>' if v else ' t="b"><v>0</v></c>' for v in values.tolist()], 0
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            if getattr(dtype, "tz", None) is not None:
+                values = values.dt.tz_localize(None)
+            nanos = values.to_numpy(dtype="datetime64[ns]").view("i8")
+            serials = (nanos / 86_400e9 + 25_569.0).tolist()
+            return [None if missing else f"><v>{serial!r}</v></c>"
+                    for serial, missing in zip(serials, values.isna().tolist())], 0
+        if pd.api.types.is_integer_dtype(dtype) and not values.hasnans:
+            return [f"><v>{v}</v></c>" for v in values.tolist()], 0
+        if pd.api.types.is_float_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+            out = []
+            for v in values.to_numpy(dtype=float).tolist():
+                if v != v:
+                    out.append(None)
+                elif v in (math.inf, -math.inf):
+                    out.append(' t="e"><v>#NUM!</v></c>')
+                else:
+                    out.append(f"><v>{v!r}</v></c>")
+            return out, 0
+        kind = pd.api.types.infer_dtype(values.cat.categories if isinstance(dtype, pd.CategoricalDtype) else values,
+                                        skipna=True)
+        if kind == "string":
+            # Text columns repeat values; intern each distinct one once. Empty
+            # text is left blank, as xlsxwriter does
+            codes, uniques = pd.factorize(values)
+            bodies = [f' t="s"><v>{self.string(text)}</v></c>' if text else None for text in uniques.tolist()]
+            bodies.append(None)  # code -1: missing
+            return [bodies[code] for code in codes.tolist()], sum(1 for code in codes.tolist() if bodies[code])
+        bodies = [self._cell_body(v) for v in values.astype(object).where(values.notna(), None).tolist()]
+        return bodies, sum(1 for body in bodies if body is not None and body.startswith(' t="s"'))
+
+    def _cell_body(self, value: Any) -> str | None:
+        """_cell_bodies for one value of a mixed (object) column; text is interned."""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return f' t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Integral):
+            return f"><v>{int(value)}</v></c>"
+        if isinstance(value, numbers.Real):
+            if not math.isfinite(value):
+                return ' t="e"><v>#NUM!</v></c>'
+            return f"><v>{float(value)!r}</v></c>"
+        if isinstance(value, (datetime.date, datetime.time)):
+            from openpyxl.utils.datetime import to_excel
+
+            if getattr(value, "tzinfo", None) is not None:
+                value = value.replace(tzinfo=None)
+            return f"><v>{to_excel(value)!r}</v></c>"
+        text = str(value)
+        return f' t="s"><v>{self.string(text)}</v></c>' if text else None
+
+    def end_sheet(self, sheet: _NativeSheet, columns: list[str], n_rows: int,
+                  rules: list[CompiledRule] | None) -> None:
+        """Close sheet's <sheetData> and add its conditional formats (None: all brand rules)."""
+        tail = ["</sheetData>"]
+        if rules is None:
+            rules = self.brand.rules if self.brand else []
+        if rules:
+            with _phase("conditional_formatting", sheet.name, rows=n_rows):
+                names = {idx: name for idx, name in enumerate(columns, 1) if name}
+                plan = _plan_conditional_formats(rules, [(names, 2, n_rows + 1)])
+                for priority, (rule, boxes) in enumerate(plan, 1):
+                    sqref = " ".join(f"{_column_letter(c1)}{r1}:{_column_letter(c2)}{r2}" for r1, c1, r2, c2 in boxes)
+                    tail.append(f'<conditionalFormatting sqref="{sqref}">{self._cf_rule(rule, priority)}'
+                                "</conditionalFormatting>")
+        tail.append('<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>')
+        if sheet.drawing:
+            tail.append('<drawing r:id="rId1"/>')
+        tail.append("</worksheet>")
+        sheet.write("".join(tail))
+        sheet.fh.close()
+
+    def _cf_rule(self, rule: CompiledRule, priority: int) -> str:
+        """The <cfRule> element of an analytics rule, as xlsxwriter writes it."""
+        if rule.operator == "colorScale":
+            cfvo = '<cfvo type="min" val="0"/>'
+            if len(rule.colors) == 3:
+                cfvo += '<cfvo type="percentile" val="50"/>'
+            cfvo += '<cfvo type="max" val="0"/>'
+            colors = "".join(f'<color rgb="FF{c[1:].upper()}"/>' for c in rule.colors)
+            return f'<cfRule type="colorScale" priority="{priority}"><colorScale>{cfvo}{colors}</colorScale></cfRule>'
+        dxf = self.dxfs.add([_native_dxf(rule.xlsx_format)])[0]
+        if rule.operator in ("top", "bottom"):
+            flags = (' percent="1"' if rule.percent else "") + (' bottom="1"' if rule.operator == "bottom" else "")
+            return f'<cfRule type="top10" dxfId="{dxf}" priority="{priority}" rank="{int(rule.value)}"{flags}/>'
+        formulas = "".join(f"<formula>{xml_escape(f)}</formula>" for f in rule.formulas())
+        return (f'<cfRule type="cellIs" dxfId="{dxf}" priority="{priority}" stopIfTrue="1" '
+                f'operator="{rule.operator}">{formulas}</cfRule>')
+
+    def add_chart(self, data_sheet: str, columns: list[str], x_col: str, y_cols: list[str], n_rows: int,
+                  x_numeric: bool) -> None:
+        """Add the Insights sheet with a chart of y_cols by x_col from rows 2..n_rows+1 of data_sheet."""
+        with _phase("insights", data_sheet, rows=n_rows):
+            if not y_cols or not n_rows:
+                return
+            self.charts += 1
+            sheet = self.start_sheet("Insights", [])
+            sheet.drawing = f"xl/drawings/drawing{self.charts}.xml"
+            self.end_sheet(sheet, [], 0, [])
+            ref = "'" + data_sheet.replace("'", "''") + "'!"
+            x = _column_letter(columns.index(x_col) + 1)
+            cat_kind = "numRef" if x_numeric else "strRef"
+            is_line = _is_time_axis(x_col)
+            series = []
+            for i, y_col in enumerate(y_cols[:3]):
+                y = _column_letter(columns.index(y_col) + 1)
+                color = self.brand.palette[i % len(self.brand.palette)].upper()
+                fill = f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+                props = f'<c:spPr><a:ln w="28575">{fill}</a:ln></c:spPr><c:marker><c:symbol val="none"/></c:marker>' \
+                    if is_line else f"<c:spPr>{fill}<a:ln>{fill}</a:ln></c:spPr>"
+                series.append(
+                    f'<c:ser><c:idx val="{i}"/><c:order val="{i}"/>'
+                    f"<c:tx><c:strRef><c:f>{xml_escape(ref)}${y}$1</c:f></c:strRef></c:tx>{props}"
+                    f"<c:cat><c:{cat_kind}><c:f>{xml_escape(ref)}${x}$2:${x}${n_rows + 1}</c:f></c:{cat_kind}></c:cat>"
+                    f"<c:val><c:numRef><c:f>{xml_escape(ref)}${y}$2:${y}${n_rows + 1}</c:f></c:numRef></c:val>"
+                    + ('<c:smooth val="0"/>' if is_line else "") + "</c:ser>")
+            if is_line:
+                plot = ('<c:lineChart><c:grouping val="standard"/><c:varyColors val="0"/>' + "".join(series)
+                        + '<c:marker val="1"/><c:axId val="1"/><c:axId val="2"/></c:lineChart>')
+            else:
+                plot = ('<c:barChart><c:barDir val="col"/><c:grouping val="clustered"/><c:varyColors val="0"/>'
+                        + "".join(series) + '<c:axId val="1"/><c:axId val="2"/></c:barChart>')
+            title = xml_escape(f"{' & '.join(y_cols[:2])} by {x_col}")
+            axis = '<c:scaling><c:orientation val="minMax"/></c:scaling><c:delete val="0"/>'
+            self.zf.writestr(f"xl/charts/chart{self.charts}.xml", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<c:chartSpace xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+                'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                '<c:style val="10"/><c:chart><c:title><c:tx><c:rich><a:bodyPr/><a:p><a:r>'
+                f'<a:t>{title}</a:t></a:r></a:p></c:rich></c:tx><c:overlay val="0"/></c:title>'
+                f'<c:autoTitleDeleted val="0"/><c:plotArea><c:layout/>{plot}'
+                f'<c:catAx><c:axId val="1"/>{axis}<c:axPos val="b"/><c:numFmt formatCode="General" sourceLinked="1"/>'
+                '<c:tickLblPos val="nextTo"/><c:crossAx val="2"/><c:crosses val="autoZero"/><c:auto val="1"/>'
+                '<c:lblAlgn val="ctr"/><c:lblOffset val="100"/></c:catAx>'
+                f'<c:valAx><c:axId val="2"/>{axis}<c:axPos val="l"/><c:majorGridlines/>'
+                '<c:numFmt formatCode="General" sourceLinked="1"/><c:tickLblPos val="nextTo"/><c:crossAx val="1"/>'
+                '<c:crosses val="autoZero"/><c:crossBetween val="between"/></c:valAx></c:plotArea>'
+                '<c:legend><c:legendPos val="r"/><c:overlay val="0"/></c:legend><c:plotVisOnly val="1"/>'
+                "</c:chart></c:chartSpace>"))
+            # 20cm x 10cm at B2, the size used by the other writers
+            self.zf.writestr(sheet.drawing, (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+                'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"><xdr:oneCellAnchor>'
+                "<xdr:from><xdr:col>1</xdr:col><xdr:colOff>0</xdr:colOff><xdr:row>1</xdr:row><xdr:rowOff>0</xdr:rowOff>"
+                '</xdr:from><xdr:ext cx="7200000" cy="3600000"/><xdr:graphicFrame macro=""><xdr:nvGraphicFramePr>'
+                f'<xdr:cNvPr id="2" name="Chart {self.charts}"/><xdr:cNvGraphicFramePr/></xdr:nvGraphicFramePr>'
+                '<xdr:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/></xdr:xfrm><a:graphic>'
+                '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/chart">'
+                '<c:chart xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" r:id="rId1"/>'
+                "</a:graphicData></a:graphic></xdr:graphicFrame><xdr:clientData/></xdr:oneCellAnchor></xdr:wsDr>"))
+            self.zf.writestr(f"xl/drawings/_rels/drawing{self.charts}.xml.rels", _rels_xml(
+                [(f"../charts/chart{self.charts}.xml", "chart")]))
+            self.zf.writestr(f"xl/worksheets/_rels/{sheet.part.rsplit('/', 1)[1]}.rels", _rels_xml(
+                [(f"../drawings/drawing{self.charts}.xml", "drawing")]))
+
+    def close(self) -> None:
+        """Write the workbook-level parts and move the finished file into place."""
+        zf = self.zf
+        strings = "".join(f'<si><t xml:space="preserve">{_xml_string(t)}</t></si>' if t != t.strip()
+                          else f"<si><t>{_xml_string(t)}</t></si>" for t in self.strings)
+        zf.writestr("xl/sharedStrings.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            f'count="{self.string_refs}" uniqueCount="{len(self.strings)}">{strings}</sst>'))
+        sections = [
+            '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>',
+            *(f'<{tag} count="{len(interned.items)}">{"".join(interned.items)}</{tag}>' for tag, interned in (
+                ("fonts", self.fonts), ("fills", self.fills), ("borders", self.borders))),
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>',
+            f'<cellXfs count="{len(self.xfs.items)}">{"".join(self.xfs.items)}</cellXfs>',
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>',
+            f'<dxfs count="{len(self.dxfs.items)}">{"".join(self.dxfs.items)}</dxfs>',
+            '<tableStyles count="0" defaultTableStyle="TableStyleMedium9" defaultPivotStyle="PivotStyleLight16"/>',
+        ]
+        zf.writestr("xl/styles.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            + "".join(sections) + "</styleSheet>"))
+        sheets = []
+        for num, sheet in enumerate(self.sheets, 1):
+            state = ' state="hidden"' if sheet.hidden else ""
+            sheets.append(f'<sheet name="{xml_escape(sheet.name, _XML_QUOTE)}" sheetId="{num}"{state} r:id="rId{num}"/>')
+        zf.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<workbookPr/><bookViews><workbookView/></bookViews>'
+            f'<sheets>{"".join(sheets)}</sheets><calcPr calcId="124519" fullCalcOnLoad="1"/></workbook>'))
+        zf.writestr("xl/_rels/workbook.xml.rels", _rels_xml(
+            [(sheet.part[3:], "worksheet") for sheet in self.sheets] + [("styles.xml", "styles"),
+                                                                      ("sharedStrings.xml", "sharedStrings")]))
+        zf.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            'officeDocument" Target="xl/workbook.xml"/>'
+            '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/'
+            'core-properties" Target="docProps/core.xml"/>'
+            '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            'extended-properties" Target="docProps/app.xml"/></Relationships>'))
+        now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        zf.writestr("docProps/core.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified></cp:coreProperties>'))
+        zf.writestr("docProps/app.xml", _app_xml([sheet.name for sheet in self.sheets]))
+        ml = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+        overrides = [("/xl/workbook.xml", f"{ml}.sheet.main+xml"), ("/xl/styles.xml", f"{ml}.styles+xml"),
+                     ("/xl/sharedStrings.xml", f"{ml}.sharedStrings+xml"),
+                     ("/docProps/core.xml", "application/vnd.openxmlformats-package.core-properties+xml"),
+                     ("/docProps/app.xml", "application/vnd.openxmlformats-officedocument.extended-properties+xml")]
+        overrides += [(f"/{sheet.part}", f"{ml}.worksheet+xml") for sheet in self.sheets]
+        for num in range(1, self.charts + 1):
+            overrides += [(f"/xl/drawings/drawing{num}.xml", "application/vnd.openxmlformats-officedocument.drawing+xml"),
+                          (f"/xl/charts/chart{num}.xml", "application/vnd.openxmlformats-officedocument.drawingml.chart+xml")]
+        zf.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            + "".join(f'<Override PartName="{name}" ContentType="{ct}"/>' for name, ct in overrides) + "</Types>"))
+        zf.close()
+        if self.tmp:
+            self.tmp.replace(self.out)
+
+    def abort(self) -> None:
+        for sheet in self.sheets:
+            if not sheet.fh.closed:
+                sheet.fh.close()
+        self.zf.close()
+        if self.tmp:
+            self.tmp.unlink(missing_ok=True)
+
+
+def _column_letter(idx: int) -> str:
+    """Excel column letters of the 1-based column idx."""
+    letters = ""
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _native_width(width: float) -> str:
+    """The <col> width Excel stores for a character width, as xlsxwriter computes it."""
+    # Calibri 11: 7 pixels per digit plus 5 pixels of padding
+    pixels = int(width * 12 + 0.5) if width < 1 else int(width * 7 + 0.5) + 5
+    return repr(int(pixels / 7 * 256) / 256)
+
+
+def _native_dxf(props: dict[str, str]) -> str:
+    """The <dxf> of an analytics rule's xlsx_format (font_color, bg_color)."""
+    font = f'<font><color rgb="FF{props["font_color"][1:].upper()}"/></font>' if "font_color" in props else ""
+    fill = (f'<fill><patternFill><bgColor rgb="FF{props["bg_color"][1:].upper()}"/></patternFill></fill>'
+            if "bg_color" in props else "")
+    return f"<dxf>{font}{fill}</dxf>"
+
+
+def _rels_xml(targets: list[tuple[str, str]]) -> str:
+    """A relationships part with one officeDocument relationship per (target, type)."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(f'<Relationship Id="rId{num}" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                  f'relationships/{kind}" Target="{target}"/>' for num, (target, kind) in enumerate(targets, 1))
+        + "</Relationships>"
+    )
+
+
+def _open_batches(df: pd.DataFrame | Iterable[pd.DataFrame]) -> tuple[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Return the first batch (used for columns, widths and chart heuristics)
+    and an iterator over all batches, including the first."""
+    if isinstance(df, pd.DataFrame):
+        return df, iter([df])
+    batches = _prefetch(df)
+    first = next(batches, None)
+    if first is None:
+        first = pd.DataFrame()
+    return first, itertools.chain([first], batches)
+
+
+def compute_column_widths(
+    df: pd.DataFrame,
+    font_name: str | None = None,
+    sample: int | None = None,
+    quantile: float | None = None,
+) -> list[float]:
+    """Column widths from vectorized string lengths over each column of df.
+
+    By default the longest value in the whole column sets the width. sample
+    limits the scan to that many randomly chosen rows, and quantile uses that
+    length quantile instead of the maximum so a few outliers don't push every
+    column to the cap.
+    """
+    with _phase("autosize", rows=len(df), cells=df.size):
+        factor = _font_width_factor(font_name)
+        data = df if sample is None or len(df) <= sample else df.sample(n=sample, random_state=0)
+        widths = []
+        for col in df.columns:
+            values = data[col]
+            lengths = values[values.notna()].astype(str).str.len()
+            longest = 0
+            if len(lengths):
+                longest = math.ceil(lengths.quantile(quantile)) if quantile is not None else int(lengths.max())
+            max_length = max(len(str(col)), longest)
+            widths.append(min((max_length + 2) * factor, 50))
+        return widths
+
+
+def _autosize_options(brand: BrandLike | None) -> dict[str, Any]:
+    """compute_column_widths keyword arguments from the brand's excel options."""
+    if not brand:
+        return {}
+    opts = brand.get("excel", {})
+    return {
+        "font_name": brand.get("fonts", {}).get("body"),
+        "sample": opts.get("autosize_sample"),
+        "quantile": opts.get("autosize_quantile"),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _font_width_factor(font_name: str | None) -> float:
+    """Character-to-width multiplier for a font, cached per font name."""
+    name = (font_name or "").lower()
+    if "condensed" in name or "narrow" in name:
+        return 0.95
+    if any(wide in name for wide in ("verdana", "tahoma", "courier", "mono")):
+        return 1.25
+    return 1.1
+
+
+def _infer_record_columns(records: Any) -> tuple[list[str], list[str]] | None:
+    """Columns (in first-seen order) and kinds of a list of flat record dicts.
+
+    Kinds follow the dtypes pd.DataFrame(records) would give ("number",
+    "bool" or "text"). Returns None for anything else, e.g. nested values
+    or records without any keys.
+    """
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        return None
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    if not columns:
+        return None
+    kinds = []
+    for col in columns:
+        types = {type(record.get(col)) for record in records}
+        if types & {dict, list}:
+            return None
+        present = types - {type(None)}
+        # NaN/inf need pandas' missing-value handling
+        if float in present and not all(math.isfinite(v) for r in records if isinstance(v := r.get(col), float)):
+            return None
+        if present == {bool} and len(types) == 1:
+            kinds.append("bool")
+        elif present and present <= {int, float}:
+            kinds.append("number")
+        else:
+            kinds.append("text")
+    return columns, kinds
+
+
+def _record_column_widths(
+    columns: list[str],
+    kinds: list[str],
+    records: list[dict[str, Any]],
+    font_name: str | None = None,
+    sample: int | None = None,
+    quantile: float | None = None,
+) -> list[float]:
+    """compute_column_widths for record dicts.
+
+    sample is ignored: fast-path inputs are small enough to scan in full.
+    """
+    factor = _font_width_factor(font_name)
+    widths = []
+    for col, kind in zip(columns, kinds):
+        values = [record.get(col) for record in records]
+        present = [v for v in values if v is not None]
+        if kind == "number":
+            # Rendered the way pandas stores the column: int64 only when every value is integral
+            integral = len(present) == len(values) and all(float(v).is_integer() for v in present)
+            present = [int(v) if integral else float(v) for v in present]
+        lengths = sorted(len(str(v)) for v in present)
+        longest = 0
+        if lengths:
+            if quantile is not None:
+                # Linear interpolation, as Series.quantile
+                pos = (len(lengths) - 1) * quantile
+                lo = math.floor(pos)
+                hi = min(lo + 1, len(lengths) - 1)
+                longest = math.ceil(lengths[lo] + (lengths[hi] - lengths[lo]) * (pos - lo))
+            else:
+                longest = lengths[-1]
+        max_length = max(len(str(col)), longest)
+        widths.append(min((max_length + 2) * factor, 50))
+    return widths
+
+
+def _iter_row_values(columns: pd.Index, batches: Iterable[pd.DataFrame]) -> Iterator[tuple]:
+    """Yield row tuples with NaN/NaT as None, aligning every batch to columns."""
+    for batch in batches:
+        if list(batch.columns) != list(columns):
+            batch = batch.reindex(columns=columns)
+        # Convert a slice at a time so the object copy stays bounded
+        for start in range(0, len(batch), STREAM_CHUNK_ROWS):
+            chunk = batch.iloc[start:start + STREAM_CHUNK_ROWS].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            yield from chunk.itertuples(index=False, name=None)
+
+
+def _iter_static_rows(
+    columns: pd.Index,
+    batches: Iterable[pd.DataFrame],
+    static: _StaticRules,
+) -> Iterator[tuple[tuple, list[tuple[int, int]] | None]]:
+    """_iter_row_values paired with each row's static rule hits (see _StaticRules.hits)."""
+    for batch in batches:
+        if list(batch.columns) != list(columns):
+            batch = batch.reindex(columns=columns)
+        hits = static.hits(batch)
+        for idx, values in enumerate(_iter_row_values(columns, [batch])):
+            yield values, hits.get(idx)
+
+
+def append_excel(
+    path: str | Path,
+    df: pd.DataFrame | Iterable[pd.DataFrame],
+    sheet_name: str | None = None,
+    output: str | Path | None = None,
+) -> Path:
+    """Append df's rows under the existing data of a workbook written by this tool.
+
+    Only the data sheet's XML is rewritten, by splicing the new rows in as
+    raw XML; nothing is loaded into an object model, so the work beyond
+    copying the file scales with the number of new rows. Each new row
+    copies the cell styles of the existing row of the same parity, so the
+    branding, number formats and alternating pattern carry on without the
+    brand file. Conditional formats, autofilters, tables and chart series
+    that end at the last data row are extended to the new last row.
+
+    Columns are matched to the header row by name; missing ones are left
+    blank. sheet_name defaults to the first sheet, output to path (the file
+    is replaced atomically). Raises ValueError if the sheet has fewer than
+    two data rows to copy styles from, df has columns the sheet lacks, or
+    the rows would not fit on the sheet.
+    """
+    import tempfile
+    import zipfile
+
+    src_path = Path(path)
+    out = Path(output) if output else src_path
+    df, batches = _open_batches(df)
+
+    with zipfile.ZipFile(src_path) as zf:
+        sheet_part, sheet_title = _sheet_part(zf, sheet_name)
+        with tempfile.TemporaryFile() as spool, tempfile.TemporaryFile() as new_rows:
+            scan = _scan_sheet_xml(zf, sheet_part, spool)
+            header = _header_names(zf, scan["header"])
+            unknown = [str(c) for c in df.columns if str(c) not in header.values()]
+            if unknown:
+                raise ValueError(f"Columns not in sheet {sheet_title!r}: {', '.join(unknown)}")
+
+            last_row, last_styles = scan["last"]
+            prev_row, prev_styles = scan["prev"]
+            if prev_row < 2:
+                raise ValueError(f"Sheet {sheet_title!r} needs at least two data rows to append to")
+
+            letters = list(header)
+            names = pd.Index(list(header.values()))
+            batches = (batch.rename(columns=str) for batch in batches)
+            # New rows go below the last row, which may be a formatted empty one
+            row_idx = end_row = scan["end_row"]
+            for values in _iter_row_values(names, batches):
+                row_idx += 1
+                if row_idx > EXCEL_MAX_ROWS:
+                    raise ValueError(f"Appending would exceed Excel's {EXCEL_MAX_ROWS:,} rows on {sheet_title!r}")
+                # New rows continue the alternation of the rows above them
+                styles = last_styles if (row_idx - last_row) % 2 == 0 else prev_styles
+                cells = "".join(_cell_xml(f"{letter}{row_idx}", value, styles.get(letter, 0))
+                                for letter, value in zip(letters, values))
+                new_rows.write(f'<row r="{row_idx}">{cells}</row>'.encode("utf-8"))
+            if row_idx == end_row:
+                return out if out == src_path else Path(shutil.copyfile(src_path, out))
+
+            extend = functools.partial(_extend_refs, old_row=last_row, new_row=row_idx)
+            sheet_ref = re.escape(sheet_title)
+            quoted_ref = re.escape(sheet_title.replace("'", "''"))
+            # Chart series refer to the sheet as Sheet1!$A$2:$A$7 or 'Sheet 1'!$A$2:$A$7
+            chart_pattern = re.compile(rf"((?:'{quoted_ref}'|{sheet_ref})!\$[A-Z]+\$\d+:\$[A-Z]+\$){last_row}\b")
+            tables = set(_sheet_tables(zf, sheet_part))
+
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+            try:
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as dst:
+                    for info in zf.infolist():
+                        if info.filename == sheet_part:
+                            size = spool.tell() + new_rows.tell()
+                            with dst.open(_zip_entry(info), "w", force_zip64=size > zipfile.ZIP64_LIMIT) as fh:
+                                fh.write(extend(scan["prelude"]))
+                                spool.seek(len(scan["prelude"]))
+                                _copy_bytes(spool, fh, scan["data_end"] - len(scan["prelude"]))
+                                new_rows.seek(0)
+                                shutil.copyfileobj(new_rows, fh)
+                                fh.write(extend(scan["tail"]))
+                        elif info.filename in tables:
+                            dst.writestr(_zip_entry(info), extend(zf.read(info)))
+                        elif info.filename.startswith("xl/charts/"):
+                            text = zf.read(info).decode("utf-8")
+                            updated = chart_pattern.sub(rf"\g<1>{row_idx}", text)
+                            if updated != text:
+                                # Cached points are stale; Excel rebuilds them from the references
+                                updated = re.sub(r"<(\w+:|)(num|str)Cache>.*?</\1\2Cache>", "", updated, flags=re.DOTALL)
+                            dst.writestr(_zip_entry(info), updated)
+                        else:
+                            with zf.open(info) as fh_in, \
+                                    dst.open(_zip_entry(info), "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as fh_out:
+                                shutil.copyfileobj(fh_in, fh_out)
+                tmp.replace(out)
+            finally:
+                tmp.unlink(missing_ok=True)
+    return out
+
+
+def _zip_entry(info: Any) -> Any:
+    """A fresh, deflated ZipInfo for re-writing the member described by info."""
+    import zipfile
+
+    entry = zipfile.ZipInfo(info.filename, info.date_time)
+    entry.compress_type = zipfile.ZIP_DEFLATED
+    entry.external_attr = info.external_attr
+    return entry
+
+
+def _sheet_part(zf: Any, sheet_name: str | None) -> tuple[str, str]:
+    """Zip member and title of the named worksheet (default: the first)."""
+    from xml.etree import ElementTree
+
+    ns = {
+        "m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+        "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+        "p": "http://schemas.openxmlformats.org/package/2006/relationships",
+    }
+    sheets = ElementTree.fromstring(zf.read("xl/workbook.xml")).findall("m:sheets/m:sheet", ns)
+    if not sheets:
+        raise ValueError("Workbook has no sheets")
+    if sheet_name is None:
+        sheet = sheets[0]
+    else:
+        sheet = next((s for s in sheets if s.get("name") == sheet_name), None)
+        if sheet is None:
+            raise ValueError(f"Sheet not found: {sheet_name!r}")
+    rel_id = sheet.get(f"{{{ns['r']}}}id")
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(rel.get("Target") for rel in rels.findall("p:Relationship", ns) if rel.get("Id") == rel_id)
+    return _resolve_part("xl/workbook.xml", target), sheet.get("name")
+
+
+def _resolve_part(source: str, target: str) -> str:
+    """Zip member name of a relationship target, relative to its source part."""
+    import posixpath
+
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def _sheet_tables(zf: Any, sheet_part: str) -> Iterator[str]:
+    """Zip members of the table definitions attached to a worksheet."""
+    return _related_parts(zf, sheet_part, "table")
+
+
+def _related_parts(zf: Any, part: str, kind: str) -> Iterator[str]:
+    """Zip members of a part's relationships of one type ("table", "drawing", "chart", ...)."""
+    import posixpath
+
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in zf.namelist():
+        return
+    for rel in re.finditer(r"<Relationship\b[^>]*>", zf.read(rels_path).decode("utf-8")):
+        attrs = dict(re.findall(r'(\w+)="([^"]*)"', rel.group(0)))
+        if attrs.get("Type", "").endswith(f"/{kind}") and attrs.get("TargetMode") != "External":
+            yield _resolve_part(part, attrs["Target"])
+
+
+def _scan_sheet_xml(zf: Any, sheet_part: str, spool: Any) -> dict[str, Any]:
+    """Decompress a worksheet into spool, keeping only what append_excel edits.
+
+    Returns the XML before <sheetData> ("prelude"), the header row element,
+    the last two rows with cells as (row number, {column letter: style id}),
+    the number of the sheet's last row, counting self-closing empty rows
+    ("end_row"), the offset of </sheetData> ("data_end") and everything
+    from it on ("tail"). Only a window from the second-to-last row with
+    cells on is held in memory.
+    """
+    window = b""
+    offset = 0  # spool offset of window[0]
+    prelude = header = None
+    with zf.open(sheet_part) as src:
+        for chunk in iter(functools.partial(src.read, 1 << 20), b""):
+            spool.write(chunk)
+            window += chunk
+            if header is None:
+                start = window.find(b"<sheetData")
+                if start < 0:
+                    continue
+                # Self-closing rows are formatted empty rows, not the header
+                header = next((m.group(0) for m in _ROW_ELEMENT.finditer(window, start)
+                               if not m.group(0).endswith(b"/>")), None)
+                if header is None:
+                    continue
+                prelude = window[:start]
+            if b"</sheetData>" in window:
+                break
+            # Drop everything before the second-to-last row with cells
+            starts = [m.start() for m in _ROW_ELEMENT.finditer(window) if not m.group(0).endswith(b"/>")]
+            if len(starts) > 1 and starts[-2] > 0:
+                offset += starts[-2]
+                window = window[starts[-2]:]
+        spool.write(src.read())
+
+    data_end = window.find(b"</sheetData>")
+    if header is None or data_end < 0:
+        raise ValueError(f"No data rows found in {sheet_part}")
+    elements = [m.group(0) for m in _ROW_ELEMENT.finditer(window[:data_end])]
+    rows = [_row_styles(row) for row in elements if not row.endswith(b"/>")]
+    if len(rows) < 2:
+        # Only the header and at most one data row fit in the window
+        rows = [(1, {})] * (2 - len(rows)) + rows
+    spool.seek(offset + data_end)
+    tail = spool.read()
+    spool.seek(0, os.SEEK_END)
+    return {
+        "prelude": prelude,
+        "header": header,
+        "prev": rows[-2],
+        "last": rows[-1],
+        "end_row": max(rows[-1][0], _row_styles(elements[-1])[0]),
+        "data_end": offset + data_end,
+        "tail": tail,
+    }
+
+
+def _row_styles(row_xml: bytes) -> tuple[int, dict[str, int]]:
+    """Row number and per-column style ids of a <row> element."""
+    number = int(re.search(rb'\br="(\d+)"', row_xml).group(1))
+    styles = {}
+    for cell in re.finditer(rb"<c\b([^>]*?)/?>", row_xml):
+        ref = re.search(rb'\br="([A-Z]+)\d+"', cell.group(1))
+        style = re.search(rb'\bs="(\d+)"', cell.group(1))
+        if ref and style:
+            styles[ref.group(1).decode()] = int(style.group(1))
+    return number, styles
+
+
+def _header_names(zf: Any, header_xml: bytes) -> dict[str, str]:
+    """Column letter -> header text of a header <row>, resolving shared strings."""
+    from xml.etree import ElementTree
+
+    ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    # The row snippet lost its namespace declaration; use the default one
+    row = ElementTree.fromstring(header_xml.replace(b"<row", f'<row xmlns="{ns[1:-1]}"'.encode(), 1))
+    cells: dict[str, Any] = {}
+    shared: dict[str, int] = {}
+    for cell in row.iter(f"{ns}c"):
+        letter = re.match(r"[A-Z]+", cell.get("r", "")).group(0)
+        if cell.get("t") == "s":
+            shared[letter] = int(cell.findtext(f"{ns}v"))
+        elif cell.get("t") == "inlineStr":
+            cells[letter] = "".join(t.text or "" for t in cell.iter(f"{ns}t"))
+        elif cell.find(f"{ns}v") is not None:
+            cells[letter] = cell.findtext(f"{ns}v")
+    if shared:
+        strings = _shared_strings(zf, max(shared.values()))
+        cells.update({letter: strings[idx] for letter, idx in shared.items()})
+    return {letter: str(cells[letter]) for letter in sorted(cells, key=lambda c: (len(c), c))}
+
+
+def _shared_strings(zf: Any, max_index: int) -> list[str]:
+    """The first max_index + 1 shared strings, parsed incrementally."""
+    from xml.etree import ElementTree
+
+    ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    strings: list[str] = []
+    with zf.open("xl/sharedStrings.xml") as fh:
+        for _, elem in ElementTree.iterparse(fh):
+            if elem.tag == f"{ns}si":
+                strings.append("".join(t.text or "" for t in elem.iter(f"{ns}t")))
+                elem.clear()
+                if len(strings) > max_index:
+                    break
+    return strings
+
+
+def _cell_xml(ref: str, value: Any, style: int) -> str:
+    """One <c> element for append_excel; strings are written inline."""
+    s = f' s="{style}"' if style else ""
+    if value is None:
+        return f'<c r="{ref}"{s}/>' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    # numbers ABCs also cover numpy scalars, whose repr is not a plain number
+    if isinstance(value, numbers.Integral):
+        return f'<c r="{ref}"{s}><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real):
+        if not math.isfinite(value):
+            return f'<c r="{ref}"{s} t="e"><v>#NUM!</v></c>'
+        return f'<c r="{ref}"{s}><v>{float(value)!r}</v></c>'
+    if isinstance(value, (datetime.date, datetime.time)):
+        from openpyxl.utils.datetime import to_excel
+
+        if getattr(value, "tzinfo", None) is not None:
+            value = value.replace(tzinfo=None)
+        return f'<c r="{ref}"{s}><v>{to_excel(value)!r}</v></c>'
+    text = str(value)
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t{space}>{_xml_string(text)}</t></is></c>'
+
+
+def _xml_string(text: str) -> str:
+    """text escaped for a string's <t>, as Excel and xlsxwriter write it.
+
+    Control characters become _xHHHH_ escapes, and text that already looks
+    like an escape has its underscore escaped, so Excel reads back text as
+    it was given.
+    """
+    text = _LITERAL_ESCAPE.sub(r"_x005F\1", text)
+    return xml_escape(_ESCAPED_CHARS.sub(lambda m: f"_x{ord(m.group(0)):04X}_", text))
+
+
+def _extend_refs(xml: bytes, old_row: int, new_row: int) -> bytes:
+    """Move the end of every ref/sqref range that stops at old_row to new_row."""
+    def extend_range(m: re.Match) -> bytes:
+        return re.sub(rb"(\b[A-Z]+\d+:[A-Z]+)" + str(old_row).encode() + rb"\b", rb"\g<1>" + str(new_row).encode(), m.group(0))
+
+    return re.sub(rb'\b(?:ref|sqref)="[^"]*"', extend_range, xml)
+
+
+def _copy_bytes(src: Any, dst: Any, n: int) -> None:
+    while n > 0:
+        block = src.read(min(n, 1 << 20))
+        if not block:
+            break
+        dst.write(block)
+        n -= len(block)
+
+
+def _workbook_sheets(zf: Any) -> list[tuple[str, str | None, str]]:
+    """(name, state, zip member) of every sheet of a package, in tab order."""
+    rels = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    targets = {}
+    for rel in re.finditer(r"<Relationship\b[^>]*>", rels):
+        attrs = dict(re.findall(r'(\w+)="([^"]*)"', rel.group(0)))
+        targets[attrs["Id"]] = _resolve_part("xl/workbook.xml", attrs["Target"])
+    sheets = []
+    for sheet in re.finditer(r"<sheet\b[^>]*>", zf.read("xl/workbook.xml").decode("utf-8")):
+        attrs = dict(re.findall(r'([\w:]+)="([^"]*)"', sheet.group(0)))
+        sheets.append((xml_unescape(attrs["name"], {"&quot;": '"'}), attrs.get("state"), targets[attrs["r:id"]]))
+    return sheets
+
+
+# styles.xml sections merged by _assemble_workbook: (section, item, insert before)
+_STYLE_SECTIONS = (
+    ("numFmts", "numFmt", "<fonts"),
+    ("fonts", "font", None),
+    ("fills", "fill", None),
+    ("borders", "border", None),
+    ("cellXfs", "xf", None),
+    ("dxfs", "dxf", "<tableStyles"),
+)
+
+
+def _style_items(styles: str, section: str, item: str) -> list[str]:
+    """The raw child elements of one styles.xml section."""
+    m = re.search(rf"<{section}\b[^>]*?(?:/>|>(.*?)</{section}>)", styles, re.DOTALL)
+    if not m or not m.group(1):
+        return []
+    return re.findall(rf"<{item}\b[^>]*?/>|<{item}\b[^>]*>.*?</{item}>", m.group(1), re.DOTALL)
+
+
+def _set_style_items(styles: str, section: str, items: list[str], before: str | None) -> str:
+    xml = f'<{section} count="{len(items)}">{"".join(items)}</{section}>'
+    m = re.search(rf"<{section}\b[^>]*?(?:/>|>.*?</{section}>)", styles, re.DOTALL)
+    if m:
+        return styles[:m.start()] + xml + styles[m.end():]
+    if not items:
+        return styles
+    at = styles.index(before)
+    return styles[:at] + xml + styles[at:]
+
+
+class _Interned:
+    """Merged, de-duplicated list of XML items with one index map per package."""
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.index: dict[Any, int] = {}
+
+    def add(self, items: list[Any], first: bool = False) -> list[int]:
+        ids = []
+        for item in items:
+            if first:
+                # The first package keeps its ids, duplicates included
+                self.index.setdefault(item, len(self.items))
+                ids.append(len(self.items))
+                self.items.append(item)
+                continue
+            idx = self.index.get(item)
+            if idx is None:
+                idx = self.index[item] = len(self.items)
+                self.items.append(item)
+            ids.append(idx)
+        return ids
+
+
+def _merge_styles(packages: list[str]) -> tuple[str, list[dict[str, list[int]]]]:
+    """One styles.xml for all packages, and each package's id maps into it.
+
+    The first package's styles.xml is the base and keeps its ids; fonts,
+    fills, borders, cell formats and differential formats of the others are
+    appended unless an identical element is already there. Custom number
+    formats are matched by format code.
+    """
+    merged = {section: _Interned() for section, _, _ in _STYLE_SECTIONS if section != "numFmts"}
+    codes: dict[str, int] = {}
+    maps = []
+    for idx, styles in enumerate(packages):
+        ids: dict[str, Any] = {}
+        num_fmts = {}
+        for fmt in _style_items(styles, "numFmts", "numFmt"):
+            old = int(re.search(r'numFmtId="(\d+)"', fmt).group(1))
+            code = re.search(r'formatCode="([^"]*)"', fmt).group(1)
+            if code not in codes:
+                codes[code] = old if idx == 0 else max([163, *codes.values()]) + 1
+            num_fmts[old] = codes[code]
+        for section, item, _ in _STYLE_SECTIONS[1:]:
+            items = _style_items(styles, section, item)
+            if section == "cellXfs":
+                def remap(m: re.Match) -> str:
+                    old = int(m.group(2))
+                    if m.group(1) == "numFmtId":
+                        return f'numFmtId="{num_fmts.get(old, old)}"'
+                    return f'{m.group(1)}="{ids[m.group(1)[:-2] + "s"][old]}"'
+
+                items = [re.sub(r'\b(numFmtId|fontId|fillId|borderId)="(\d+)"', remap, xf) for xf in items]
+            ids[section] = merged[section].add(items, first=idx == 0)
+        maps.append(ids)
+
+    styles = packages[0]
+    fmts = [f'<numFmt numFmtId="{num}" formatCode="{code}"/>' for code, num in codes.items()]
+    styles = _set_style_items(styles, "numFmts", fmts, "<fonts")
+    for section, _, before in _STYLE_SECTIONS[1:]:
+        styles = _set_style_items(styles, section, merged[section].items, before)
+    return styles, maps
+
+
+def _copy_rels_tree(zf: Any, part: str, new_part: str, out: Any, names: dict[str, int],
+                    overrides: dict[str, str], types: dict[str, str], tables: set[str]) -> None:
+    """Copy the parts related to part (drawings, charts, tables, ...) under fresh names.
+
+    Each related part gets the next free number of its name stem (drawing3,
+    chart7, ...) and its content type override; the rels file of new_part
+    is written with the new targets. Tables also get that number as their
+    id, and a name not yet in tables (lower-cased names already used).
+    """
+    import posixpath
+
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in zf.namelist():
+        return
+
+    def retarget(rel: re.Match) -> str:
+        xml = rel.group(0)
+        if 'TargetMode="External"' in xml:
+            return xml
+        target = re.search(r'Target="([^"]*)"', xml).group(1)
+        child = _resolve_part(part, target)
+        folder, base = posixpath.split(child)
+        stem, ext = re.match(r"(.*?)\d*(\.[^.]*)$", base).groups()
+        names[f"{folder}/{stem}"] = number = names.get(f"{folder}/{stem}", 0) + 1
+        new_child = f"{folder}/{stem}{number}{ext}"
+        if f"/{child}" in types:
+            overrides[f"/{new_child}"] = types[f"/{child}"]
+        data = zf.read(child)
+        if types.get(f"/{child}", "").endswith(".table+xml"):
+            data = _renumber_table(data.decode("utf-8"), number, tables).encode("utf-8")
+        out.writestr(new_child, data)
+        _copy_rels_tree(zf, child, new_child, out, names, overrides, types, tables)
+        new_target = posixpath.relpath(new_child, posixpath.dirname(new_part))
+        return xml.replace(f'Target="{target}"', f'Target="{new_target}"')
+
+    rels = re.sub(r"<Relationship\b[^>]*>", retarget, zf.read(rels_path).decode("utf-8"))
+    out.writestr(posixpath.join(posixpath.dirname(new_part), "_rels", posixpath.basename(new_part) + ".rels"), rels)
+
+
+def _renumber_table(xml: str, table_id: int, used: set[str]) -> str:
+    """A table part with id table_id, renamed with a _2, _3, ... suffix if its name is taken.
+
+    Every sheet package numbers its tables from 1, and Excel rejects a
+    workbook with two tables of the same id or (case-insensitive) name.
+    """
+    head = re.search(r"<table\b[^>]*>", xml).group(0)
+    name = re.search(r'\bdisplayName="([^"]*)"', head).group(1)
+    unique, suffix = name, 1
+    while unique.lower() in used:
+        suffix += 1
+        unique = f"{name}_{suffix}"
+    used.add(unique.lower())
+    new_head = re.sub(r'\bid="\d+"', f'id="{table_id}"', head, count=1)
+    new_head = re.sub(r'\b(name|displayName)="[^"]*"', lambda m: f'{m.group(1)}="{unique}"', new_head)
+    return xml.replace(head, new_head, 1)
+
+
+def _rewrite_sheet_xml(src: Any, dst: Any, maps: dict[str, list[int]], strings: list[int], selected: bool) -> None:
+    """Copy a worksheet, renumbering its style, shared string and dxf ids.
+
+    The XML is processed in chunks that end after a </row>, so no element
+    is ever split; a map that is the identity is not applied at all.
+    """
+    subs: list[tuple[bytes, list[int]]] = []
+    for pattern, ids in (
+        (rb'(<c r="[A-Z]+\d+" s=")(\d+)(")', maps["cellXfs"]),
+        (rb'(<row [^>]*? s=")(\d+)(")', maps["cellXfs"]),
+        (rb'(<col [^>]*? style=")(\d+)(")', maps["cellXfs"]),
+        (rb'(<cfRule [^>]*?dxfId=")(\d+)(")', maps["dxfs"]),
+        (rb'( t="s"><v>)(\d+)(</v>)', strings),
+    ):
+        if any(new != old for old, new in enumerate(ids)):
+            subs.append((re.compile(pattern), ids))
+
+    def rewrite(xml: bytes) -> bytes:
+        for pattern, ids in subs:
+            xml = pattern.sub(lambda m: b"%s%d%s" % (m.group(1), ids[int(m.group(2))], m.group(3)), xml)
+        if not selected:
+            xml = re.sub(rb'(<sheetView [^>]*?) tabSelected="1"', rb"\1", xml)
+        return xml
+
+    pending = b""
+    for chunk in iter(functools.partial(src.read, 1 << 20), b""):
+        pending += chunk
+        cut = pending.rfind(b"</row>")
+        if cut >= 0:
+            cut += len(b"</row>")
+            dst.write(rewrite(pending[:cut]))
+            pending = pending[cut:]
+    dst.write(rewrite(pending))
+
+
+def _assemble_workbook(packages: list[Path | bytes], out: Path | BinaryIO) -> Path | BinaryIO:
+    """Combine single-workbook .xlsx packages (files or bytes) into one workbook at out.
+
+    Sheets keep the order of packages; the Insights sheets of a package are
+    moved to the end. Styles and shared strings are merged into one table
+    each and every sheet is renumbered to match; drawings and charts are
+    copied with their relationships.
+    """
+    import zipfile
+
+    zips = [zipfile.ZipFile(io.BytesIO(p) if isinstance(p, bytes) else p) for p in packages]
+    try:
+        styles, maps = _merge_styles([zf.read("xl/styles.xml").decode("utf-8") for zf in zips])
+
+        # Shared strings: the <si> items of every package, de-duplicated
+        strings = _Interned()
+        string_maps = []
+        total = 0
+        for idx, zf in enumerate(zips):
+            if "xl/sharedStrings.xml" not in zf.namelist():
+                string_maps.append([])
+                continue
+            sst = zf.read("xl/sharedStrings.xml").decode("utf-8")
+            total += int(re.search(r'\bcount="(\d+)"', sst).group(1))
+            string_maps.append(strings.add(re.findall(r"<si>.*?</si>", sst, re.DOTALL), first=idx == 0))
+
+        sheets, insights = [], []
+        for idx, zf in enumerate(zips):
+            for pos, (name, state, part) in enumerate(_workbook_sheets(zf)):
+                extra = pos > 0 and name in ("Insights", INSIGHTS_DATA_SHEET)
+                (insights if extra else sheets).append((name, state, idx, part))
+        sheets += sorted(insights, key=lambda sheet: sheet[0] != INSIGHTS_DATA_SHEET)
+        folded = [name.lower() for name, _, _, _ in sheets]
+        if len(set(folded)) != len(folded):
+            raise ValueError("Sheet names must be unique (ignoring case); check rows_per_sheet part names")
+
+        types = [dict(re.findall(r'<Override PartName="([^"]*)" ContentType="([^"]*)"/>',
+                                 zf.read("[Content_Types].xml").decode("utf-8"))) for zf in zips]
+        defaults = {}
+        for zf in zips:
+            defaults.update(re.findall(r'<Default Extension="([^"]*)" ContentType="([^"]*)"/>',
+                                       zf.read("[Content_Types].xml").decode("utf-8")))
+        overrides = {name: ct for name, ct in types[0].items()
+                     if not name.startswith(("/xl/worksheets/", "/xl/drawings/", "/xl/charts/", "/xl/tables/",
+                                             "/xl/sharedStrings"))}
+
+        tmp = out.with_name(out.name + ".tmp") if isinstance(out, Path) else None
+        try:
+            with zipfile.ZipFile(tmp or out, "w", zipfile.ZIP_DEFLATED) as zout:
+                names: dict[str, int] = {}
+                tables: set[str] = set()
+                sheet_xml = []
+                rels = []
+                for num, (name, state, idx, part) in enumerate(sheets, 1):
+                    new_part = f"xl/worksheets/sheet{num}.xml"
+                    overrides[f"/{new_part}"] = types[idx][f"/{part}"]
+                    with zips[idx].open(part) as src, zout.open(new_part, "w", force_zip64=True) as dst:
+                        _rewrite_sheet_xml(src, dst, maps[idx], string_maps[idx], selected=num == 1)
+                    _copy_rels_tree(zips[idx], part, new_part, zout, names, overrides, types[idx], tables)
+                    hidden = f' state="{state}"' if state else ""
+                    sheet_xml.append(f'<sheet name="{xml_escape(name, _XML_QUOTE)}" sheetId="{num}"{hidden} r:id="rId{num}"/>')
+                    rels.append((f"worksheets/sheet{num}.xml", "worksheet"))
+                rels += [("theme/theme1.xml", "theme"), ("styles.xml", "styles")]
+                if strings.items:
+                    rels.append(("sharedStrings.xml", "sharedStrings"))
+                    overrides["/xl/sharedStrings.xml"] = ("application/vnd.openxmlformats-officedocument."
+                                                          "spreadsheetml.sharedStrings+xml")
+                    zout.writestr("xl/sharedStrings.xml", (
+                        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                        f'count="{total}" uniqueCount="{len(strings.items)}">{"".join(strings.items)}</sst>'))
+
+                workbook = zips[0].read("xl/workbook.xml").decode("utf-8")
+                workbook = re.sub(r"<sheets>.*?</sheets>", lambda _: f"<sheets>{''.join(sheet_xml)}</sheets>",
+                                  workbook, flags=re.DOTALL)
+                workbook = re.sub(r"<definedNames>.*?</definedNames>", "", workbook, flags=re.DOTALL)
+                workbook = re.sub(r' (?:activeTab|firstSheet)="\d+"', "", workbook)
+                zout.writestr("xl/workbook.xml", workbook)
+                zout.writestr("xl/_rels/workbook.xml.rels", _rels_xml(rels))
+                zout.writestr("xl/styles.xml", styles)
+                for member in ("_rels/.rels", "docProps/core.xml", "xl/theme/theme1.xml"):
+                    zout.writestr(member, zips[0].read(member))
+                zout.writestr("docProps/app.xml", _app_xml([name for name, _, _, _ in sheets]))
+                zout.writestr("[Content_Types].xml", (
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    + "".join(f'<Default Extension="{ext}" ContentType="{ct}"/>' for ext, ct in defaults.items())
+                    + "".join(f'<Override PartName="{name}" ContentType="{ct}"/>' for name, ct in overrides.items())
+                    + "</Types>"))
+            if tmp:
+                tmp.replace(out)
+        finally:
+            if tmp:
+                tmp.unlink(missing_ok=True)
+    finally:
+        for zf in zips:
+            zf.close()
+    return out
+
+
+def _app_xml(sheet_names: list[str]) -> str:
+    """docProps/app.xml listing the sheets of an assembled workbook."""
+    titles = "".join(f"<vt:lpstr>{xml_escape(name)}</vt:lpstr>" for name in sheet_names)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" '
+        'xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">'
+        "<Application>Microsoft Excel</Application><DocSecurity>0</DocSecurity><ScaleCrop>false</ScaleCrop>"
+        '<HeadingPairs><vt:vector size="2" baseType="variant"><vt:variant><vt:lpstr>Worksheets</vt:lpstr>'
+        f'</vt:variant><vt:variant><vt:i4>{len(sheet_names)}</vt:i4></vt:variant></vt:vector></HeadingPairs>'
+        f'<TitlesOfParts><vt:vector size="{len(sheet_names)}" baseType="lpstr">{titles}</vt:vector></TitlesOfParts>'
+        "<LinksUpToDate>false</LinksUpToDate><SharedDoc>false</SharedDoc>"
+        "<HyperlinksChanged>false</HyperlinksChanged><AppVersion>12.0000</AppVersion></Properties>"
+    )
+
+
+def inspect_workbook(path: str | Path, sample_rows: int = 5) -> dict[str, Any]:
+    """Summarize an .xlsx file from its zip parts, in bounded memory.
+
+    Returns the file size and modification time, the style table counts,
+    the shared strings count and, per sheet, its declared dimension, the
+    rows and cells actually present, its tables, conditional formats,
+    merged cells and charts, and the values of its first sample_rows rows.
+    Sheet XML is read in chunks; only the sample rows are parsed, and
+    shared strings are looked up for the sampled cells only.
+    """
+    import zipfile
+
+    path = Path(path)
+    stat = path.stat()
+    with zipfile.ZipFile(path) as zf:
+        styles = zf.read("xl/styles.xml").decode("utf-8") if "xl/styles.xml" in zf.namelist() else ""
+        date_styles = _date_styles(styles)
+        sheets = []
+        for name, state, part in _workbook_sheets(zf):
+            info = {"name": name, "state": state or "visible"}
+            if part in zf.namelist():
+                info.update(_inspect_sheet(zf, part, sample_rows, date_styles))
+            sheets.append(info)
+        wanted = {value.index for sheet in sheets for row in sheet.get("sample", ()) for value in row
+                  if isinstance(value, _SharedString)}
+        shared_count, strings = _lookup_shared_strings(zf, wanted)
+    for sheet in sheets:
+        for row in sheet.get("sample", ()):
+            row[:] = [strings.get(v.index) if isinstance(v, _SharedString) else v for v in row]
+    return {
+        "path": str(path),
+        "bytes": stat.st_size,
+        "modified": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+        "styles": {section: len(_style_items(styles, section, item)) for section, item in _INSPECT_STYLE_SECTIONS},
+        "shared_strings": shared_count,
+        "sheets": sheets,
+    }
+
+
+def inspect_workbooks(paths: Sequence[str | Path], sample_rows: int = 5,
+                      workers: int | None = None) -> list[dict[str, Any]]:
+    """inspect_workbook over many files in parallel worker processes.
+
+    Results are in the order of paths. A file that cannot be read gives
+    {"path": ..., "error": ...} instead of failing the others.
+    """
+    jobs = [(str(p), sample_rows) for p in paths]
+    if workers == 1 or len(jobs) <= 1:
+        return [_inspect_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+        return list(pool.map(_inspect_job, jobs))
+
+
+def _inspect_job(job: tuple[str, int]) -> dict[str, Any]:
+    path, sample_rows = job
+    try:
+        return inspect_workbook(path, sample_rows)
+    except Exception as ex:
+        return {"path": path, "error": f"{type(ex).__name__}: {ex}"}
+
+
+# styles.xml sections counted by inspect_workbook: (section, item)
+_INSPECT_STYLE_SECTIONS = (
+    ("numFmts", "numFmt"),
+    ("fonts", "font"),
+    ("fills", "fill"),
+    ("borders", "border"),
+    ("cellStyleXfs", "xf"),
+    ("cellXfs", "xf"),
+    ("cellStyles", "cellStyle"),
+    ("dxfs", "dxf"),
+)
+
+
+@dataclass(frozen=True)
+class _SharedString:
+    """A sampled cell's shared strings index, resolved once all sheets are read."""
+
+    index: int
+
+
+def _date_styles(styles: str) -> set[int]:
+    """Ids of the cell formats whose number format shows a date or time."""
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+
+    formats = dict(BUILTIN_FORMATS)
+    for num_fmt in _style_items(styles, "numFmts", "numFmt"):
+        attrs = dict(re.findall(r'(\w+)="([^"]*)"', num_fmt))
+        formats[int(attrs["numFmtId"])] = xml_unescape(attrs.get("formatCode", ""), {"&quot;": '"'})
+    dates = set()
+    for idx, xf in enumerate(_style_items(styles, "cellXfs", "xf")):
+        num_fmt = re.search(r'\bnumFmtId="(\d+)"', xf)
+        if num_fmt and is_date_format(formats.get(int(num_fmt.group(1)), "")):
+            dates.add(idx)
+    return dates
+
+
+def _inspect_sheet(zf: Any, part: str, sample_rows: int, date_styles: set[int]) -> dict[str, Any]:
+    """Dimension, row/cell counts, tail elements and sample rows of a worksheet."""
+    from xml.etree import ElementTree
+
+    ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    parser = ElementTree.XMLPullParser(events=("end",)) if sample_rows > 0 else None
+    sample: list[list[Any]] = []
+    head = carry = b""
+    tail: list[bytes] | None = None
+    n_rows = n_cells = last_row = 0
+    with zf.open(part) as src:
+        for chunk in iter(functools.partial(src.read, 1 << 20), b""):
+            if tail is not None:
+                tail.append(chunk)
+                continue
+            if parser is not None:
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if elem.tag == f"{ns}row":
+                        sample.append(_sample_row(elem, ns, date_styles))
+                        elem.clear()
+                        if len(sample) == sample_rows:
+                            parser = None
+                            break
+            if head is not None:
+                head += chunk
+                if b"<sheetData" in head:
+                    head = head[:head.find(b"<sheetData")]
+                    dimension = re.search(rb'<dimension\b[^>]*\bref="([^"]*)"', head)
+                    head = None
+            window = carry + chunk
+            end = window.find(b"</sheetData>")
+            data = window if end < 0 else window[:end]
+            # Matches starting in the last 4 carried bytes end in this chunk, so were not counted yet
+            fresh = data[max(len(carry) - 4, 0):]
+            n_rows += fresh.count(b"<row ") + fresh.count(b"<row>")
+            n_cells += fresh.count(b"<c ") + fresh.count(b"<c>")
+            start = data.rfind(b"<row ")
+            row = re.match(rb'<row\b[^>]*?\br="(\d+)"', data[start:]) if start >= 0 else None
+            if row:
+                last_row = int(row.group(1))
+            if end >= 0:
+                tail = [window[end:]]
+            carry = window[-256:]
+    if head is not None:
+        dimension = re.search(rb'<dimension\b[^>]*\bref="([^"]*)"', head)
+    tail_xml = b"".join(tail or ())
+    return {
+        "dimension": dimension.group(1).decode() if dimension else None,
+        "rows": n_rows,
+        "last_row": last_row,
+        "cells": n_cells,
+        "tables": [_table_summary(zf.read(table).decode("utf-8")) for table in _sheet_tables(zf, part)],
+        "conditional_formats": tail_xml.count(b"<conditionalFormatting"),
+        "cf_rules": tail_xml.count(b"<cfRule"),
+        "merged_cells": tail_xml.count(b"<mergeCell "),
+        "charts": sum(1 for drawing in _related_parts(zf, part, "drawing")
+                      for _ in _related_parts(zf, drawing, "chart")),
+        "sample": sample,
+    }
+
+
+def _sample_row(row: Any, ns: str, date_styles: set[int]) -> list[Any]:
+    """Values of a <row> element by column, with shared strings left as _SharedString."""
+    values: list[Any] = []
+    for cell in row.iter(f"{ns}c"):
+        ref = re.match(r"[A-Z]+", cell.get("r", ""))
+        col = _column_index(ref.group(0)) if ref else len(values) + 1
+        values.extend([None] * (col - len(values)))
+        values[col - 1] = _sample_value(cell, ns, date_styles)
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+def _sample_value(cell: Any, ns: str, date_styles: set[int]) -> Any:
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{ns}t"))
+    raw = cell.findtext(f"{ns}v")
+    if raw is None:
+        return None
+    if kind == "s":
+        return _SharedString(int(raw))
+    if kind == "b":
+        return raw == "1"
+    if kind != "n":
+        return raw
+    number = float(raw)
+    if int(cell.get("s", 0)) in date_styles:
+        from openpyxl.utils.datetime import from_excel
+
+        return from_excel(number).isoformat()
+    return int(number) if number.is_integer() and abs(number) < 2 ** 53 else number
+
+
+def _column_index(letters: str) -> int:
+    """1-based index of a column letter ("A" -> 1), the inverse of _column_letter."""
+    idx = 0
+    for char in letters:
+        idx = idx * 26 + ord(char) - 64
+    return idx
+
+
+def _table_summary(table_xml: str) -> dict[str, Any]:
+    attrs = dict(re.findall(r'(\w+)="([^"]*)"', re.search(r"<table\b[^>]*>", table_xml).group(0)))
+    columns = re.search(r'<tableColumns\b[^>]*\bcount="(\d+)"', table_xml)
+    return {
+        "name": xml_unescape(attrs.get("displayName") or attrs.get("name", ""), {"&quot;": '"'}),
+        "ref": attrs.get("ref"),
+        "columns": int(columns.group(1)) if columns else None,
+        "style": (re.search(r'<tableStyleInfo\b[^>]*\bname="([^"]*)"', table_xml) or [None, None])[1],
+    }
+
+
+def _lookup_shared_strings(zf: Any, wanted: set[int]) -> tuple[int | None, dict[int, str]]:
+    """The shared strings table's uniqueCount and the wanted strings by index.
+
+    The table is parsed incrementally and only up to the highest wanted index.
+    """
+    from xml.etree import ElementTree
+
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return None, {}
+    ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    count: int | None = None
+    strings: dict[int, str] = {}
+    idx = 0
+    last = max(wanted, default=-1)
+    with zf.open("xl/sharedStrings.xml") as fh:
+        for event, elem in ElementTree.iterparse(fh, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{ns}sst":
+                    unique = elem.get("uniqueCount") or elem.get("count")
+                    count = int(unique) if unique else None
+                    if last < 0:
+                        break
+                continue
+            if elem.tag == f"{ns}si":
+                if idx in wanted:
+                    strings[idx] = "".join(t.text or "" for t in elem.iter(f"{ns}t"))
+                elem.clear()
+                idx += 1
+                if idx > last:
+                    break
+    return count, strings
+
+
+def overhaul_excel(
+    input_path: str | Path | bytes | BinaryIO | Workbook,
+    output_path: ExcelOutput,
+    brand: BrandLike,
+    mode: str = "normal",
+) -> Path | BinaryIO | bytes:
+    """Load an existing Excel file, apply branding, and save to output.
+
+    input_path may also be the workbook's bytes, a binary file object or an
+    openpyxl Workbook, which is re-branded in place (in either mode, as it
+    is already in memory). output_path is as for generate_excel.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.workbook import Workbook
+
+    brand = compile_brand(brand)
+    if mode not in ("normal", "stream"):
+        raise ValueError(f"Unknown mode: {mode!r} (expected 'normal' or 'stream')")
+    if isinstance(input_path, Workbook):
+        wb = input_path
+    elif mode == "stream":
+        return stream_overhaul_excel(input_path, output_path, brand)
+    else:
+        with _phase("load_workbook"):
+            wb = load_workbook(_workbook_source(input_path))
+
+    for sheet_name in wb.sheetnames:
+        apply_branding(wb[sheet_name], None, brand)
+        apply_conditional_formatting(wb[sheet_name], brand)
+
+    out = _open_output(output_path)
+    with _phase("save"):
+        wb.save(out)
+    return _output_result(output_path, out)
+
+
+def _workbook_source(source: str | Path | bytes | BinaryIO) -> Path | BinaryIO:
+    """A path or file object load_workbook can read; bytes are wrapped in a buffer."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source if hasattr(source, "read") else Path(source)
+
+
+def stream_overhaul_excel(
+    input_path: str | Path | bytes | BinaryIO,
+    output_path: ExcelOutput,
+    brand: BrandLike,
+) -> Path | BinaryIO | bytes:
+    """Re-brand an existing workbook sheet by sheet with bounded memory.
+
+    Each sheet is read with a read-only workbook and re-emitted through a
+    write-only one, styling cells as they pass. Values, number formats,
+    tables, sheet order and visibility are kept; other source formatting,
+    merged cells, images and charts are not carried over. The input and
+    output may be in memory, as for overhaul_excel.
+    """
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.cell import Cell
+    from openpyxl.cell.read_only import ReadOnlyCell
+    from openpyxl.styles.cell_style import StyleArray
+    from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+    from openpyxl.utils import get_column_letter
+    from openpyxl.utils.cell import range_boundaries
+
+    src = load_workbook(_workbook_source(input_path), read_only=True)
+    wb = Workbook(write_only=True)
+
+    opts = brand.get("excel", {})
+    alternating = opts.get("alternating_rows", False)
+    ids = compile_brand_styles(wb, brand)
+
+    header_st = StyleArray()
+    header_st.fontId = ids["header_font"]
+    header_st.fillId = ids["header_fill"]
+    header_st.alignmentId = ids["header_alignment"]
+    if opts.get("header_borders", False):
+        header_st.borderId = ids["header_border"]
+    body_st = StyleArray()
+    body_st.fontId = ids["body_font"]
+    alt_st = StyleArray(body_st)
+    if alternating:
+        alt_st.fillId = ids["alt_fill"]
+
+    # Source style id -> number format id in the output workbook
+    fmt_ids: dict[int, int] = {}
+
+    def number_format_id(ws_in: Any, style_id: int) -> int:
+        if style_id not in fmt_ids:
+            fmt = ReadOnlyCell(ws_in, 1, 1, None, style_id=style_id).number_format if style_id else "General"
+            if fmt in BUILTIN_FORMATS_REVERSE:
+                fmt_ids[style_id] = BUILTIN_FORMATS_REVERSE[fmt]
+            else:
+                fmt_ids[style_id] = wb._number_formats.add(fmt) + BUILTIN_FORMATS_MAX_SIZE
+        return fmt_ids[style_id]
+
+    for ws_in in src.worksheets:
+        ws = wb.create_sheet(ws_in.title)
+        ws.sheet_state = ws_in.sheet_state
+        ws.sheet_view.showGridLines = opts.get("show_gridlines", True)
+
+        # Values of the first 100 rows, for the column widths
+        sample: list[list[Any]] = []
+
+        def occupancy() -> Iterator[tuple[int, list[int]]]:
+            for r, cells in _iter_sparse_rows(ws_in):
+                cols = [c["column"] for c in cells if c["value"] is not None]
+                if r <= 100 and cols:
+                    values = [None] * cols[-1]
+                    for c in cells:
+                        if c["value"] is not None:
+                            values[c["column"] - 1] = c["value"]
+                    sample.append(values)
+                if cols:
+                    yield r, cols
+                if tables and r >= 100:
+                    return
+
+        tables = _read_tables(src, ws_in)
+        with _phase("scan", ws.title):
+            regions = _data_regions(occupancy())
+        # (min_col, min_row, max_col, max_row) of each block; first row is the header
+        blocks = [range_boundaries(tbl.ref) for tbl in tables] or regions
+
+        # Column widths have to be set before the first row is written
+        if blocks:
+            sample = [row[:max(b[2] for b in blocks)] for row in sample]
+        for idx, width in enumerate(_widths_from_rows(sample, brand), 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+
+        def source_rows() -> Iterator[tuple[int, list[dict[str, Any]]]]:
+            # Every row up to the last block's, including rows missing from the XML
+            r = 0
+            for r, cells in _iter_sparse_rows(ws_in):
+                yield r, cells
+            for r in range(r + 1, max([b[3] for b in blocks], default=0) + 1):
+                yield r, []
+
+        header_cells: list[list[Cell]] = [[] for _ in blocks]
+        phase = _phase("write_rows", ws.title).__enter__()
+        n_rows = n_cells = 0
+        for r, cells in source_rows():
+            spans = []
+            for i, (b_min_col, b_min_row, b_max_col, b_max_row) in enumerate(blocks):
+                if r == b_min_row:
+                    spans.append((b_min_col, b_max_col, header_st, i))
+                elif b_min_row < r <= b_max_row:
+                    st = alt_st if (r - b_min_row - 1) % 2 == 0 else body_st
+                    spans.append((b_min_col, b_max_col, st, None))
+
+            # Cells stored in the source, plus the empty cells of blocks that need styling
+            by_col = {c["column"]: c for c in cells}
+            width = max([cells[-1]["column"] if cells else 0] + [span[1] for span in spans])
+            values: list[Any] = []
+            for c in range(1, width + 1):
+                src_cell = by_col.get(c)
+                value = src_cell["value"] if src_cell else None
+                template = block_idx = None
+                for b_min_col, b_max_col, st, i in spans:
+                    if b_min_col <= c <= b_max_col:
+                        template, block_idx = st, i
+                        break
+                fmt_id = number_format_id(ws_in, src_cell["style_id"]) if src_cell else 0
+                if template is None and not fmt_id:
+                    values.append(value)
+                    continue
+                cell = Cell(ws, row=r, column=c, value=value)
+                cell._style = StyleArray(template if template is not None else StyleArray())
+                cell._style.numFmtId = fmt_id
+                if block_idx is not None:
+                    header_cells[block_idx].append(cell)
+                values.append(cell)
+            # Rows are positional in a write-only sheet; pad over rows missing from the source
+            while n_rows < r - 1:
+                ws.append([])
+                n_rows += 1
+            ws.append(values)
+            n_rows += 1
+            n_cells += width
+        phase.rows, phase.cells = n_rows, n_cells
+        phase.__exit__(None, None, None)
+
+        apply_conditional_formatting_regions(ws, brand, [(tuple(headers), b_min_row + 1, b_max_row)
+                                                         for (_, b_min_row, _, b_max_row), headers in zip(blocks, header_cells)])
+        with warnings.catch_warnings():
+            # Columns come from the source definition, so the write-only warning doesn't apply
+            warnings.simplefilter("ignore", UserWarning)
+            for tbl in tables:
+                ws.add_table(tbl)
+
+    src.close()
+    out = _open_output(output_path)
+    with _phase("save"):
+        wb.save(out)
+    return _output_result(output_path, out)
+
+
+def _read_tables(workbook: Any, worksheet: Any) -> list[Table]:
+    """Table definitions of a read-only worksheet, parsed from its package part."""
+    from openpyxl.packaging.relationship import get_dependents, get_rels_path
+    from openpyxl.worksheet.table import Table
+    from openpyxl.xml.functions import fromstring
+
+    archive = workbook._archive
+    rels_path = get_rels_path(worksheet._worksheet_path)
+    if rels_path not in archive.namelist():
+        return []
+    rels = get_dependents(archive, rels_path)
+    return [Table.from_tree(fromstring(archive.read(rel.target))) for rel in rels.find(Table._rel_type)]
+
+
+def _iter_sparse_rows(worksheet: Any) -> Iterator[tuple[int, list[dict[str, Any]]]]:
+    """(row number, cells) of a read-only worksheet, as stored in its XML.
+
+    Unlike iter_rows, missing rows and cells are not padded out to the
+    sheet's dimension, so the cost follows the populated cells rather than
+    the bounding box. Each cell is the parser's dict of row, column, value,
+    data_type and style_id.
+    """
+    from openpyxl.worksheet._reader import WorkSheetParser
+
+    wb = worksheet.parent
+    with worksheet._get_source() as src:
+        parser = WorkSheetParser(src, worksheet._shared_strings, data_only=wb.data_only, epoch=wb.epoch,
+                                 date_formats=wb._date_formats, timedelta_formats=wb._timedelta_formats)
+        yield from parser.parse()
+
+
+def _worksheet_occupancy(worksheet: Any) -> Iterator[tuple[int, list[int]]]:
+    """Sparse occupancy index of a loaded worksheet: (row, columns holding a value) in order."""
+    rows: dict[int, list[int]] = {}
+    for (r, c), cell in worksheet._cells.items():
+        if cell.value is not None:
+            rows.setdefault(r, []).append(c)
+    for r in sorted(rows):
+        yield r, sorted(rows[r])
+
+
+def _data_regions(occupied: Iterable[tuple[int, list[int]]]) -> list[tuple[int, int, int, int]]:
+    """Find the separate rectangular data islands of a sheet.
+
+    occupied yields (row, sorted columns holding a value) in row order,
+    skipping empty rows, and is consumed in one pass. Occupied cells that
+    touch, diagonally included, belong to the same island, so blank rows and
+    columns separate islands. Islands whose bounding boxes overlap are
+    merged, and single cells (titles, notes, stray values) are dropped.
+    Returns (min_col, min_row, max_col, max_row) per island, top to bottom.
+    """
+    boxes: list[list[int]] = []  # [min_col, min_row, max_col, max_row] per island
+    parent: list[int] = []
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    prev_row = None
+    prev_runs: list[tuple[int, int, int]] = []  # (first col, last col, island) of the previous row
+    for r, cols in occupied:
+        runs = []
+        start = prev = cols[0]
+        for c in cols[1:]:
+            if c != prev + 1:
+                runs.append((start, prev))
+                start = c
+            prev = c
+        runs.append((start, prev))
+
+        if prev_row != r - 1:
+            prev_runs = []
+        row_runs = []
+        j = 0
+        for start, end in runs:
+            island = None
+            # Previous-row runs are sorted too; skip those entirely to the left
+            while j < len(prev_runs) and prev_runs[j][1] < start - 1:
+                j += 1
+            k = j
+            while k < len(prev_runs) and prev_runs[k][0] <= end + 1:
+                other = find(prev_runs[k][2])
+                if island is None:
+                    island = other
+                elif other != island:
+                    parent[other] = island
+                    a, b = boxes[island], boxes[other]
+                    boxes[island] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                k += 1
+            if island is None:
+                island = len(boxes)
+                boxes.append([start, r, end, r])
+                parent.append(island)
+            else:
+                box = boxes[island]
+                box[0], box[2], box[3] = min(box[0], start), max(box[2], end), r
+            row_runs.append((start, end, island))
+        prev_row, prev_runs = r, row_runs
+
+    # A single cell can only overlap an island by lying inside it, so drop those first
+    regions = [box for i, box in enumerate(boxes) if parent[i] == i and (box[0] != box[2] or box[1] != box[3])]
+    # Merge islands whose rectangles overlap until none do
+    merged = True
+    while merged:
+        merged = False
+        for i, a in enumerate(regions):
+            for b in regions[i + 1:]:
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    a[:] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    regions.remove(b)
+                    merged = True
+                    break
+            if merged:
+                break
+    return sorted((tuple(box) for box in regions), key=lambda b: (b[1], b[0]))
+
+
+def _widths_from_rows(rows: Iterable[tuple], brand: BrandLike) -> list[float]:
+    """Column widths from sampled row values of an existing sheet."""
+    with _phase("autosize"):
+        factor = _font_width_factor(brand.get("fonts", {}).get("body"))
+        lengths: list[int] = []
+        for row in rows:
+            if len(row) > len(lengths):
+                lengths.extend([0] * (len(row) - len(lengths)))
+            for idx, v in enumerate(row):
+                if v:
+                    lengths[idx] = max(lengths[idx], len(str(v)))
+        return [min((length + 2) * factor, 50) for length in lengths]
+
+
+def compile_brand_styles(workbook: Any, brand: BrandLike) -> dict[str, int]:
+    """Register the brand's fonts, fills, alignment and border in the workbook's style tables.
+
+    Returns the style-table ids keyed by role. Assigning these ids to a cell's
+    style array is equivalent to setting ``cell.font`` etc., but skips building
+    and hashing a new style object for every cell. The tables deduplicate, so
+    compiling the same brand again for another sheet yields the same ids.
+    """
+    cb = compile_brand(brand)
+    return {
+        "header_font": workbook._fonts.add(cb.header_font),
+        "header_fill": workbook._fills.add(cb.header_fill),
+        "header_alignment": workbook._alignments.add(cb.header_alignment),
+        "header_border": workbook._borders.add(cb.header_border),
+        "body_font": workbook._fonts.add(cb.body_font),
+        "alt_fill": workbook._fills.add(cb.alt_fill),
+    }
 
 
-def overhaul_excel(input_path: Path, output_path: Path, brand: dict[str, Any]) -> Path:
-    """Load an existing Excel file, apply branding, and save to output."""
-    wb = load_workbook(input_path)
-    
-    for sheet_name in wb.sheetnames:
-        apply_branding(wb[sheet_name], None, brand)
-        apply_conditional_formatting(wb[sheet_name], brand)
-    
-    out = Path(output_path)
-    out.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(out)
-    return out
+def _style_array(cell: Any) -> StyleArray:
+    """Return the cell's style array, creating it for cells that were never styled."""
+    st = cell._style
+    if st is None:
+        st = cell._style = _cell_style.StyleArray()
+    return st
 
 
-def apply_branding(worksheet: Any, df: pd.DataFrame | None, brand: dict[str, Any]) -> None:
+def apply_branding(worksheet: Any, df: pd.DataFrame | None, brand: BrandLike) -> None:
     """Apply styles from brand dict to the openpyxl worksheet."""
+    from openpyxl.utils import get_column_letter
+
+    with _phase("apply_branding", worksheet.title) as ph:
+        # Extract brand options (Assumes v2 normalized structure from load_brand)
+        opts = brand.get("excel", {})
     
-    # Extract brand styles (Assumes v2 normalized structure from load_brand)
-    fonts = brand.get("fonts", {})
-    colors = brand.get("colors", {})
-    opts = brand.get("excel", {})
-    
-    font_heading = fonts.get("heading", "Arial")
-    font_body = fonts.get("body", "Arial")
-    
-    # Colors (strip hashes)
-    c_primary = colors.get("primary", "ffffff").replace("#", "")
-    c_header_text = colors.get("header_text", "000000").replace("#", "")
-    c_borders = colors.get("borders", "b0aea5").replace("#", "")
-    
-    # Options
-    show_gridlines = opts.get("show_gridlines", True)
-    use_borders = opts.get("header_borders", False)
-    alternating = opts.get("alternating_rows", False)
+        # Options
+        show_gridlines = opts.get("show_gridlines", True)
+        use_borders = opts.get("header_borders", False)
+        alternating = opts.get("alternating_rows", False)
 
-    # 0. Sheet Options
-    worksheet.sheet_view.showGridLines = show_gridlines
+        # 0. Sheet Options
+        worksheet.sheet_view.showGridLines = show_gridlines
 
-    # Defines styles
-    header_font = Font(name=font_heading, bold=True, color=c_header_text)
-    header_fill = PatternFill(start_color=c_primary, end_color=c_primary, fill_type="solid")
-    body_font = Font(name=font_body)
-    thin_border = Side(border_style="thin", color=c_borders)
-    bottom_border = Border(bottom=thin_border) if use_borders else Border()
+        # Styles are interned once; cells then only receive their style-table ids
+        ids = compile_brand_styles(worksheet.parent, brand)
 
-    # Determine areas to style
-    style_ranges = []
+        # Determine areas to style
+        style_ranges = []
     
-    # Logic A: If Excel Tables exist, style them specifically
-    if hasattr(worksheet, "tables") and worksheet.tables:
-        for tbl in worksheet.tables.values():
-            # Table range is a string like "A1:C4"
-            style_ranges.append(worksheet[tbl.ref])
+        # Logic A: If Excel Tables exist, style them specifically
+        if hasattr(worksheet, "tables") and worksheet.tables:
+            for tbl in worksheet.tables.values():
+                # Table range is a string like "A1:C4"
+                style_ranges.append(worksheet[tbl.ref])
     
-    # Logic B: If no tables, try to detect data block
-    if not style_ranges:
-        # If df is provided (new generation), assumes starts at A1
-        if df is not None:
-             # Basic A1 start
-             min_row, min_col = 1, 1
-             max_row, max_col = len(df) + 1, len(df.columns)
-             style_ranges.append(worksheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col))
-        else:
-             # Heuristic for existing sheet: use used range
-             # But check if used range is non-empty
-             if worksheet.max_row >= 1 and worksheet.max_column >= 1:
-                 style_ranges.append(worksheet.iter_rows(min_row=worksheet.min_row, max_row=worksheet.max_row, min_col=worksheet.min_column, max_col=worksheet.max_column))
-
-    # Apply styles to identified ranges
-    for row_block in style_ranges:
-        # Convert row_block to list of rows if it's not already (iter_rows returns generator)
-        rows = list(row_block)
-        if not rows:
-            continue
+        # Logic B: If no tables, try to detect data block
+        if not style_ranges:
+            # If df is provided (new generation), assumes starts at A1
+            if df is not None:
+                 # Basic A1 start
+                 min_row, min_col = 1, 1
+                 max_row, max_col = len(df) + 1, len(df.columns)
+                 style_ranges.append(worksheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col))
+            else:
+                 # Existing sheet: style each data island, found from its populated cells
+                 for min_col, min_row, max_col, max_row in _data_regions(_worksheet_occupancy(worksheet)):
+                     style_ranges.append(worksheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col))
+
+        # Static rule styling bakes the rule styles into a new sheet's cells
+        static = None
+        if df is not None and not getattr(worksheet, "tables", None):
+            static = _static_rules(brand, [str(c) for c in df.columns], ranked=True)
+
+        # Apply styles to identified ranges
+        cf_regions = []
+        max_col = 0
+        for row_block in style_ranges:
+            # Convert row_block to list of rows if it's not already (iter_rows returns generator)
+            rows = list(row_block)
+            if not rows:
+                continue
+            ph.rows = (ph.rows or 0) + len(rows)
+            ph.cells = (ph.cells or 0) + len(rows) * len(rows[0])
             
-        # Treat first row of the block as header
-        header_row = rows[0]
-        for cell in header_row:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="left", vertical="center")
-            if use_borders:
-                cell.border = bottom_border
+            # Treat first row of the block as header
+            header_row = rows[0]
+            max_col = max(max_col, header_row[-1].column)
+            for cell in header_row:
+                st = _style_array(cell)
+                st.fontId = ids["header_font"]
+                st.fillId = ids["header_fill"]
+                st.alignmentId = ids["header_alignment"]
+                if use_borders:
+                    st.borderId = ids["header_border"]
         
-        # Body rows
-        for i, row in enumerate(rows[1:]):
-            for cell in row:
-                cell.font = body_font
-                
+            # Body rows
+            body_font_id = ids["body_font"]
+            alt_fill_id = ids["alt_fill"]
+            for i, row in enumerate(rows[1:]):
                 # Alternating Rows
                 if alternating and i % 2 == 0:
-                     cell.fill = PatternFill(start_color="f9f9f9", end_color="f9f9f9", fill_type="solid")
-
-        # Apply Conditional Formatting to this block
-        # Determine bounds
-        start_row_idx = header_row[0].row + 1 # Start data after header
-        end_row_idx = rows[-1][0].row
-        apply_conditional_formatting_region(worksheet, brand, header_row, start_row_idx, end_row_idx)
-
-    # 3. Auto-size columns (global for sheet)
-    for column in worksheet.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        
-        # Sample checking
-        try:
-             for cell in column[:100]:
-                 if cell.value:
-                     max_length = max(max_length, len(str(cell.value)))
-        except:
-            pass
-            
-        adjusted_width = (max_length + 2) * 1.1
-        worksheet.column_dimensions[column_letter].width = min(adjusted_width, 50)
+                    for cell in row:
+                        st = _style_array(cell)
+                        st.fontId = body_font_id
+                        st.fillId = alt_fill_id
+                else:
+                    for cell in row:
+                        _style_array(cell).fontId = body_font_id
+
+            if static:
+                import numpy as np
+
+                rule_ids = _static_style_ids(worksheet.parent, brand, static.rules)
+                for col, code in static.codes(df):
+                    for r in np.flatnonzero(code >= 0).tolist():
+                        st = _style_array(rows[r + 1][col])
+                        font_id, fill_id = rule_ids[code[r]]
+                        if font_id is not None:
+                            st.fontId = font_id
+                        if fill_id is not None:
+                            st.fillId = fill_id
+
+            # Conditional formatting for this block, applied for all blocks at once below
+            # Determine bounds
+            start_row_idx = header_row[0].row + 1 # Start data after header
+            end_row_idx = rows[-1][0].row
+            cf_regions.append((header_row, start_row_idx, end_row_idx))
+        apply_conditional_formatting_regions(worksheet, brand, cf_regions, rules=static.live if static else None)
+
+        # 3. Auto-size columns (global for sheet)
+        if df is not None:
+            # Vectorized over the DataFrame instead of walking cell objects
+            for idx, width in enumerate(compute_column_widths(df, **_autosize_options(brand)), 1):
+                worksheet.column_dimensions[get_column_letter(idx)].width = width
+            return
+
+        # Existing sheet: sample the first 100 rows; without tables, only up to the last island
+        if worksheet.tables or not max_col:
+            max_col = worksheet.max_column
+        sample = worksheet.iter_rows(min_row=1, max_row=min(worksheet.max_row, 100), min_col=1, max_col=max_col,
+                                     values_only=True)
+        for idx, width in enumerate(_widths_from_rows(sample, brand), 1):
+            worksheet.column_dimensions[get_column_letter(idx)].width = width
 
 
-def apply_conditional_formatting(worksheet: Any, brand: dict[str, Any]) -> None:
+def apply_conditional_formatting(worksheet: Any, brand: BrandLike) -> None:
     """Legacy wrapper for backward compatibility or global usage."""
     # This assumes Row 1 headers if called directly.
     # In the new flow, apply_branding handles it.
     pass
 
 
-def apply_conditional_formatting_region(worksheet: Any, brand: dict[str, Any], header_row: tuple, start_row: int, end_row: int) -> None:
+def apply_conditional_formatting_region(
+    worksheet: Any,
+    brand: BrandLike,
+    header_row: tuple,
+    start_row: int,
+    end_row: int,
+    rules: list[CompiledRule] | None = None,
+) -> None:
     """Apply rule-based conditional formatting to a specific region."""
-    analytics = brand.get("analytics", {})
-    rules = analytics.get("rules", [])
-    
-    if not rules:
-        return
+    apply_conditional_formatting_regions(worksheet, brand, [(header_row, start_row, end_row)], rules=rules)
+
+
+def apply_conditional_formatting_regions(
+    worksheet: Any,
+    brand: BrandLike,
+    regions: list[tuple[tuple, int, int]],
+    rules: list[CompiledRule] | None = None,
+) -> None:
+    """Apply rule-based conditional formatting to every region of a sheet at once.
+
+    regions are (header row cells, first data row, last data row). The
+    ranges are consolidated by _plan_conditional_formats, so a rule adds
+    one multi-range block per sheet rather than one per column and region.
+    rules defaults to all of the brand's rules; static rule styling passes
+    only the rules left live.
+    """
+    from openpyxl.utils import get_column_letter
+
+    rows = sum(max(end - start + 1, 0) for _, start, end in regions)
+    with _phase("conditional_formatting", worksheet.title, rows=rows):
+        if rules is None:
+            rules = compile_brand(brand).rules
+        if not rules:
+            return
 
-    # Map column names to letters WITHIN this region
-    headers = {}
-    for cell in header_row:
-        if cell.value:
-            headers[str(cell.value)] = cell.column_letter
+        # Map column names to column numbers WITHIN each region
+        plan = _plan_conditional_formats(rules, [
+            ({cell.column: str(cell.value) for cell in header_row if cell.value}, start, end)
+            for header_row, start, end in regions
+        ])
+        for rule, boxes in plan:
+            sqref = " ".join(f"{get_column_letter(c1)}{r1}:{get_column_letter(c2)}{r2}" for r1, c1, r2, c2 in boxes)
+            worksheet.conditional_formatting.add(sqref, rule.openpyxl_rule())
 
+
+def _plan_conditional_formats(
+    rules: list[CompiledRule],
+    regions: list[tuple[dict[int, str], int, int]],
+) -> list[tuple[CompiledRule, list[tuple[int, int, int, int]]]]:
+    """Group the cells each analytics rule formats into as few rectangles as possible.
+
+    regions are (header name by column number, first data row, last data
+    row), 1-based. Value rules with the same signature share one entry
+    covering the matching columns of every region, with adjacent columns
+    merged into one rectangle. Ranked rules (top/bottom, colour scales)
+    compare each cell with the rest of its range, so they keep one entry
+    per column and region. Returns (rule, [(min_row, min_col, max_row,
+    max_col), ...]) in rule order.
+    """
+    plan: list[tuple[CompiledRule, list[tuple[int, int, int, int]]]] = []
+    shared: dict[tuple, int] = {}
     for rule in rules:
-        pattern = rule.get("column_pattern")
-        condition = rule.get("condition")
-        val = rule.get("value")
-        style = rule.get("style", {})
-        
-        if not pattern or not condition:
-            continue
-            
-        # Create DXF Style
-        dxf_font = None
-        dxf_fill = None
-        
-        if "font_color" in style:
-            # openpyxl Colors
-            dxf_font = Font(color=Color(rgb="FF" + style["font_color"].replace("#", "")))
-        
-        if "bg_color" in style:
-            dxf_fill = PatternFill(start_color=Color(rgb="FF" + style["bg_color"].replace("#", "")), 
-                                   end_color=Color(rgb="FF" + style["bg_color"].replace("#", "")),
-                                   fill_type="solid")
-            
-        dxf = DifferentialStyle(font=dxf_font, fill=dxf_fill)
-
-        # Find matching columns
-        regex = re.compile(pattern, re.IGNORECASE)
-        for col_name, col_letter in headers.items():
-            if regex.search(col_name):
-                # Apply rule to the column within bounds
-                cell_range = f"{col_letter}{start_row}:{col_letter}{end_row}"
-                
-                # Construct OpenPyXL Rule
-                op = condition if condition in ["lessThan", "greaterThan", "equal"] else "lessThan"
-                
-                formatting_rule = CellIsRule(operator=op, formula=[val], stopIfTrue=True)
-                formatting_rule.dxf = dxf
-                worksheet.conditional_formatting.add(cell_range, formatting_rule)
+        for names, first_row, last_row in regions:
+            if last_row < first_row:
+                continue
+            cols = sorted(col for col, name in names.items() if rule.regex.search(name))
+            if not cols:
+                continue
+            if rule.ranked:
+                plan.extend((rule, [(first_row, col, last_row, col)]) for col in cols)
+                continue
+            if rule.signature not in shared:
+                shared[rule.signature] = len(plan)
+                plan.append((rule, []))
+            boxes = plan[shared[rule.signature]][1]
+            run_start = prev = cols[0]
+            for col in cols[1:]:
+                if col != prev + 1:
+                    boxes.append((first_row, run_start, last_row, prev))
+                    run_start = col
+                prev = col
+            boxes.append((first_row, run_start, last_row, prev))
+    return plan
+
+
+def _rule_styling(brand: BrandLike | None) -> str:
+    """The brand's excel "rule_styling" option: "live" (conditional formats) or "static"."""
+    styling = brand.get("excel", {}).get("rule_styling", "live") if brand else "live"
+    if styling not in ("live", "static"):
+        raise ValueError(f"rule_styling must be 'live' or 'static', got {styling!r}")
+    return styling
+
+
+def _with_static_rules(brand: BrandLike | None) -> CompiledBrand | None:
+    """brand with its rule_styling option set to "static" (the --static-rules flag)."""
+    cb = compile_brand(brand)
+    if cb is None or _rule_styling(cb) == "static":
+        return cb
+    return compile_brand({**cb.data, "excel": {**cb.get("excel", {}), "rule_styling": "static"}})
+
+
+class _StaticRules:
+    """Analytics rules evaluated once in Python, for styles baked into the cells.
+
+    Used when the brand's rule_styling is "static". Value rules with literal
+    operands are evaluated per matching column with vectorized comparisons
+    that follow Excel's (blanks compare as 0 or "", numbers sort before
+    text, text compares case-insensitively). top/bottom rules are only
+    evaluated when ranked is True, i.e. when every row of the column is seen
+    at once and lands on one sheet. The remaining rules (colour scales,
+    formula operands, ranked rules over streamed batches) stay conditional
+    formats and are listed in live.
+    """
+
+    def __init__(self, rules: list[CompiledRule], columns: list[str], ranked: bool) -> None:
+        self.rules = [r for r in rules if _is_static_rule(r, ranked)]
+        self.live = [r for r in rules if not _is_static_rule(r, ranked)]
+        # (column index, indices into self.rules of the rules matching it, in priority order)
+        self.targets = [(idx, matched) for idx, name in enumerate(columns)
+                        if (matched := [i for i, r in enumerate(self.rules) if r.regex.search(name)])]
 
+    def codes(self, frame: pd.DataFrame) -> list[tuple[int, Any]]:
+        """(column index, int16 array of the matching rule per row or -1) for each targeted column.
 
-def generate_insights(workbook: Any, df: pd.DataFrame, brand: dict[str, Any]) -> None:
-    """Auto-generate a chart on a new 'Insights' sheet."""
-    # 1. Heuristics to identify Data
+        frame's columns are positionally aligned with the columns given to
+        the constructor. Like the stopIfTrue conditional formats, the first
+        matching rule wins.
+        """
+        import numpy as np
+
+        out = []
+        for col, matched in self.targets:
+            cells = _excel_values(frame.iloc[:, col])
+            code = np.full(len(frame), -1, dtype=np.int16)
+            for i in reversed(matched):
+                code[_static_rule_mask(self.rules[i], cells)] = i
+            out.append((col, code))
+        return out
+
+    def hits(self, frame: pd.DataFrame) -> dict[int, list[tuple[int, int]]]:
+        """Row position -> [(column index, rule index), ...] for the rows of frame with a match."""
+        import numpy as np
+
+        hits: dict[int, list[tuple[int, int]]] = {}
+        for col, code in self.codes(frame):
+            for row in np.flatnonzero(code >= 0).tolist():
+                hits.setdefault(row, []).append((col, int(code[row])))
+        return hits
+
+
+def _static_rules(brand: BrandLike | None, columns: list[str], ranked: bool) -> _StaticRules | None:
+    """The _StaticRules for columns when the brand asks for static rule styling, else None."""
+    if not brand or _rule_styling(brand) != "static":
+        return None
+    static = _StaticRules(compile_brand(brand).rules, columns, ranked)
+    return static if static.targets else None
+
+
+def _is_static_rule(rule: CompiledRule, ranked: bool) -> bool:
+    if rule.operator in ("top", "bottom"):
+        return ranked
+    if rule.operator == "colorScale":
+        return False
+    values = rule.value if rule.operator in ("between", "notBetween") else [rule.value]
+    return all(_static_operand(v) is not None for v in values)
+
+
+def _static_operand(value: Any) -> tuple[int, Any] | None:
+    """(type rank, comparable value) of a rule operand, ranked as Excel orders
+    cell types: numbers < text < booleans. None for "=..." formulas, which only
+    Excel can evaluate."""
+    if isinstance(value, bool):
+        return 2, float(value)
+    if isinstance(value, (int, float)):
+        return 0, float(value)
+    text = str(value)
+    if text.startswith("="):
+        return None
+    try:
+        return 0, float(text)
+    except ValueError:
+        return 1, text.lower()
+
+
+def _excel_serial(value: Any) -> float:
+    """A date, datetime or time as an Excel serial number."""
+    if isinstance(value, datetime.datetime):
+        return (value.replace(tzinfo=None) - datetime.datetime(1899, 12, 30)).total_seconds() / 86400
+    if isinstance(value, datetime.date):
+        return float((value - datetime.date(1899, 12, 30)).days)
+    return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+
+
+def _excel_values(values: pd.Series) -> tuple[Any, Any, Any]:
+    """Classify a column's cells the way Excel compares them.
+
+    Returns (kinds, numbers, texts) arrays: kinds is -1 for blanks, else the
+    type rank of _static_operand; numbers holds numbers, dates as serials and
+    booleans as 0/1; texts holds lower-cased text ("" elsewhere).
+    """
+    import numpy as np
+
+    n = len(values)
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+        dtype = values.dtype
+    blank = values.isna().to_numpy()
+    texts = np.full(n, "", dtype=object)
+
+    if pd.api.types.is_bool_dtype(dtype):
+        kinds = np.where(blank, -1, 2).astype(np.int8)
+        nums = values.to_numpy(dtype=float, na_value=np.nan)
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(values.dt, "tz", None) is not None:
+            values = values.dt.tz_localize(None)
+        kinds = np.where(blank, -1, 0).astype(np.int8)
+        nums = ((values - pd.Timestamp("1899-12-30")) / pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+    elif pd.api.types.is_numeric_dtype(dtype):
+        kinds = np.where(blank, -1, 0).astype(np.int8)
+        nums = values.to_numpy(dtype=float, na_value=np.nan)
+    elif pd.api.types.is_string_dtype(dtype) and not pd.api.types.is_object_dtype(dtype):
+        kinds = np.where(blank, -1, 1).astype(np.int8)
+        texts[~blank] = values[~blank].str.lower().to_numpy(dtype=object)
+        nums = np.full(n, np.nan)
+    else:
+        # Mixed object column: classify each present value
+        kinds = np.full(n, -1, dtype=np.int8)
+        nums = np.full(n, np.nan)
+        for idx, v in zip(np.flatnonzero(~blank).tolist(), values.to_numpy(dtype=object)[~blank]):
+            if isinstance(v, (bool, np.bool_)):
+                kinds[idx], nums[idx] = 2, float(v)
+            elif isinstance(v, numbers.Number):
+                kinds[idx], nums[idx] = 0, float(v)
+            elif isinstance(v, (datetime.date, datetime.time)):
+                kinds[idx], nums[idx] = 0, _excel_serial(v)
+            else:
+                kinds[idx], texts[idx] = 1, str(v).lower()
+    return kinds, nums, texts
+
+
+def _excel_compare(cells: tuple[Any, Any, Any], operand: tuple[int, Any]) -> Any:
+    """-1/0/1 per cell for cell <, = or > operand, by Excel's comparison rules."""
+    import numpy as np
+
+    kinds, numbers, texts = cells
+    rank, value = operand
+    # Blank cells compare as the operand type's empty value: 0, "" or FALSE
+    kinds = np.where(kinds < 0, rank, kinds)
+    sign = np.sign(kinds.astype(np.int8) - rank).astype(np.int8)
+    same = kinds == rank
+    if rank == 1:
+        own = texts[same]
+        sign[same] = (own > value).astype(np.int8) - (own < value).astype(np.int8)
+    else:
+        own = np.nan_to_num(numbers[same], nan=0.0)
+        sign[same] = np.sign(own - value).astype(np.int8)
+    return sign
+
+
+def _static_rule_mask(rule: CompiledRule, cells: tuple[Any, Any, Any]) -> Any:
+    """Boolean array of the cells rule formats (see _StaticRules)."""
+    import numpy as np
+
+    kinds, numbers, _ = cells
+    if rule.operator in ("top", "bottom"):
+        # Ranked over the numeric cells only; ties with the Nth value are included
+        present = kinds == 0
+        ranked = numbers[present]
+        if not len(ranked):
+            return present
+        n = int(rule.value)
+        n = min(max(len(ranked) * n // 100, 1) if rule.percent else n, len(ranked))
+        if rule.operator == "top":
+            return present & (numbers >= np.partition(ranked, len(ranked) - n)[len(ranked) - n])
+        return present & (numbers <= np.partition(ranked, n - 1)[n - 1])
+
+    if rule.operator in ("between", "notBetween"):
+        low, high = (_excel_compare(cells, _static_operand(v)) for v in rule.value)
+        inside = (low >= 0) & (high <= 0)
+        return inside if rule.operator == "between" else ~inside
+    sign = _excel_compare(cells, _static_operand(rule.value))
+    return {
+        "lessThan": sign < 0,
+        "lessThanOrEqual": sign <= 0,
+        "greaterThan": sign > 0,
+        "greaterThanOrEqual": sign >= 0,
+        "equal": sign == 0,
+        "notEqual": sign != 0,
+    }[rule.operator]
+
+
+def _static_style_ids(workbook: Any, brand: BrandLike, rules: list[CompiledRule]) -> list[tuple[int | None, int | None]]:
+    """(font id, fill id) of each rule's style in an openpyxl workbook; None keeps the cell's own."""
+    from openpyxl.styles import Color, Font, PatternFill
+
+    body = compile_brand(brand).body_font
+    ids = []
+    for rule in rules:
+        font_id = fill_id = None
+        if "font_color" in rule.xlsx_format:
+            font = Font(name=body.name, color=Color(rgb="FF" + rule.xlsx_format["font_color"][1:]))
+            font_id = workbook._fonts.add(font)
+        if "bg_color" in rule.xlsx_format:
+            color = Color(rgb="FF" + rule.xlsx_format["bg_color"][1:])
+            fill_id = workbook._fills.add(PatternFill(start_color=color, end_color=color, fill_type="solid"))
+        ids.append((font_id, fill_id))
+    return ids
+
+
+def _pick_chart_columns(df: pd.DataFrame) -> tuple[Any, list[Any]]:
+    """Choose the X column and numeric Y columns for the Insights chart.
+
+    Returns (None, []) when the data cannot be charted.
+    """
+    return _choose_chart_columns(list(df.columns), [_dtype_kind(dtype) for dtype in df.dtypes])
+
+
+def _dtype_kind(dtype: Any) -> str:
+    """Collapse a pandas dtype to the kinds used by the chart heuristics."""
+    types = pd.api.types
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _dtype_kind(dtype.categories.dtype)
+    if types.is_bool_dtype(dtype):
+        return "bool"
+    if types.is_numeric_dtype(dtype):
+        return "number"
+    if types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    if dtype == object or types.is_string_dtype(dtype):
+        return "text"
+    return "other"
+
+
+def _choose_chart_columns(columns: list[Any], kinds: list[str]) -> tuple[Any, list[Any]]:
+    """Chart heuristics over column names and kinds, shared by the pandas and records paths."""
     # Identify X-Axis: First text/date column or "ID" column
     x_col = None
-    y_cols = []
     
     # Try to find an explicit "X" candidate
-    for col in df.columns:
+    for col in columns:
         col_lower = str(col).lower()
         if "date" in col_lower or "time" in col_lower or "id" in col_lower or "batch" in col_lower:
             x_col = col
@@ -301,130 +4275,860 @@ def generate_insights(workbook: Any, df: pd.DataFrame, brand: dict[str, Any]) ->
     
     # If no obvious candidate, pick first object/string column
     if not x_col:
-        for col in df.columns:
-            if df[col].dtype == 'object':
+        for col, kind in zip(columns, kinds):
+            if kind == "text":
                 x_col = col
                 break
                 
     # Y-Axes: All numeric columns (excluding X)
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    numeric_cols = [col for col, kind in zip(columns, kinds) if kind == "number"]
     if x_col and x_col in numeric_cols:
         numeric_cols.remove(x_col)
     
-    y_cols = numeric_cols
-    
-    if not x_col or not y_cols:
-         # Cannot chart
-         return
+    if not x_col or not numeric_cols:
+        return None, []
+    return x_col, numeric_cols
+
+
+def _is_time_axis(x_col: Any) -> bool:
+    """Date/time-like X columns get a line chart, everything else a bar chart."""
+    return "date" in str(x_col).lower() or "time" in str(x_col).lower()
+
+
+def generate_insights(
+    workbook: Any,
+    df: pd.DataFrame,
+    brand: BrandLike,
+    n_rows: int | None = None,
+    data_sheet: Any = None,
+    chart_columns: tuple[Any, list[Any]] | None = None,
+) -> None:
+    """Auto-generate a chart on a new 'Insights' sheet.
+
+    n_rows overrides len(df) when df is only a sample (e.g. the first batch
+    of a streamed write) of the rows on the data sheet. data_sheet is the
+    worksheet holding df with its header in row 1 (default: the first
+    sheet), and chart_columns the (X, Y columns) to chart instead of the
+    ones picked from df.
+
+    When df holds more rows than the brand's insights_max_points, it is
+    grouped by the X column (sum or mean per the brand's
+    insights_aggregate) and reduced to that many points on a new
+    INSIGHTS_DATA_SHEET, which the chart plots instead of the data sheet.
+    """
+    from openpyxl.chart import BarChart, LineChart, Reference, Series
+
+    with _phase("insights") as ph:
+        if n_rows is None:
+            n_rows = len(df)
+        ph.rows = n_rows
+        # 1. Heuristics to identify Data
+        x_col, y_cols = chart_columns or _pick_chart_columns(df)
+        if not x_col:
+             # Cannot chart
+             return
+
+        max_points, how, hidden = _insights_options(brand)
+        if data_sheet is None and max_points and n_rows == len(df) and n_rows > max_points:
+            # Plot a bounded aggregate rather than pointing the chart at every row
+            y_cols = y_cols[:3]
+            table_columns = [str(c) for c in (x_col, *y_cols)]
+            rows = _aggregate_frame(df, x_col, y_cols, how, max_points)
+            data_sheet = _add_insights_data(workbook, table_columns, rows, hidden)
+            df = pd.DataFrame(rows, columns=table_columns)
+            x_col, y_cols = table_columns[0], table_columns[1:]
+            n_rows = len(rows)
          
-    # 2. Determine Chart Type
-    # If X is Date-like -> LineChart
-    # If X is Categorical -> BarChart
-    # For now, default to BarChart unless "date"/ "time" in name
-    chart_type = BarChart
-    if "date" in str(x_col).lower() or "time" in str(x_col).lower():
-        chart_type = LineChart
+        # 2. Determine Chart Type
+        chart_type = LineChart if _is_time_axis(x_col) else BarChart
         
-    chart = chart_type()
-    chart.title = f"{' & '.join(y_cols[:2])} by {x_col}"
-    chart.style = 10  # A nice default style
-    chart.height = 10
-    chart.width = 20
+        chart = chart_type()
+        chart.title = f"{' & '.join(y_cols[:2])} by {x_col}"
+        chart.style = 10  # A nice default style
+        chart.height = 10
+        chart.width = 20
     
-    # 3. Define References
-    # We need to know which sheet the data is on. Assumes first sheet 'Sheet1' or we find it.
-    # In generate_excel context, we know the data sheet name but here we just grab the active one or pass it?
-    # We'll assume the FIRST sheet has the data for now.
-    data_sheet = workbook.worksheets[0]
+        # 3. Define References
+        # The data is on the FIRST sheet unless the caller says otherwise
+        # (partitioned writes chart their totals sheet).
+        if data_sheet is None:
+            data_sheet = workbook.worksheets[0]
     
-    # Find column indices (1-based)
-    header_row = 1
-    # Locate X col index
-    x_col_idx = df.columns.get_loc(x_col) + 1
+        # Find column indices (1-based)
+        header_row = 1
+        # Locate X col index
+        x_col_idx = df.columns.get_loc(x_col) + 1
     
-    # Cats (X-Axis)
-    cats = Reference(data_sheet, min_col=x_col_idx, min_row=header_row+1, max_row=header_row+len(df))
-    chart.set_categories(cats)
+        # Cats (X-Axis)
+        cats = Reference(data_sheet, min_col=x_col_idx, min_row=header_row+1, max_row=header_row+n_rows)
+        chart.set_categories(cats)
     
-    # Data (Y-Axis)
-    # Add first 3 metrics max to avoid clutter
-    for i, y_col in enumerate(y_cols[:3]):
-        y_col_idx = df.columns.get_loc(y_col) + 1
-        data_ref = Reference(data_sheet, min_col=y_col_idx, min_row=header_row, max_row=header_row+len(df))
-        series = Series(data_ref, title=str(y_col))
-        chart.series.append(series)
-        
-        # Apply Brand Colors
+        # Data (Y-Axis)
+        # Add first 3 metrics max to avoid clutter
         # Cycle: primary, secondary, tertiary
-        colors = brand.get("colors", {})
-        palette = [
-            colors.get("primary", "d97757").replace("#", ""),
-            colors.get("secondary", "6a9bcc").replace("#", ""),
-            colors.get("tertiary", "788c5d").replace("#", "")
-        ]
-        color_hex = palette[i % len(palette)]
+        palette = compile_brand(brand).palette
+        for i, y_col in enumerate(y_cols[:3]):
+            y_col_idx = df.columns.get_loc(y_col) + 1
+            # Values start below the header so they line up with the categories
+            data_ref = Reference(data_sheet, min_col=y_col_idx, min_row=header_row+1, max_row=header_row+n_rows)
+            series = Series(data_ref, title=str(y_col))
+            chart.series.append(series)
         
-        # OpenPyXL Chart coloring
-        # For BarChart it's graphicalProperties.solidFill
-        # For LineChart it's graphicalProperties.line.solidFill
-        # We'll try generic implementation
-        if hasattr(series.graphicalProperties, "solidFill"):
-             series.graphicalProperties.solidFill = color_hex
-        if hasattr(series.graphicalProperties, "line"):
-             series.graphicalProperties.line.solidFill = color_hex
-
-    # 4. output
-    # Create Insights sheet
-    if "Insights" in workbook.sheetnames:
-        ws_chart = workbook["Insights"]
-    else:
-        ws_chart = workbook.create_sheet("Insights")
+            # Apply Brand Colors
+            color_hex = palette[i % len(palette)]
         
-    ws_chart.add_chart(chart, "B2")
+            # OpenPyXL Chart coloring
+            # For BarChart it's graphicalProperties.solidFill
+            # For LineChart it's graphicalProperties.line.solidFill
+            # We'll try generic implementation
+            if hasattr(series.graphicalProperties, "solidFill"):
+                 series.graphicalProperties.solidFill = color_hex
+            if hasattr(series.graphicalProperties, "line"):
+                 series.graphicalProperties.line.solidFill = color_hex
 
+        # 4. output
+        # Create Insights sheet
+        if "Insights" in workbook.sheetnames:
+            ws_chart = workbook["Insights"]
+        else:
+            ws_chart = workbook.create_sheet("Insights")
+        
+        ws_chart.add_chart(chart, "B2")
 
 
-def main(argv: list[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description="Generate .xlsx from JSON/CSV/stdin")
-    parser.add_argument("--input", "-i", required=True, help="Path to input file or '-' for stdin (JSON)")
-    parser.add_argument("--output", "-o", required=True, help="Output .xlsx path")
-    parser.add_argument("--sheet", "-s", default="Sheet1", help="Sheet name")
-    parser.add_argument("--engine", "-e", default=None, help="Optional pandas Excel engine (xlsxwriter, openpyxl)")
-    parser.add_argument("--brand", "-b", default=None, help="Path to brand JSON file")
-    args = parser.parse_args(argv)
 
+def _convert(
+    input_path: str | Path,
+    output: str | Path,
+    sheet_name: str = "Sheet1",
+    engine: str | None = None,
+    brand: BrandLike | None = None,
+    streaming: bool = False,
+    chunksize: int = INPUT_CHUNK_ROWS,
+    rows_per_sheet: int | None = None,
+    append: bool = False,
+    cache: OutputCache | None = None,
+    optimize: bool = False,
+    parse_dates: bool = False,
+    workers: int | None = None,
+    insights_sheet: str | None = None,
+    compression: str = "fast",
+) -> tuple[int, str]:
+    """Run one conversion the way the CLI does.
+
+    With cache, an identical earlier conversion is reused instead of
+    regenerating the workbook, and new outputs are stored in it. optimize
+    and parse_dates run a loaded DataFrame through optimize_dtypes and
+    report the memory saved on stderr. Multi-sheet inputs (see load_sheets)
+    go to generate_workbook with workers and insights_sheet. An output of
+    "-" is built in memory and written to stdout once complete; an input
+    of "-" may be an .xlsx file as well as JSON.
+    Returns (exit code, output path on success or an error message).
+    """
+    mode = "stream" if streaming else "normal"
+    to_stdout = str(output) == "-"
+    target = io.BytesIO() if to_stdout else output
+
+    if append and not to_stdout and Path(output).exists():
+        # New rows are streamed in; the existing workbook supplies the styles
+        try:
+            out = append_excel(output, iter_input(input_path, chunksize=chunksize),
+                               sheet_name=None if sheet_name == "Sheet1" else sheet_name)
+            return 0, str(out)
+        except FileNotFoundError as ex:
+            return 2, f"Failed to load input: {ex}"
+        except Exception as ex:
+            return 3, f"Failed to append to Excel: {ex}"
+
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key(input_path, brand=brand, sheet_name=sheet_name, engine=engine, mode=mode,
+                            chunksize=chunksize, rows_per_sheet=rows_per_sheet, parse_dates=parse_dates,
+                            insights_sheet=insights_sheet, compression=compression if engine == "native" else None)
+        except OSError:
+            pass  # reported by the loaders below
+        if key and (out := cache.fetch(key, target)):
+            return 0, _deliver(output, out)
 
     # Special handling for re-branding existing Excel files
-    input_path = Path(args.input)
-    if input_path.suffix.lower() == ".xlsx" and input_path.exists():
-        if not args.brand:
-            print("Error: --brand is required when input is an .xlsx file (re-branding mode).", file=sys.stderr)
-            return 1
-        
+    p = Path(input_path)
+    source = p if p.suffix.lower() == ".xlsx" and p.exists() else _stdin_workbook() if str(input_path) == "-" else None
+    if source is not None:
+        if not brand:
+            return 1, "Error: --brand is required when input is an .xlsx file (re-branding mode)."
         try:
-            brand_data = load_brand(args.brand)
-            out = overhaul_excel(input_path, args.output, brand_data)
-            print(str(out))
-            return 0
+            out = overhaul_excel(source, target, brand, mode=mode)
         except Exception as ex:
-            print(f"Failed to overhaul Excel: {ex}", file=sys.stderr)
-            return 3
+            return 3, f"Failed to overhaul Excel: {ex}"
+        if key:
+            cache.store(key, out)
+        return 0, _deliver(output, out)
+
+    try:
+        with _phase("load_input"):
+            sheets = load_sheets(input_path)
+        if sheets and (optimize or parse_dates):
+            sheets = {name: optimize_dtypes(pd.DataFrame(df), parse_dates=parse_dates) for name, df in sheets.items()}
+    except Exception as ex:
+        return 2, f"Failed to load input: {ex}"
+    if sheets is not None:
+        try:
+            out = generate_workbook(sheets, target, brand=brand, mode=mode, rows_per_sheet=rows_per_sheet,
+                                    insights_sheet=insights_sheet, workers=workers)
+        except Exception as ex:
+            return 3, f"Failed to write Excel: {ex}"
+        if key:
+            cache.store(key, out)
+        return 0, _deliver(output, out)
+
+    try:
+        if streaming:
+            df = iter_input(input_path, chunksize=chunksize)
+        else:
+            # Small JSON record lists come back as a list for the pandas-free path
+            fast_path = engine in (None, "xlsxwriter") and rows_per_sheet is None and not parse_dates
+            with _phase("load_input") as ph:
+                df = load_input(input_path, max_records=FAST_PATH_MAX_ROWS if fast_path else None)
+                ph.rows = len(df)
+            if (optimize or parse_dates) and isinstance(df, pd.DataFrame):
+                before = df.memory_usage(deep=True).sum()
+                df = optimize_dtypes(df, parse_dates=parse_dates)
+                after = df.memory_usage(deep=True).sum()
+                print(f"Optimized dtypes of {input_path}: {before / (1 << 20):.1f} MB -> {after / (1 << 20):.1f} MB "
+                      f"({1 - after / max(before, 1):.0%} saved)", file=sys.stderr)
+    except Exception as ex:
+        return 2, f"Failed to load input: {ex}"
+
+    try:
+        out = generate_excel(df, target, sheet_name=sheet_name, engine=engine, brand=brand, mode=mode,
+                             rows_per_sheet=rows_per_sheet, compression=compression)
+    except Exception as ex:
+        return 3, f"Failed to write Excel: {ex}"
+    if key:
+        cache.store(key, out)
+    return 0, _deliver(output, out)
+
+
+def _deliver(output: str | Path, out: Path | BinaryIO) -> str:
+    """The success message of _convert; for an output of "-", copies the buffered workbook to stdout first."""
+    if str(output) == "-":
+        _write_stdout(out.getvalue())
+        return "-"
+    return str(out)
+
+
+def _write_stdout(data: bytes) -> None:
+    """Write binary data to stdout, after any text already printed to it."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def _stdin_workbook() -> BinaryIO | None:
+    """stdin as a buffer when it carries an .xlsx (zip) file rather than JSON, else None."""
+    stdin = getattr(sys.stdin, "buffer", None)
+    if stdin is None or not hasattr(stdin, "peek") or stdin.peek(2)[:2] != b"PK":
+        return None
+    return io.BytesIO(stdin.read())
+
+
+def _stdin_from_bytes(data: bytes) -> TextIO:
+    """An in-memory stand-in for sys.stdin holding data, with a peekable binary .buffer."""
+    return io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)), encoding="utf-8")
+
+
+class OutputCache:
+    """Content-addressed store of generated workbooks under a cache directory.
+
+    Keys hash everything that determines a workbook: the input bytes, the
+    normalized brand, the sheet name, engine and write options, and the tool
+    version. Entries are private copies, so a hit copies the stored workbook
+    to the output path and later writes to that path cannot change it.
+    Entries beyond max_bytes are evicted least recently used first; every
+    lookup is logged for stats().
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def key(self, input_path: str | Path, brand: BrandLike | None = None, **options: Any) -> str:
+        """Cache key for converting input_path with brand and the given options.
+
+        Reading stdin ("-") consumes it, so it is replaced with an in-memory
+        copy for the conversion that follows.
+        """
+        digest = hashlib.sha256()
+        if str(input_path) == "-":
+            stdin = getattr(sys.stdin, "buffer", None)
+            data = stdin.read() if stdin is not None else sys.stdin.read().encode("utf-8")
+            sys.stdin = _stdin_from_bytes(data)
+            digest.update(data)
+        else:
+            with Path(input_path).open("rb") as fh:
+                for block in iter(functools.partial(fh.read, 1 << 20), b""):
+                    digest.update(block)
+        compiled = compile_brand(brand)
+        meta = {
+            "version": _tool_version(),
+            "input_type": Path(str(input_path)).suffix.lower(),
+            "brand": compiled.data if compiled else None,
+            **options,
+        }
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / f"{key}.xlsx"
+
+    def fetch(self, key: str, output: str | Path | BinaryIO) -> Path | BinaryIO | None:
+        """Place the cached workbook for key at output (or copy it into a file object); None on a miss."""
+        entry = self._entry(key)
+        out = output if hasattr(output, "write") else Path(output)
+        try:
+            if entry.stat().st_nlink > 1:
+                # Linked to an output by an older version, so it may have been overwritten since
+                entry.unlink()
+                raise FileNotFoundError(entry)
+            os.utime(entry)  # marks the entry as recently used
+            if isinstance(out, Path):
+                out.parent.mkdir(parents=True, exist_ok=True)
+                _copy_file(entry, out)
+            else:
+                with entry.open("rb") as fh:
+                    shutil.copyfileobj(fh, out)
+        except FileNotFoundError:
+            self._log("M")
+            return None
+        self._log("H")
+        return out
+
+    def store(self, key: str, output: str | Path | io.BytesIO) -> None:
+        """Add a freshly written output (a file or buffer) under key, then evict down to max_bytes."""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(output, io.BytesIO):
+            tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                tmp.write_bytes(output.getvalue())
+                tmp.replace(entry)
+            finally:
+                tmp.unlink(missing_ok=True)
+        else:
+            _copy_file(Path(output), entry)
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.glob("objects/*/*.xlsx"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # evicted concurrently
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _log(self, event: str) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # One byte per append is atomic, so concurrent batch workers can share the log
+        with (self.root / "events.log").open("a") as fh:
+            fh.write(event)
+
+    def stats(self) -> dict[str, Any]:
+        """Entry count, size and hit/miss counts of the cache."""
+        log = self.root / "events.log"
+        events = log.read_text() if log.exists() else ""
+        hits, misses = events.count("H"), events.count("M")
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+        shutil.rmtree(self.root / "objects", ignore_errors=True)
+        (self.root / "events.log").unlink(missing_ok=True)
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """Copy src over dst through a temporary file beside dst, so dst is replaced whole.
+
+    Cache entries are never hardlinked: the writers rewrite an existing
+    output in place, which would change the entry through the link.
+    """
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        shutil.copyfile(src, tmp)
+        tmp.replace(dst)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_version() -> str:
+    """__version__ plus a digest of this module, so code changes invalidate cached outputs."""
+    return f"{__version__}+{hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]}"
+
+
+def load_manifest(manifest_path: str | Path) -> list[dict[str, Any]]:
+    """Read batch jobs from a JSON list (or {"jobs": [...]}) or a CSV with a header row.
+
+    Each job needs "input" and "output"; "sheet", "brand", "engine",
+    "compression", "streaming", "rows_per_sheet", "insights_sheet" and the
+    optimize_dtypes, parse_dates and static_rules flags are optional. Relative paths are resolved against the
+    current directory, as on the command line.
+    """
+    p = Path(manifest_path)
+    if p.suffix.lower() == ".csv":
+        with p.open(newline="", encoding="utf-8") as fh:
+            jobs = [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(fh)]
+    else:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        jobs = data.get("jobs", []) if isinstance(data, dict) else data
+    for idx, job in enumerate(jobs):
+        if "input" not in job or "output" not in job:
+            raise ValueError(f"Manifest job {idx} needs 'input' and 'output'")
+    return jobs
+
+
+def _run_job(job: dict[str, Any]) -> dict[str, Any]:
+    """Process-pool worker: run one batch job and report its outcome."""
+    started = time.perf_counter()
+
+    def flag(name: str) -> bool:
+        value = job.get(name, False)
+        # CSV manifests give flags as text
+        return value.strip().lower() in ("1", "true", "yes") if isinstance(value, str) else bool(value)
+
+    code, message = _convert(
+        job["input"],
+        job["output"],
+        sheet_name=job.get("sheet") or "Sheet1",
+        engine=job.get("engine"),
+        brand=_with_static_rules(job.get("brand_data")) if flag("static_rules") else job.get("brand_data"),
+        streaming=flag("streaming"),
+        rows_per_sheet=int(job["rows_per_sheet"]) if job.get("rows_per_sheet") else None,
+        cache=OutputCache(job["cache_dir"], job["cache_max_bytes"]) if job.get("cache_dir") else None,
+        optimize=flag("optimize_dtypes"),
+        parse_dates=flag("parse_dates"),
+        # Batch jobs already run in a process pool
+        workers=1,
+        insights_sheet=job.get("insights_sheet"),
+        compression=job.get("compression") or "fast",
+    )
+    return {
+        "input": str(job["input"]),
+        "output": str(job["output"]),
+        "status": "ok" if code == 0 else "failed",
+        "exit_code": code,
+        "message": message,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def run_batch(
+    jobs: list[dict[str, Any]],
+    workers: int | None = None,
+    brand_cache: str | Path | None = None,
+    cache_dir: str | Path | None = None,
+    cache_max_bytes: int = CACHE_MAX_BYTES,
+) -> list[dict[str, Any]]:
+    """Run jobs across a process pool, compiling each distinct brand file once.
+
+    With cache_dir, every job goes through a shared OutputCache. Results are
+    returned in job order; each carries status, exit_code, message and
+    seconds.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    brands = {path: compile_brand(path, cache_dir=brand_cache) for path in {job.get("brand") for job in jobs} if path}
+    payloads = [dict(job, brand_data=brands.get(job.get("brand")), cache_dir=cache_dir, cache_max_bytes=cache_max_bytes)
+                for job in jobs]
+
+    results: list[dict[str, Any]] = [{} for _ in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_job, payload): idx for idx, payload in enumerate(payloads)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as ex:  # worker crashed
+                result = {"input": str(jobs[idx]["input"]), "output": str(jobs[idx]["output"]),
+                          "status": "failed", "exit_code": 3, "message": f"Worker failed: {ex}", "seconds": 0.0}
+            results[idx] = result
+            tag = "ok" if result["exit_code"] == 0 else f"failed:{result['exit_code']}"
+            print(f"[{tag}] {result['input']} -> {result['message']} ({result['seconds']:.2f}s)", flush=True)
+    return results
+
+
+def batch_main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="excel_skill.py batch", description="Convert many inputs in parallel")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", "-m", help="JSON or CSV manifest of jobs (input, output, sheet, brand, engine, compression, streaming, rows_per_sheet, insights_sheet, optimize_dtypes, parse_dates, static_rules)")
+    source.add_argument("--glob", "-g", help="Glob of input files; outputs are written to --output-dir as <stem>.xlsx")
+    parser.add_argument("--output-dir", "-d", default="reports", help="Output directory for --glob")
+    parser.add_argument("--sheet", "-s", default=None, help="Default sheet name")
+    parser.add_argument("--engine", "-e", default=None, help="Default Excel engine (openpyxl, xlsxwriter, native)")
+    parser.add_argument("--compression", choices=tuple(NATIVE_COMPRESSION), default=None, help="Default deflate setting of the native engine")
+    parser.add_argument("--brand", "-b", default=None, help="Default brand JSON file")
+    parser.add_argument("--streaming", action="store_true", help="Stream every job")
+    parser.add_argument("--rows-per-sheet", type=int, default=None, help="Default data rows per sheet before continuing on a new one")
+    parser.add_argument("--optimize-dtypes", action="store_true", help="Shrink every job's DataFrame dtypes without changing its output")
+    parser.add_argument("--parse-dates", action="store_true", help="Parse date/time-named text columns of every job into Excel dates")
+    parser.add_argument("--static-rules", action="store_true", help="Bake every job's analytics rule styles into the cells instead of conditional formats")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", "-r", default=None, help="Write per-job results as JSON to this path")
+    parser.add_argument("--brand-cache", default=None, help="Directory for cached compiled brands")
+    parser.add_argument("--cache-dir", default=None, help="Reuse identical earlier outputs from this output cache")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_BYTES >> 20, help="Output cache size limit in MB")
+    args = parser.parse_args(argv)
 
     try:
-        df = load_input(args.input)
+        if args.manifest:
+            jobs = load_manifest(args.manifest)
+        else:
+            out_dir = Path(args.output_dir)
+            jobs = [{"input": str(p), "output": str(out_dir / f"{p.stem}.xlsx")}
+                    for p in sorted(Path().glob(args.glob)) if p.is_file()]
     except Exception as ex:
-        print(f"Failed to load input: {ex}", file=sys.stderr)
+        print(f"Failed to load manifest: {ex}", file=sys.stderr)
+        return 2
+    if not jobs:
+        print("No jobs to run.", file=sys.stderr)
         return 2
 
+    defaults = {"sheet": args.sheet, "engine": args.engine, "compression": args.compression, "brand": args.brand,
+                "rows_per_sheet": args.rows_per_sheet}
+    for flag in ("streaming", "optimize_dtypes", "parse_dates", "static_rules"):
+        if getattr(args, flag):
+            defaults[flag] = True
+    jobs = [{**{k: v for k, v in defaults.items() if v is not None}, **job} for job in jobs]
+
+    started = time.perf_counter()
+    results = run_batch(jobs, workers=args.workers, brand_cache=args.brand_cache,
+                        cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_mb << 20)
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r["exit_code"] != 0]
+    print(f"{len(results)} jobs: {len(results) - len(failed)} ok, {len(failed)} failed in {elapsed:.2f}s", file=sys.stderr)
+    if args.report:
+        report = Path(args.report)
+        report.parent.mkdir(parents=True, exist_ok=True)
+        report.write_text(json.dumps({"seconds": round(elapsed, 3), "jobs": results}, indent=2), encoding="utf-8")
+    return max((r["exit_code"] for r in failed), default=0)
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """Runs one CLI invocation per connection (in a forked child where available)."""
+
+    def handle(self) -> None:
+        import excel_client
+
+        line = self.rfile.readline()
+        if not line.strip():
+            return
+        request = json.loads(line.decode("utf-8"))
+        token = getattr(self.server, "token", None)
+        if token and not hmac.compare_digest(str(request.get("token", "")), token):
+            excel_client.send_message(self.connection, {"code": 1, "stderr": "Error: missing or wrong daemon token\n"})
+            return
+        if request.get("command") == "ping":
+            excel_client.send_message(self.connection, {"code": 0, "stdout": "pong\n"})
+            return
+
+        cwd = os.getcwd()
+        stdin = sys.stdin
+        # Binary stdin/stdout (.xlsx piped in or out) travel base64-encoded
+        out, err = io.TextIOWrapper(io.BytesIO(), encoding="utf-8"), io.StringIO()
+        try:
+            os.chdir(request.get("cwd") or cwd)
+            if "stdin" in request or "stdin_b64" in request:
+                sys.stdin = _stdin_from_bytes(base64.b64decode(request["stdin_b64"]) if "stdin_b64" in request
+                                              else request["stdin"].encode("utf-8"))
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                try:
+                    code = main(list(request.get("argv", [])))
+                except SystemExit as ex:  # argparse errors and --help
+                    code = ex.code if isinstance(ex.code, int) else (0 if ex.code is None else 1)
+        finally:
+            sys.stdin = stdin
+            os.chdir(cwd)
+        out.flush()
+        response = {"code": code, "stderr": err.getvalue()}
+        try:
+            response["stdout"] = out.buffer.getvalue().decode("utf-8")
+        except UnicodeDecodeError:
+            response["stdout_b64"] = base64.b64encode(out.buffer.getvalue()).decode("ascii")
+        excel_client.send_message(self.connection, response)
+
+
+def _warm_imports() -> None:
+    """Import everything a conversion can need, so forked daemon workers start warm."""
+    import openpyxl.chart  # noqa: F401
+    import openpyxl.formatting.rule  # noqa: F401
+    import openpyxl.worksheet.table  # noqa: F401
+    import xlsxwriter  # noqa: F401
+
+    # Attribute access resolves the lazy module proxies
+    pd.DataFrame
+    _cell_style.StyleArray
+
+
+def serve_main(argv: list[str] | None = None) -> int:
+    import excel_client
+
+    parser = argparse.ArgumentParser(prog="excel_skill.py serve", description="Run a warm daemon for excel_client.py")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: EXCEL_SKILL_SOCKET or a per-user temp path)")
+    parser.add_argument("--port", type=int, default=None,
+                        help="Listen on this localhost TCP port instead of a Unix socket; clients must present the token "
+                             "written to --token-file")
+    parser.add_argument("--token-file", default=None,
+                        help="Owner-only file for the TCP token (default: EXCEL_SKILL_TOKEN_FILE or next to the socket)")
+    args = parser.parse_args(argv)
+
+    # Forking per request keeps imports warm while isolating each job's state;
+    # without fork, requests are handled one at a time in this process
+    mixins = (socketserver.ForkingMixIn,) if hasattr(os, "fork") else ()
+    token_path = None
+    if args.port is not None:
+        # Any local user can reach a TCP port, so every request must carry a
+        # token that only this user can read
+        token_path = Path(args.token_file) if args.token_file else excel_client.default_token_path()
+        token_path.parent.mkdir(parents=True, exist_ok=True)
+        token_path.unlink(missing_ok=True)
+        token = secrets.token_urlsafe(32)
+        with os.fdopen(os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w", encoding="utf-8") as fh:
+            fh.write(token)
+        server_cls = type("DaemonServer", mixins + (socketserver.TCPServer,), {"allow_reuse_address": True, "token": token})
+        server = server_cls(("127.0.0.1", args.port), _DaemonHandler)
+        address = f"127.0.0.1:{args.port}"
+    else:
+        path = Path(args.socket) if args.socket else excel_client.default_socket_path()
+        if path.exists():
+            if excel_client.ping(path):
+                print(f"Error: a daemon is already listening on {path}", file=sys.stderr)
+                return 1
+            path.unlink()  # stale socket from a previous run
+        server_cls = type("DaemonServer", mixins + (socketserver.UnixStreamServer,), {})
+        # The socket is created owner-only, with no window where others could connect
+        umask = os.umask(0o177)
+        try:
+            server = server_cls(str(path), _DaemonHandler)
+        finally:
+            os.umask(umask)
+        address = str(path)
 
+    _warm_imports()
+    print(f"Serving on {address}", file=sys.stderr, flush=True)
+    # shutdown() waits for serve_forever, so it runs on another thread; raising
+    # from the handler instead can be swallowed if the signal lands during a fork
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
     try:
-        brand_data = load_brand(args.brand)
-        out = generate_excel(df, args.output, sheet_name=args.sheet, engine=args.engine, brand=brand_data)
-        print(str(out))
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if token_path is not None:
+            token_path.unlink(missing_ok=True)
+        else:
+            Path(address).unlink(missing_ok=True)
+    return 0
+
+
+def cache_main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="excel_skill.py cache", description="Inspect or clear an output cache")
+    parser.add_argument("action", choices=("stats", "clear"), help="Report hit rate and size, or remove all entries")
+    parser.add_argument("--cache-dir", required=True, help="Output cache directory")
+    parser.add_argument("--json", action="store_true", help="Print stats as JSON")
+    args = parser.parse_args(argv)
+
+    cache = OutputCache(args.cache_dir)
+    if args.action == "clear":
+        cache.clear()
+        print(f"Cleared {cache.root}")
         return 0
-    except Exception as ex:
-        print(f"Failed to write Excel: {ex}", file=sys.stderr)
-        return 3
+    stats = cache.stats()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        rate = "n/a" if stats["hit_rate"] is None else f"{stats['hit_rate']:.1%}"
+        print(f"{stats['entries']} entries, {stats['bytes'] / (1 << 20):.1f} MB")
+        print(f"{stats['hits']} hits, {stats['misses']} misses, hit rate {rate}")
+    return 0
+
+
+def inspect_main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="excel_skill.py inspect", description="Summarize .xlsx files as JSON")
+    parser.add_argument("paths", nargs="+", help=".xlsx files, or directories to inspect every .xlsx file in")
+    parser.add_argument("--sample", type=int, default=5, help="Leading rows of each sheet to include (default: 5)")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", "-o", default=None, help="Write the JSON to this path instead of stdout")
+    parser.add_argument("--compact", action="store_true", help="Print one line of JSON instead of indenting it")
+    args = parser.parse_args(argv)
+
+    paths: list[Path] = []
+    for arg in args.paths:
+        path = Path(arg)
+        paths.extend(sorted(p for p in path.glob("*.xlsx") if not p.name.startswith("~$")) if path.is_dir() else [path])
+    if not paths:
+        print("No .xlsx files to inspect.", file=sys.stderr)
+        return 2
+
+    results = inspect_workbooks(paths, sample_rows=args.sample, workers=args.workers)
+    text = json.dumps(results, indent=None if args.compact else 2, ensure_ascii=False, default=str)
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    failed = [r for r in results if "error" in r]
+    for result in failed:
+        print(f"Failed to inspect {result['path']}: {result['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def fanout_main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="excel_skill.py fanout",
+                                     description="Write one input as a native-engine workbook per brand")
+    parser.add_argument("--input", "-i", required=True, help="Path to input file or '-' for stdin")
+    parser.add_argument("--brands", "-b", nargs="+", required=True, help="Brand JSON files, one workbook each")
+    parser.add_argument("--output", "-o", required=True,
+                        help="Output path template; {brand} is replaced by each brand file's name without .json")
+    parser.add_argument("--sheet", "-s", default="Sheet1", help="Sheet name")
+    parser.add_argument("--compression", choices=tuple(NATIVE_COMPRESSION), default="fast",
+                        help="Deflate setting: store (none), fast (default) or best")
+    parser.add_argument("--streaming", action="store_true", help="Read input in batches instead of loading it whole")
+    parser.add_argument("--chunksize", type=int, default=INPUT_CHUNK_ROWS, help="Rows per input batch in streaming mode")
+    parser.add_argument("--rows-per-sheet", type=int, default=None, help="Data rows per sheet before continuing on a new one (default: Excel's limit)")
+    parser.add_argument("--workers", type=int, default=None, help="Threads writing the workbooks (default: one per brand, up to the CPU count)")
+    parser.add_argument("--optimize-dtypes", action="store_true", help="Load the input with smaller dtypes (same output)")
+    parser.add_argument("--parse-dates", action="store_true", help="Parse date/time-named text columns into Excel dates")
+    parser.add_argument("--static-rules", action="store_true", help="Evaluate the brands' analytics rules once and bake their styles into the cells")
+    parser.add_argument("--brand-cache", default=None, help="Directory for cached compiled brands")
+    parser.add_argument("--profile", nargs="?", const="table", default=None, choices=("table", "json"),
+                        help="Print per-phase time and memory to stderr as a table (default) or JSON")
+    args = parser.parse_args(argv)
+
+    outputs = [Path(args.output.replace("{brand}", Path(path).stem)) for path in args.brands]
+    if len(set(outputs)) < len(outputs):
+        print("Error: --output must contain {brand} and the brand file names must differ.", file=sys.stderr)
+        return 1
+    brands = [compile_brand(path, cache_dir=args.brand_cache) for path in args.brands]
+    if args.static_rules:
+        brands = [_with_static_rules(brand) for brand in brands]
+
+    with profiling() if args.profile else contextlib.nullcontext() as records:
+        try:
+            if args.streaming:
+                df = iter_input(args.input, chunksize=args.chunksize)
+            else:
+                with _phase("load_input") as ph:
+                    df = pd.DataFrame(load_input(args.input))
+                    ph.rows = len(df)
+                if args.optimize_dtypes or args.parse_dates:
+                    df = optimize_dtypes(df, parse_dates=args.parse_dates)
+        except Exception as ex:
+            print(f"Failed to load input: {ex}", file=sys.stderr)
+            return 2
+        try:
+            fan_out_excel(df, list(zip(brands, outputs)), sheet_name=args.sheet, rows_per_sheet=args.rows_per_sheet,
+                          compression=args.compression, workers=args.workers)
+        except Exception as ex:
+            print(f"Failed to write Excel: {ex}", file=sys.stderr)
+            return 3
+    for out in outputs:
+        print(out)
+    if args.profile:
+        print(format_profile(records, args.profile), file=sys.stderr)
+    return 0
+
+
+# Subcommands dispatched on the first argument; anything else is a single conversion
+SUBCOMMANDS = {
+    "batch": batch_main,
+    "cache": cache_main,
+    "fanout": fanout_main,
+    "inspect": inspect_main,
+    "serve": serve_main,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(description="Generate .xlsx from JSON/CSV/stdin")
+    parser.add_argument("--input", "-i", required=True,
+                        help="Path to input file, a directory of CSV/JSON files (one sheet each) or '-' for stdin (JSON or .xlsx)")
+    parser.add_argument("--output", "-o", required=True, help="Output .xlsx path, or '-' to write the workbook to stdout")
+    parser.add_argument("--sheet", "-s", default="Sheet1", help="Sheet name")
+    parser.add_argument("--engine", "-e", default=None, help="Optional Excel engine (openpyxl, xlsxwriter, native)")
+    parser.add_argument("--compression", choices=tuple(NATIVE_COMPRESSION), default="fast",
+                        help="Deflate setting of the native engine: store (none), fast (default) or best")
+    parser.add_argument("--brand", "-b", default=None, help="Path to brand JSON file")
+    parser.add_argument("--streaming", action="store_true", help="Read input in batches and write rows through a constant-memory write-only sheet")
+    parser.add_argument("--chunksize", type=int, default=INPUT_CHUNK_ROWS, help="Rows per input batch in streaming mode")
+    parser.add_argument("--rows-per-sheet", type=int, default=None, help="Data rows per sheet before continuing on a new one (default: Excel's limit)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes rendering the sheets of a multi-sheet input (default: one per CPU)")
+    parser.add_argument("--insights-sheet", default=None, help="Sheet of a multi-sheet input charted on Insights (default: the first with numbers)")
+    parser.add_argument("--append", action="store_true", help="Add the input rows under the data of an existing --output workbook (created if missing)")
+    parser.add_argument("--optimize-dtypes", action="store_true", help="Load the input with smaller dtypes (same output) and report the memory saved")
+    parser.add_argument("--parse-dates", action="store_true", help="Parse date/time-named text columns into Excel dates")
+    parser.add_argument("--static-rules", action="store_true", help="Evaluate the brand's analytics rules once and bake their styles into the cells")
+    parser.add_argument("--brand-cache", default=None, help="Directory for cached compiled brands")
+    parser.add_argument("--cache-dir", default=None, help="Reuse an identical earlier output from this output cache")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_BYTES >> 20, help="Output cache size limit in MB")
+    parser.add_argument("--profile", nargs="?", const="table", default=None, choices=("table", "json"),
+                        help="Print per-phase time and memory to stderr as a table (default) or JSON")
+    args = parser.parse_args(argv)
+
+    brand = compile_brand(args.brand, cache_dir=args.brand_cache)
+    if args.static_rules:
+        brand = _with_static_rules(brand)
+
+    with profiling() if args.profile else contextlib.nullcontext() as records:
+        code, message = _convert(
+            args.input,
+            args.output,
+            sheet_name=args.sheet,
+            engine=args.engine,
+            brand=brand,
+            streaming=args.streaming,
+            chunksize=args.chunksize,
+            rows_per_sheet=args.rows_per_sheet,
+            append=args.append,
+            cache=OutputCache(args.cache_dir, args.cache_max_mb << 20) if args.cache_dir else None,
+            optimize=args.optimize_dtypes,
+            parse_dates=args.parse_dates,
+            workers=args.workers,
+            insights_sheet=args.insights_sheet,
+            compression=args.compression,
+        )
+    # With --output -, stdout already holds the workbook
+    if code != 0 or args.output != "-":
+        print(message, file=sys.stdout if code == 0 else sys.stderr)
+    if args.profile:
+        print(format_profile(records, args.profile), file=sys.stderr)
+    return code
 
 
 if __name__ == "__main__":
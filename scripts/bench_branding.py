@@ -0,0 +1,84 @@
+"""Benchmark apply_branding: per-cell style objects vs interned style ids.
+
+Usage: python scripts/bench_branding.py [rows] [cols]
+Reports branding time per million cells for both approaches.
+"""
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+from openpyxl import Workbook  # noqa: E402
+from openpyxl.styles import Alignment, Font, PatternFill  # noqa: E402
+
+import excel_skill  # noqa: E402
+
+BRAND = root / ".github" / "skills" / "brand-guidelines" / "examples" / "roche_brand.json"
+
+
+def build_sheet(rows, cols):
+    wb = Workbook()
+    ws = wb.active
+    ws.append([f"Col{c}" for c in range(cols)])
+    for r in range(rows):
+        ws.append([r * c for c in range(cols)])
+    return ws
+
+
+def legacy_branding(ws, brand):
+    """The pre-registry styling loop: new style objects assigned cell by cell."""
+    fonts = brand.get("fonts", {})
+    colors = brand.get("colors", {})
+    c_primary = colors.get("primary", "ffffff").replace("#", "")
+    header_font = Font(name=fonts.get("heading", "Arial"), bold=True, color=colors.get("header_text", "000000").replace("#", ""))
+    header_fill = PatternFill(start_color=c_primary, end_color=c_primary, fill_type="solid")
+    body_font = Font(name=fonts.get("body", "Arial"))
+    rows = list(ws.iter_rows())
+    for cell in rows[0]:
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="left", vertical="center")
+    for i, row in enumerate(rows[1:]):
+        for cell in row:
+            cell.font = body_font
+            if i % 2 == 0:
+                cell.fill = PatternFill(start_color="f9f9f9", end_color="f9f9f9", fill_type="solid")
+
+
+def interned_branding(ws, brand):
+    """Only the cell-styling part of apply_branding (rules and auto-size excluded)."""
+    brand = dict(brand, analytics={})
+    ids = excel_skill.compile_brand_styles(ws.parent, brand)
+    rows = list(ws.iter_rows())
+    for cell in rows[0]:
+        st = excel_skill._style_array(cell)
+        st.fontId = ids["header_font"]
+        st.fillId = ids["header_fill"]
+        st.alignmentId = ids["header_alignment"]
+    for i, row in enumerate(rows[1:]):
+        for cell in row:
+            st = excel_skill._style_array(cell)
+            st.fontId = ids["body_font"]
+            if i % 2 == 0:
+                st.fillId = ids["alt_fill"]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    brand = excel_skill.load_brand(BRAND)
+    cells = (rows + 1) * cols
+
+    print(f"Branding {rows} rows x {cols} cols ({cells} cells)")
+    for label, fn in (("before (per-cell objects)", legacy_branding), ("after (interned ids)", interned_branding)):
+        ws = build_sheet(rows, cols)
+        start = time.perf_counter()
+        fn(ws, brand)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<28} {elapsed:7.2f}s  {elapsed / cells * 1e6:6.2f}s per million cells")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark conditional formatting output: rule count, DXF count and file size.
+
+Usage: python scripts/bench_conditional_formatting.py [tables] [cols] [rows]
+
+Builds a sheet with `tables` Excel tables of `cols` columns side by side,
+every column named so that a brand rule matches it, and brands it through
+overhaul (normal and streaming) and through the xlsxwriter writer. For
+each output it reports the <conditionalFormatting> blocks and <cfRule>
+elements in the sheet XML, the DXF styles in styles.xml, the file size and
+the time taken.
+"""
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+import excel_skill  # noqa: E402
+
+BRAND = {
+    "name": "Bench",
+    "colors": {"primary": "#0B41CD", "header_text": "#FFFFFF"},
+    "analytics": {
+        "rules": [
+            {"column_pattern": "p-value", "condition": "lessThan", "value": 0.05,
+             "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+            {"column_pattern": "score", "condition": "greaterThan", "value": 90,
+             "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+            {"column_pattern": "error", "condition": "greaterThan", "value": 0.5,
+             "style": {"bg_color": "FDE8E8", "font_color": "9b1c1c"}},
+        ]
+    },
+}
+NAMES = ["P-Value", "Score", "Error"]
+
+
+def build_tables(path, tables, cols, rows):
+    from openpyxl import Workbook
+    from openpyxl.worksheet.table import Table
+
+    wb = Workbook()
+    ws = wb.active
+    width = cols + 1
+    for t in range(tables):
+        first = t * width + 1
+        for c in range(cols):
+            ws.cell(row=1, column=first + c, value=f"{NAMES[c % len(NAMES)]} {t}.{c}")
+            for r in range(2, rows + 2):
+                ws.cell(row=r, column=first + c, value=(r * (c + 1)) % 100 / 100)
+        ref = f"{ws.cell(row=1, column=first).coordinate}:{ws.cell(row=rows + 1, column=first + cols - 1).coordinate}"
+        ws.add_table(Table(displayName=f"T{t}", ref=ref))
+    wb.save(path)
+
+
+def measure(path):
+    with zipfile.ZipFile(path) as zf:
+        sheets = [n for n in zf.namelist() if n.startswith("xl/worksheets/sheet")]
+        xml = "".join(zf.read(n).decode("utf-8") for n in sheets)
+        styles = zf.read("xl/styles.xml").decode("utf-8")
+    dxfs = re.search(r'<dxfs count="(\d+)"', styles)
+    return {
+        "blocks": xml.count("<conditionalFormatting"),
+        "rules": xml.count("<cfRule"),
+        "dxfs": int(dxfs.group(1)) if dxfs else 0,
+        "kb": path.stat().st_size / 1024,
+    }
+
+
+def main():
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rows = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    brand = excel_skill.compile_brand(BRAND)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "tables.xlsx"
+        build_tables(source, tables, cols, rows)
+
+        import pandas as pd
+
+        wide = pd.DataFrame({f"{NAMES[c % len(NAMES)]} {c}": [(r * (c + 1)) % 100 / 100 for r in range(rows * tables)]
+                             for c in range(cols * 2)})
+        cases = {
+            "overhaul": lambda out: excel_skill.overhaul_excel(source, out, brand),
+            "overhaul --streaming": lambda out: excel_skill.overhaul_excel(source, out, brand, mode="stream"),
+            "xlsxwriter": lambda out: excel_skill.generate_excel(wide, out, engine="xlsxwriter", brand=brand),
+        }
+        print(f"{tables} tables x {cols} columns x {rows} rows; xlsxwriter: {len(wide):,} rows x {cols * 2} columns")
+        print(f"{'case':<22} {'blocks':>7} {'rules':>7} {'dxfs':>5} {'size KB':>9} {'seconds':>8}")
+        for name, run in cases.items():
+            out = tmp / f"{name.replace(' ', '_')}.xlsx"
+            start = time.perf_counter()
+            run(out)
+            seconds = time.perf_counter() - start
+            m = measure(out)
+            print(f"{name:<22} {m['blocks']:>7} {m['rules']:>7} {m['dxfs']:>5} {m['kb']:>9.1f} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
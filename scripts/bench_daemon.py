@@ -0,0 +1,63 @@
+"""Benchmark per-call latency: cold CLI vs excel_client.py against a warm daemon.
+
+Usage: python scripts/bench_daemon.py [calls]
+Starts `excel_skill.py serve` on a temporary socket, converts the pharma
+example `calls` times through each path and reports mean/min latency.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+skill = root / ".github" / "skills" / "excel-generation"
+sys.path.insert(0, str(skill))
+
+import excel_client  # noqa: E402
+
+DATA = skill / "examples" / "pharma_data.json"
+BRAND = root / ".github" / "skills" / "brand-guidelines" / "examples" / "roche_brand.json"
+
+
+def time_calls(cmd, calls, env):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, env=env, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, EXCEL_SKILL_SOCKET=str(Path(tmp) / "bench.sock"))
+        env.pop("EXCEL_SKILL_PORT", None)
+        args = ["--input", str(DATA), "--output", str(Path(tmp) / "out.xlsx"), "--brand", str(BRAND)]
+
+        cold = time_calls([sys.executable, str(skill / "excel_skill.py"), *args], calls, env)
+
+        daemon = subprocess.Popen([sys.executable, str(skill / "excel_skill.py"), "serve"], env=env,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            socket_path = Path(env["EXCEL_SKILL_SOCKET"])
+            deadline = time.time() + 30
+            while not excel_client.ping(socket_path):
+                if time.time() > deadline:
+                    raise SystemExit("daemon did not start")
+                time.sleep(0.1)
+            warm = time_calls([sys.executable, str(skill / "excel_client.py"), *args], calls, env)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"{calls} calls converting {DATA.name} with {BRAND.name}")
+    for label, timings in (("cold CLI", cold), ("client + warm daemon", warm)):
+        print(f"  {label:<22} mean {statistics.mean(timings) * 1000:7.1f} ms   min {min(timings) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark writing one dataset under many brands.
+
+Usage: python scripts/bench_fanout.py [brands] [rows]
+
+Builds a pharma-shaped DataFrame and `brands` variants of a brand (each
+with its own primary color), then writes one workbook per brand three
+ways: a separate xlsxwriter run per brand, a separate native engine run
+per brand, and a single fan_out_excel call that serializes the cells once
+for all of them, with one thread and with one per brand. It reports the
+total time and checks that every fan-out workbook reads back the same rows
+and carries its own brand color.
+"""
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+import excel_skill  # noqa: E402
+
+PRIMARIES = ["#0B41CD", "#022366", "#1482FA", "#007A3B", "#D60007", "#544F4F", "#C2BAB5", "#FAC9B5"]
+SITES = ["Basel", "Kaiseraugst", "Penzberg", "Mannheim", "South San Francisco"]
+
+
+def build_brands(count):
+    return [
+        excel_skill.compile_brand({
+            "name": f"Unit {idx + 1}",
+            "colors": {"primary": PRIMARIES[idx % len(PRIMARIES)], "header_text": "#FFFFFF"},
+            "excel": {"alternating_rows": True},
+            "analytics": {
+                "rules": [
+                    {"column_pattern": "p-value", "condition": "lessThan", "value": 0.05,
+                     "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+                ]
+            },
+        })
+        for idx in range(count)
+    ]
+
+
+def build_frame(rows):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=rows, freq="min"),
+        "BatchID": [f"B{i:07d}" for i in range(rows)],
+        "Site": rng.choice(SITES, rows),
+        "Yield": rng.uniform(80, 100, rows).round(1),
+        "P-Value": (rng.random(rows) * 0.2).round(3),
+    })
+
+
+def check(path, rows, primary):
+    import openpyxl
+
+    with zipfile.ZipFile(path) as zf:
+        branded = primary.lstrip("#").upper() in zf.read("xl/styles.xml").decode("utf-8").upper()
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        read = sum(1 for _ in wb.worksheets[0].iter_rows(values_only=True)) - 1
+    finally:
+        wb.close()
+    return branded and read == rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    brands = build_brands(count)
+    df = build_frame(rows)
+    excel_skill._warm_imports()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{count} brands x {rows:,} rows")
+        print(f"{'case':<24} {'seconds':>8} {'per brand':>10}")
+        for engine in ("xlsxwriter", "native"):
+            start = time.perf_counter()
+            for idx, brand in enumerate(brands):
+                excel_skill.generate_excel(df, tmp / f"{engine}_{idx}.xlsx", engine=engine, brand=brand, mode="stream")
+            seconds = time.perf_counter() - start
+            print(f"{engine + ' per brand':<24} {seconds:>8.2f} {seconds / count:>10.2f}")
+        for workers in (1, None):
+            outputs = [tmp / f"fanout_{workers}_{idx}.xlsx" for idx in range(count)]
+            start = time.perf_counter()
+            excel_skill.fan_out_excel(df, list(zip(brands, outputs)), workers=workers)
+            seconds = time.perf_counter() - start
+            name = f"fan_out workers={workers or 'auto'}"
+            print(f"{name:<24} {seconds:>8.2f} {seconds / count:>10.2f}")
+        ok = all(check(out, rows, PRIMARIES[idx % len(PRIMARIES)]) for idx, out in enumerate(outputs))
+        print("fan-out outputs:", "ok" if ok else "MISMATCH")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark multi-sheet workbooks rendered in one process and in parallel.
+
+Usage: python scripts/bench_multisheet.py [sheets] [rows]
+
+Builds `sheets` DataFrames of `rows` rows each and writes them as one
+branded workbook with generate_workbook, first with workers=1 (every sheet
+rendered in turn in this process) and then with one worker per CPU, in
+normal and streaming mode. For each output it reports the render and
+assembly time, the cell formats and shared strings of the assembled
+workbook and its file size.
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+import excel_skill  # noqa: E402
+
+BRAND = {
+    "name": "Bench",
+    "colors": {"primary": "#0B41CD", "header_text": "#FFFFFF"},
+    "excel": {"alternating_rows": True},
+    "analytics": {
+        "rules": [
+            {"column_pattern": "p-value", "condition": "lessThan", "value": 0.05,
+             "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+        ]
+    },
+}
+SITES = ["Basel", "Kaiseraugst", "Penzberg", "Mannheim", "South San Francisco"]
+
+
+def build_sheets(sheets, rows):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return {
+        f"Site {idx + 1}": pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=rows, freq="min"),
+            "Site": rng.choice(SITES, rows),
+            "Yield": rng.uniform(80, 100, rows).round(1),
+            "P-Value": (rng.random(rows) * 0.2).round(3),
+        })
+        for idx in range(sheets)
+    }
+
+
+def measure(path):
+    with zipfile.ZipFile(path) as zf:
+        styles = zf.read("xl/styles.xml").decode("utf-8")
+        strings = zf.read("xl/sharedStrings.xml").decode("utf-8") if "xl/sharedStrings.xml" in zf.namelist() else ""
+    xfs = re.search(r'<cellXfs count="(\d+)"', styles)
+    unique = re.search(r'uniqueCount="(\d+)"', strings)
+    return {
+        "xfs": int(xfs.group(1)) if xfs else 0,
+        "strings": int(unique.group(1)) if unique else 0,
+        "kb": path.stat().st_size / 1024,
+    }
+
+
+def main():
+    sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    brand = excel_skill.compile_brand(BRAND)
+    frames = build_sheets(sheets, rows)
+    excel_skill._warm_imports()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{sheets} sheets x {rows:,} rows, {os.cpu_count()} CPUs")
+        print(f"{'case':<22} {'render s':>9} {'assemble s':>11} {'xfs':>5} {'strings':>8} {'size KB':>9}")
+        for mode in ("normal", "stream"):
+            for workers in (1, None):
+                name = f"{mode} workers={workers or 'cpu'}"
+                out = tmp / f"{mode}_{workers}.xlsx"
+                with excel_skill.profiling() as records:
+                    excel_skill.generate_workbook(frames, out, brand=brand, mode=mode, workers=workers)
+                seconds = {r.phase: r.wall for r in records}
+                m = measure(out)
+                print(f"{name:<22} {seconds['render_sheets']:>9.2f} {seconds['assemble']:>11.2f} "
+                      f"{m['xfs']:>5} {m['strings']:>8} {m['kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
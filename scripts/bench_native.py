@@ -0,0 +1,83 @@
+"""Benchmark the native XLSX engine against openpyxl and xlsxwriter.
+
+Usage: python scripts/bench_native.py [rows]
+
+Generates a pharma-shaped DataFrame (dates, sites, yields, p-values) and
+writes it as a branded, streamed workbook with openpyxl, xlsxwriter and
+the native engine at each of its compression settings. For each output it
+reports the time taken, the file size and whether openpyxl reads back the
+same number of rows.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+import excel_skill  # noqa: E402
+
+BRAND = {
+    "name": "Bench",
+    "colors": {"primary": "#0B41CD", "header_text": "#FFFFFF"},
+    "excel": {"alternating_rows": True},
+    "analytics": {
+        "rules": [
+            {"column_pattern": "p-value", "condition": "lessThan", "value": 0.05,
+             "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+        ]
+    },
+}
+SITES = ["Basel", "Kaiseraugst", "Penzberg", "Mannheim", "South San Francisco"]
+
+
+def build_frame(rows):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=rows, freq="min"),
+        "BatchID": [f"B{i:07d}" for i in range(rows)],
+        "Site": rng.choice(SITES, rows),
+        "Yield": rng.uniform(80, 100, rows).round(1),
+        "P-Value": (rng.random(rows) * 0.2).round(3),
+    })
+
+
+def read_back(path):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return sum(1 for _ in wb.worksheets[0].iter_rows(values_only=True)) - 1
+    finally:
+        wb.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    brand = excel_skill.compile_brand(BRAND)
+    df = build_frame(rows)
+    excel_skill._warm_imports()
+
+    cases = [("openpyxl", None), ("xlsxwriter", None)]
+    cases += [("native", level) for level in excel_skill.NATIVE_COMPRESSION]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{rows:,} rows x {len(df.columns)} columns")
+        print(f"{'case':<20} {'seconds':>8} {'size KB':>10} {'read back':>10}")
+        for engine, compression in cases:
+            name = f"{engine} {compression}" if compression else engine
+            out = tmp / f"{name.replace(' ', '_')}.xlsx"
+            start = time.perf_counter()
+            excel_skill.generate_excel(df, out, engine=engine, brand=brand, mode="stream",
+                                       compression=compression or "fast")
+            seconds = time.perf_counter() - start
+            ok = "ok" if read_back(out) == rows else "MISMATCH"
+            print(f"{name:<20} {seconds:>8.2f} {out.stat().st_size / 1024:>10.1f} {ok:>10}")
+
+
+if __name__ == "__main__":
+    main()
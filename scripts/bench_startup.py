@@ -0,0 +1,48 @@
+"""Benchmark start-up cost: module import and small end-to-end conversions.
+
+Usage: python scripts/bench_startup.py [runs]
+Each case runs in a fresh interpreter. The pharma example goes through the
+pandas-free records path by default and through pandas with --engine openpyxl.
+"""
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+skill = root / ".github" / "skills" / "excel-generation"
+
+DATA = skill / "examples" / "pharma_data.json"
+BRAND = root / ".github" / "skills" / "brand-guidelines" / "examples" / "roche_brand.json"
+
+
+def time_runs(cmd, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, cwd=skill, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        convert = [sys.executable, "excel_skill.py", "--input", str(DATA), "--output", str(Path(tmp) / "out.xlsx"),
+                   "--brand", str(BRAND)]
+        cases = (
+            ("interpreter only", [sys.executable, "-c", "pass"]),
+            ("import excel_skill", [sys.executable, "-c", "import excel_skill"]),
+            ("records fast path", convert),
+            ("pandas + openpyxl", [*convert, "--engine", "openpyxl"]),
+        )
+        print(f"{runs} runs each, converting {DATA.name} with {BRAND.name}")
+        for label, cmd in cases:
+            timings = time_runs(cmd, runs)
+            print(f"  {label:<20} mean {statistics.mean(timings) * 1000:7.1f} ms   min {min(timings) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark live conditional formats against static rule styling.
+
+Usage: python scripts/bench_static_rules.py [rows]
+
+Generates a pharma-shaped DataFrame (p-values, yields, scores, statuses)
+and writes it with a brand whose analytics rules match four of its
+columns, once with the rules as conditional formats ("live") and once with
+rule_styling "static", through openpyxl and xlsxwriter, normal and
+streaming. For each output it reports the <cfRule> elements left in the
+sheet XML, the cell formats in styles.xml, the file size and the time
+taken.
+"""
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
+
+import excel_skill  # noqa: E402
+
+BRAND = {
+    "name": "Bench",
+    "colors": {"primary": "#0B41CD", "header_text": "#FFFFFF"},
+    "excel": {"alternating_rows": True},
+    "analytics": {
+        "rules": [
+            {"column_pattern": "p-value", "condition": "lessThan", "value": 0.05,
+             "style": {"bg_color": "E5F9EB", "font_color": "007a3b"}},
+            {"column_pattern": "yield", "condition": "between", "value": [80, 85],
+             "style": {"bg_color": "FDE8E8", "font_color": "9b1c1c"}},
+            {"column_pattern": "score", "condition": "top", "value": 10, "percent": True,
+             "style": {"bg_color": "FFF3C4"}},
+            {"column_pattern": "status", "condition": "equal", "value": "Rejected",
+             "style": {"font_color": "9b1c1c"}},
+        ]
+    },
+}
+STATUSES = ["Released", "Rejected", "Investigation", "Quarantine"]
+
+
+def build_frame(rows):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "BatchID": [f"B{i:07d}" for i in range(rows)],
+        "Status": rng.choice(STATUSES, rows),
+        "Yield": rng.uniform(80, 100, rows).round(1),
+        "P-Value": (rng.random(rows) * 0.2).round(3),
+        "Score": rng.random(rows) * 100,
+    })
+
+
+def measure(path):
+    with zipfile.ZipFile(path) as zf:
+        sheets = [n for n in zf.namelist() if n.startswith("xl/worksheets/sheet")]
+        xml = "".join(zf.read(n).decode("utf-8") for n in sheets)
+        styles = zf.read("xl/styles.xml").decode("utf-8")
+    xfs = re.search(r'<cellXfs count="(\d+)"', styles)
+    return {
+        "rules": xml.count("<cfRule"),
+        "xfs": int(xfs.group(1)) if xfs else 0,
+        "kb": path.stat().st_size / 1024,
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    brands = {
+        "live": excel_skill.compile_brand(BRAND),
+        "static": excel_skill.compile_brand({**BRAND, "excel": {**BRAND["excel"], "rule_styling": "static"}}),
+    }
+    df = build_frame(rows)
+    excel_skill._warm_imports()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{rows:,} rows x {len(df.columns)} columns")
+        print(f"{'case':<32} {'rules':>6} {'xfs':>5} {'size KB':>9} {'seconds':>8}")
+        for engine in ("openpyxl", "xlsxwriter"):
+            for mode in ("normal", "stream"):
+                for styling, brand in brands.items():
+                    name = f"{engine} {mode} {styling}"
+                    out = tmp / f"{name.replace(' ', '_')}.xlsx"
+                    start = time.perf_counter()
+                    excel_skill.generate_excel(df, out, engine=engine, brand=brand, mode=mode)
+                    seconds = time.perf_counter() - start
+                    m = measure(out)
+                    print(f"{name:<32} {m['rules']:>6} {m['xfs']:>5} {m['kb']:>9.1f} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
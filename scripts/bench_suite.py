@@ -0,0 +1,262 @@
+"""Benchmark suite: generation, branding, overhaul and insights at scale.
+
+Usage: python scripts/bench_suite.py [--sizes 1000,100000,1000000] [--cases ...]
+                                     [--output results.json] [--baseline FILE]
+                                     [--save-baseline FILE] [--threshold 0.25]
+
+Synthetic datasets shaped like pharma_data.json (batch IDs, categorical
+product/status, numeric yield, p-values) are written once per size to
+--data-dir. Each case runs in a fresh interpreter so timings and peak
+memory are not skewed by earlier cases; setup (loading the DataFrame,
+writing an input workbook) is not timed. Results are written as JSON.
+
+With --baseline, every case is compared against the stored result for the
+same case and size. The exit code is 1 if any case got slower than
+--threshold or grew its peak memory by more than --mem-threshold (both
+relative, ignoring differences below --min-seconds / --min-mb).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[1]
+skill = root / ".github" / "skills" / "excel-generation"
+sys.path.insert(0, str(skill))
+
+BRAND = root / ".github" / "skills" / "brand-guidelines" / "examples" / "roche_brand.json"
+
+PRODUCTS = ["Aspirin", "Tylenol", "Ibuprofen", "Naproxen", "Paracetamol", "Diclofenac"]
+STATUSES = ["Released", "Rejected", "Investigation", "Quarantine"]
+
+# name -> what is timed; setup is done by the case functions below
+CASES = {
+    "load_input": "load_input on the JSON dataset",
+    "generate_excel": "generate_excel without a brand",
+    "generate_excel_branded": "generate_excel with roche_brand.json",
+    "overhaul_excel": "overhaul_excel of an unbranded workbook",
+    "generate_insights": "generate_insights chart on the dataset",
+}
+
+
+def write_dataset(path, rows, seed=0):
+    """Write `rows` pharma-shaped records as a JSON array, streaming to disk."""
+    rng = random.Random(seed)
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("[")
+        for i in range(rows):
+            record = {
+                "BatchID": f"B{i:07d}",
+                "Product": rng.choice(PRODUCTS),
+                "Yield": round(rng.uniform(80, 100), 1),
+                "P-Value": round(rng.random() * 0.2, 3),
+                "Status": rng.choice(STATUSES),
+            }
+            fh.write(("," if i else "") + json.dumps(record))
+        fh.write("]")
+
+
+def dataset(data_dir, rows):
+    path = data_dir / f"pharma_{rows}.json"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        write_dataset(tmp, rows)
+        tmp.replace(path)
+    return path
+
+
+class PeakRss:
+    """Peak resident memory growth while the block runs, in MB.
+
+    Samples /proc/self/statm where available; elsewhere falls back to the
+    process-wide ru_maxrss, which includes setup.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._statm = Path("/proc/self/statm")
+        self._page_mb = os.sysconf("SC_PAGE_SIZE") / (1 << 20) if hasattr(os, "sysconf") else 0
+
+    def _current_mb(self):
+        return int(self._statm.read_text().split()[1]) * self._page_mb
+
+    def __enter__(self):
+        self._stop = threading.Event()
+        if self._statm.exists():
+            self._start = peak = self._current_mb()
+
+            def sample():
+                nonlocal peak
+                while not self._stop.wait(self.interval):
+                    peak = max(peak, self._current_mb())
+                self.peak_mb = max(peak, self._current_mb()) - self._start
+
+            self._thread = threading.Thread(target=sample, daemon=True)
+            self._thread.start()
+        else:
+            self._thread = None
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        else:
+            import resource
+
+            # ru_maxrss is KB on Linux, bytes on macOS
+            scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_case(case, data_path, work_dir):
+    """Set up and time one case in this process; returns (seconds, peak MB)."""
+    import excel_skill
+
+    # Import pandas/openpyxl/xlsxwriter up front so cases time the work, not the imports
+    excel_skill._warm_imports()
+    out = Path(work_dir) / f"{case}.xlsx"
+    brand = excel_skill.load_brand(BRAND)
+
+    if case == "load_input":
+        fn = lambda: excel_skill.load_input(data_path)  # noqa: E731
+    elif case == "generate_excel":
+        df = excel_skill.load_input(data_path)
+        fn = lambda: excel_skill.generate_excel(df, out)  # noqa: E731
+    elif case == "generate_excel_branded":
+        df = excel_skill.load_input(data_path)
+        fn = lambda: excel_skill.generate_excel(df, out, brand=brand)  # noqa: E731
+    elif case == "overhaul_excel":
+        source = Path(work_dir) / "overhaul_input.xlsx"
+        df = excel_skill.load_input(data_path)
+        excel_skill.generate_excel(df, source, engine="xlsxwriter", mode="stream")
+        del df
+        fn = lambda: excel_skill.overhaul_excel(source, out, brand)  # noqa: E731
+    elif case == "generate_insights":
+        from openpyxl import Workbook
+
+        df = excel_skill.load_input(data_path)
+        wb = Workbook()
+        wb.active.title = "Sheet1"
+
+        def fn():
+            excel_skill.generate_insights(wb, df, brand)
+            wb.save(out)
+    else:
+        raise ValueError(f"Unknown case: {case}")
+
+    with PeakRss() as mem:
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+    return seconds, mem.peak_mb
+
+
+def run_child(case, rows, data_path):
+    """Run one case in a fresh interpreter and return its result dict."""
+    with tempfile.TemporaryDirectory() as work:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", case, str(data_path), work],
+            capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        return {"case": case, "rows": rows, "error": proc.stderr.strip().splitlines()[-1:]}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"case": case, "rows": rows, **result}
+
+
+def compare(results, baseline, threshold, mem_threshold, min_seconds, min_mb):
+    """Regression messages for results that are worse than the baseline."""
+    base = {(r["case"], r["rows"]): r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    for r in results:
+        b = base.get((r["case"], r["rows"]))
+        if b is None or "error" in r:
+            continue
+        slower = r["seconds"] - b["seconds"]
+        if slower > min_seconds and r["seconds"] > b["seconds"] * (1 + threshold):
+            regressions.append(f"{r['case']}@{r['rows']}: {b['seconds']:.3f}s -> {r['seconds']:.3f}s "
+                               f"(+{slower / b['seconds']:.0%})")
+        grown = r["peak_mb"] - b["peak_mb"]
+        if grown > min_mb and r["peak_mb"] > b["peak_mb"] * (1 + mem_threshold):
+            regressions.append(f"{r['case']}@{r['rows']}: peak {b['peak_mb']:.1f} MB -> {r['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        case, data_path, work = sys.argv[2:]
+        seconds, peak_mb = run_case(case, Path(data_path), work)
+        print(json.dumps({"seconds": round(seconds, 4), "peak_mb": round(peak_mb, 1)}))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark excel_skill at several dataset sizes")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma-separated cases ({', '.join(CASES)})")
+    parser.add_argument("--data-dir", default=None, help="Where synthetic datasets are kept (default: a temp dir)")
+    parser.add_argument("--output", "-o", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Compare against results JSON from an earlier run")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results to this baseline path")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--mem-threshold", type=float, default=0.25, help="Allowed relative peak memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--min-mb", type=float, default=5.0, help="Ignore memory growth smaller than this")
+    args = parser.parse_args()
+
+    import excel_skill
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(args.data_dir or tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for rows in sizes:
+            data_path = dataset(data_dir, rows)
+            for case in cases:
+                result = run_child(case, rows, data_path)
+                results.append(result)
+                if "error" in result:
+                    print(f"  {case:<24} {rows:>9} rows  FAILED {' '.join(result['error'])}", flush=True)
+                else:
+                    print(f"  {case:<24} {rows:>9} rows  {result['seconds']:9.3f}s  {result['peak_mb']:8.1f} MB",
+                          flush=True)
+
+    report = {
+        "version": excel_skill.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    failed = any("error" in r for r in results)
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")),
+                              args.threshold, args.mem_threshold, args.min_seconds, args.min_mb)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,36 +1,17 @@
-import openpyxl
-import sys
+"""Summarize .xlsx files as JSON; a shortcut for `excel_skill.py inspect`.
+
+Usage: python scripts/inspect_excel.py [paths...] [--sample N] [--workers N]
 
-def inspect_excel(path):
-    print(f"Inspecting: {path}")
-    try:
-        wb = openpyxl.load_workbook(path)
-    except Exception as e:
-        print(f"Error loading workbook: {e}")
-        return
+Without paths, inspects reports/raw.xlsx. See `excel_skill.py inspect -h`
+for the options.
+"""
+import sys
+from pathlib import Path
 
-    for sheet in wb.sheetnames:
-        ws = wb[sheet]
-        print(f"\nSheet: {sheet}")
-        print(f"  Dimensions: {ws.dimensions}")
-        
-        if hasattr(ws, 'tables') and ws.tables:
-            print(f"  Tables ({len(ws.tables)}):")
-            for tbl_name, tbl_range in ws.tables.items():
-                print(f"    - {tbl_name}: {tbl_range}")
-        else:
-            print("  No Excel Tables found.")
+root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(root / ".github" / "skills" / "excel-generation"))
 
-        # Check for non-empty cells to guess layout if no tables
-        first_row = ws.min_row
-        max_row = min(ws.max_row, 20) # check first 20 rows
-        print(f"  First 5 rows content check (min_row={first_row}):")
-        for r in range(first_row, first_row + 5):
-            vals = [c.value for c in ws[r]]
-            # Truncate for display
-            display_vals = [str(v)[:10] for v in vals if v is not None]
-            if display_vals:
-                print(f"    Row {r}: {display_vals}")
+import excel_skill  # noqa: E402
 
 if __name__ == "__main__":
-    inspect_excel("reports/raw.xlsx")
+    sys.exit(excel_skill.inspect_main(sys.argv[1:] or ["reports/raw.xlsx"]))
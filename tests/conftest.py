@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / ".github" / "skills" / "excel-generation"))
+
+BRAND_FILE = ROOT / ".github" / "skills" / "brand-guidelines" / "examples" / "roche_brand.json"
+
+
+@pytest.fixture
+def brand():
+    import excel_skill
+
+    return excel_skill.compile_brand(str(BRAND_FILE))
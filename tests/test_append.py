@@ -0,0 +1,182 @@
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import PatternFill
+from openpyxl.worksheet.table import Table
+
+import excel_skill
+
+
+def frame(start, count):
+    return pd.DataFrame({
+        "ID": [f"B{i}" for i in range(start, start + count)],
+        "Site": ["Basel" if i % 2 else "Penzberg" for i in range(start, start + count)],
+        "Yield": [80.0 + i % 20 for i in range(start, start + count)],
+        "P-Value": [round((i % 10) / 100, 2) for i in range(start, start + count)],
+    })
+
+
+def sheet_xml(path, sheet=1):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return zf.read(f"xl/worksheets/sheet{sheet}.xml").decode("utf-8")
+
+
+def data_rows(ws):
+    return [row for row in ws.iter_rows(min_row=2, values_only=True)]
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter", "native"])
+def test_append_to_each_engine(tmp_path, brand, engine):
+    path = excel_skill.generate_excel(frame(0, 10), tmp_path / "report.xlsx", engine=engine, brand=brand)
+    styles_before = [(cell.font.name, cell.fill.fgColor.rgb)
+                     for cell in openpyxl.load_workbook(path).worksheets[0][3]]
+
+    excel_skill.append_excel(path, frame(10, 5))
+
+    xml = sheet_xml(path)
+    assert re.findall(r'<dimension ref="([^"]+)"', xml) in ([], ["A1:D16"])
+    # The brand's p-value rule now covers the new rows
+    assert 'sqref="D2:D16"' in xml
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    rows = data_rows(ws)
+    assert [row[0] for row in rows] == [f"B{i}" for i in range(15)]
+    assert rows[-1][2] == 94.0
+    # Odd rows keep the brand's alternating style
+    assert [(cell.font.name, cell.fill.fgColor.rgb) for cell in ws[15]] == styles_before
+
+
+def hand_built(path, sheet_name="Data"):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = sheet_name
+    wb.create_sheet("Notes")["A1"] = "Notes stay untouched"
+    ws.append(["ID", "Site", "Yield", "P-Value"])
+    for row in frame(0, 4).itertuples(index=False):
+        ws.append(list(row))
+    ws.add_table(Table(displayName="Batches", ref="A1:D5"))
+    ws.conditional_formatting.add("D2:D5", CellIsRule(operator="lessThan", formula=["0.05"],
+                                                      fill=PatternFill("solid", fgColor="E5F9EB")))
+    wb.save(path)
+    return path
+
+
+def test_append_extends_tables_and_conditional_formats(tmp_path):
+    path = hand_built(tmp_path / "table.xlsx")
+    excel_skill.append_excel(path, frame(4, 3), sheet_name="Data")
+
+    wb = openpyxl.load_workbook(path)
+    ws = wb["Data"]
+    assert ws.tables["Batches"].ref == "A1:D8"
+    assert [str(cf.sqref) for cf in ws.conditional_formatting] == ["D2:D8"]
+    assert [row[0] for row in data_rows(ws)] == [f"B{i}" for i in range(7)]
+    assert wb["Notes"]["A1"].value == "Notes stay untouched"
+
+
+def test_append_to_autofilter_and_shared_strings(tmp_path):
+    import xlsxwriter
+
+    path = tmp_path / "filter.xlsx"
+    with xlsxwriter.Workbook(str(path)) as wb:
+        ws = wb.add_worksheet("Data")
+        data = frame(0, 4)
+        ws.write_row(0, 0, list(data.columns))
+        for idx, row in enumerate(data.itertuples(index=False), start=1):
+            ws.write_row(idx, 0, list(row))
+        ws.autofilter("A1:D5")
+    with zipfile.ZipFile(path) as zf:
+        assert "xl/sharedStrings.xml" in zf.namelist()
+
+    # "Basel" is already a shared string; "Mannheim" is new
+    excel_skill.append_excel(path, frame(4, 2).assign(Site=["Basel", "Mannheim"]))
+
+    assert '<autoFilter ref="A1:D7"' in sheet_xml(path)
+    with zipfile.ZipFile(path) as zf:
+        sst = zf.read("xl/sharedStrings.xml").decode("utf-8")
+    unique = re.search(r'uniqueCount="(\d+)"', sst)
+    assert unique is None or int(unique.group(1)) == sst.count("<si>")
+    ws = openpyxl.load_workbook(path)["Data"]
+    assert ws.auto_filter.ref == "A1:D7"
+    assert [row[1] for row in data_rows(ws)] == ["Penzberg", "Basel", "Penzberg", "Basel", "Basel", "Mannheim"]
+
+
+def test_append_to_named_sheet_and_separate_output(tmp_path):
+    path = hand_built(tmp_path / "named.xlsx", sheet_name="Batches 2024")
+    out = excel_skill.append_excel(path, frame(4, 2).drop(columns=["Site"]), sheet_name="Batches 2024",
+                                   output=tmp_path / "out.xlsx")
+
+    assert out == tmp_path / "out.xlsx"
+    assert [row[0] for row in data_rows(openpyxl.load_workbook(path)["Batches 2024"])] == [f"B{i}" for i in range(4)]
+    rows = data_rows(openpyxl.load_workbook(out)["Batches 2024"])
+    assert [row[0] for row in rows] == [f"B{i}" for i in range(6)]
+    # Columns missing from the new rows are left blank
+    assert rows[-1][1] is None
+
+
+def test_append_rejects_unknown_columns(tmp_path):
+    path = hand_built(tmp_path / "table.xlsx")
+    with pytest.raises(ValueError):
+        excel_skill.append_excel(path, frame(4, 1).assign(Extra=1))
+
+
+def rewrite_sheet(path, edit):
+    with zipfile.ZipFile(path) as zf:
+        parts = {info.filename: zf.read(info) for info in zf.infolist()}
+    parts["xl/worksheets/sheet1.xml"] = edit(parts["xl/worksheets/sheet1.xml"].decode("utf-8")).encode("utf-8")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+
+def test_append_below_self_closing_empty_row(tmp_path, brand):
+    path = excel_skill.generate_excel(frame(0, 10), tmp_path / "report.xlsx", engine="xlsxwriter", brand=brand)
+    # Excel writes formatted empty rows as <row .../>
+    rewrite_sheet(path, lambda xml: xml.replace("</sheetData>", '<row r="12" s="1" customFormat="1"/></sheetData>'))
+    before = openpyxl.load_workbook(path).worksheets[0]
+    styles = {row: [cell.fill.fgColor.rgb for cell in before[row]] for row in (10, 11)}
+
+    excel_skill.append_excel(path, frame(10, 3))
+
+    xml = sheet_xml(path)
+    numbers = [int(n) for n in re.findall(r'<row r="(\d+)"', xml)]
+    assert numbers == list(range(1, 16))
+    assert '<row r="12" s="1" customFormat="1"/>' in xml
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    assert [row[0] for row in data_rows(ws)] == [f"B{i}" for i in range(10)] + [None] + [f"B{i}" for i in range(10, 13)]
+    # Rows 13-15 continue the alternation of rows 10 and 11
+    assert [[cell.fill.fgColor.rgb for cell in ws[row]] for row in (13, 14, 15)] == \
+        [styles[11], styles[10], styles[11]]
+
+
+def test_scan_skips_self_closing_rows_for_the_header(tmp_path):
+    path = tmp_path / "scan.xlsx"
+    rows = ('<row r="1" s="1" customFormat="1"/><row r="2"><c r="A2" t="inlineStr"><is><t>ID</t></is></c></row>'
+            '<row r="3"><c r="A3" s="2"><v>1</v></c></row><row r="4"><c r="A4" s="3"><v>2</v></c></row>'
+            '<row r="5" s="1" customFormat="1"/>')
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("xl/worksheets/sheet1.xml", f"<worksheet><sheetData>{rows}</sheetData></worksheet>")
+    with zipfile.ZipFile(path) as zf, open(tmp_path / "spool", "w+b") as spool:
+        scan = excel_skill._scan_sheet_xml(zf, "xl/worksheets/sheet1.xml", spool)
+
+    assert scan["header"].startswith(b'<row r="2">')
+    assert scan["prev"] == (3, {"A": 2})
+    assert scan["last"] == (4, {"A": 3})
+    assert scan["end_row"] == 5
+
+
+def test_appended_strings_are_escaped_like_a_full_write(tmp_path, brand):
+    text = "ctl\x01 _x0041_ r\rx"
+    full = excel_skill.generate_excel(frame(0, 3).assign(ID=["B0", "B1", text]), tmp_path / "full.xlsx",
+                                      engine="native", brand=brand)
+    path = excel_skill.generate_excel(frame(0, 2), tmp_path / "append.xlsx", engine="native", brand=brand)
+    excel_skill.append_excel(path, frame(2, 1).assign(ID=[text]))
+
+    # openpyxl decodes escapes in shared strings but not inline ones, so compare the XML
+    escaped = "<t>ctl_x0001_ _x005F_x0041_ r_x000D_x</t>"
+    with zipfile.ZipFile(full) as zf:
+        assert escaped in zf.read("xl/sharedStrings.xml").decode("utf-8")
+    assert escaped in sheet_xml(path)
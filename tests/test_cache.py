@@ -0,0 +1,50 @@
+import json
+import os
+
+import openpyxl
+
+import excel_skill
+
+
+def write_records(path, prefix, count):
+    path.write_text(json.dumps([{"ID": f"{prefix}{i}", "Value": i} for i in range(count)]), encoding="utf-8")
+    return path
+
+
+def ids(path):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [row[0] for row in wb.worksheets[0].iter_rows(min_row=2, values_only=True)]
+    finally:
+        wb.close()
+
+
+def test_same_output_from_two_inputs_keeps_entries_apart(tmp_path, brand):
+    a = write_records(tmp_path / "a.json", "A", 51)
+    b = write_records(tmp_path / "b.json", "B", 5000)
+    out = tmp_path / "out.xlsx"
+    cache = excel_skill.OutputCache(tmp_path / "cache")
+
+    for engine in ("openpyxl", "xlsxwriter"):
+        for source in (a, b, a, b):
+            code, message = excel_skill._convert(source, out, engine=engine, brand=brand, cache=cache)
+            assert code == 0, message
+            prefix = source.stem.upper()
+            assert ids(out)[0] == f"{prefix}0"
+            assert len(ids(out)) == (51 if prefix == "A" else 5000)
+            assert os.stat(out).st_nlink == 1
+    assert cache.stats()["hits"] == 4
+
+
+def test_linked_entries_from_older_versions_are_dropped(tmp_path, brand):
+    a = write_records(tmp_path / "a.json", "A", 3)
+    out = tmp_path / "out.xlsx"
+    cache = excel_skill.OutputCache(tmp_path / "cache")
+    excel_skill._convert(a, out, brand=brand, cache=cache)
+    entry = next((tmp_path / "cache").glob("objects/*/*.xlsx"))
+    linked = tmp_path / "linked.xlsx"
+    os.link(entry, linked)
+
+    assert excel_skill._convert(a, out, brand=brand, cache=cache)[0] == 0
+    assert cache.stats()["hits"] == 0
+    assert ids(out) == ["A0", "A1", "A2"]
@@ -0,0 +1,148 @@
+import io
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import excel_client
+from conftest import ROOT
+
+SKILL = ROOT / ".github" / "skills" / "excel-generation"
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def daemon_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXCEL_SKILL_SOCKET", str(tmp_path / "d.sock"))
+    monkeypatch.setenv("EXCEL_SKILL_TOKEN_FILE", str(tmp_path / "d.token"))
+    monkeypatch.delenv("EXCEL_SKILL_PORT", raising=False)
+    return tmp_path
+
+
+def start(*args):
+    proc = subprocess.Popen([sys.executable, str(SKILL / "excel_skill.py"), "serve", *args],
+                            stderr=subprocess.PIPE, env=os.environ.copy())
+    assert b"Serving on" in proc.stderr.readline()
+    return proc
+
+
+def stop(proc):
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+def test_unix_socket_is_owner_only(daemon_env):
+    proc = start()
+    try:
+        mode = stat.S_IMODE(os.stat(daemon_env / "d.sock").st_mode)
+        assert mode & 0o077 == 0
+        assert excel_client.ping()
+    finally:
+        stop(proc)
+
+
+def test_tcp_requests_need_the_token(daemon_env, monkeypatch):
+    port = free_port()
+    proc = start("--port", str(port))
+    try:
+        token_file = daemon_env / "d.token"
+        assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+        monkeypatch.setenv("EXCEL_SKILL_PORT", str(port))
+        assert excel_client.ping()
+
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            excel_client.send_message(sock, {"argv": ["cache", "stats", "--cache-dir", str(daemon_env)]})
+            response = excel_client.read_message(sock)
+        assert response["code"] == 1
+        assert "token" in response["stderr"]
+
+        token_file.write_text("wrong", encoding="utf-8")
+        assert not excel_client.ping()
+    finally:
+        stop(proc)
+    assert not (daemon_env / "d.token").exists()
+
+
+def test_daemon_closing_early_falls_back_with_stdin(daemon_env, monkeypatch):
+    # A "daemon" that accepts the request and dies without replying
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(daemon_env / "d.sock"))
+    server.listen(1)
+
+    def die():
+        conn, _ = server.accept()
+        conn.recv(1 << 20)
+        conn.close()
+
+    thread = threading.Thread(target=die)
+    thread.start()
+    data = json.dumps([{"ID": "A0", "Value": 1}]).encode("utf-8")
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)), encoding="utf-8"))
+    out = daemon_env / "out.xlsx"
+    try:
+        code = excel_client.main(["--input", "-", "--output", str(out)])
+    finally:
+        thread.join(timeout=10)
+        server.close()
+    assert code == 0
+    assert out.exists()
+
+
+def test_read_message_rejects_a_short_read():
+    left, right = socket.socketpair()
+    with left, right:
+        right.sendall(b'{"code": 0')
+        right.close()
+        start = time.monotonic()
+        with pytest.raises(ConnectionError):
+            excel_client.read_message(left)
+        assert time.monotonic() - start < 5
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["-i", "-", "-o", "out.xlsx"], True),
+    (["--input", "-", "--output", "out.xlsx"], True),
+    (["--input=-", "-o", "out.xlsx"], True),
+    (["-i-", "-o", "out.xlsx"], True),
+    (["-i", "data.json", "-o", "-"], False),
+    (["--input", "data.json", "--output", "-"], False),
+    (["-i", "data.json", "-o", "out.xlsx", "-s", "-"], False),
+    (["--input"], False),
+])
+def test_only_stdin_input_reads_stdin(argv, expected):
+    assert excel_client._reads_stdin(argv) is expected
+
+
+class BlockingStdin:
+    @property
+    def buffer(self):
+        raise AssertionError("stdin was read for a file input")
+
+
+def test_stdout_output_does_not_read_stdin(daemon_env, monkeypatch):
+    src = daemon_env / "in.json"
+    src.write_text(json.dumps([{"ID": "A0", "Value": 1}]))
+    proc = start()
+    try:
+        monkeypatch.setattr(sys, "stdin", BlockingStdin())
+        out = io.BytesIO()
+        monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(out))
+        code = excel_client.call(["-i", str(src), "-o", "-"])
+        sys.stdout.flush()
+    finally:
+        stop(proc)
+    assert code == 0
+    assert out.getvalue()[:2] == b"PK"
@@ -0,0 +1,35 @@
+import json
+
+import openpyxl
+import pytest
+
+import excel_skill
+
+
+def write_records(path, prefix, count):
+    path.write_text(json.dumps([{"ID": f"{prefix}{i}", "Value": i} for i in range(count)]), encoding="utf-8")
+    return path
+
+
+def read_rows(path):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return list(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+@pytest.mark.parametrize("engine", [None, "openpyxl", "xlsxwriter", "native"])
+def test_batches_are_streamed_in_normal_mode(tmp_path, brand, engine):
+    source = write_records(tmp_path / "a.json", "A", 25)
+    out = excel_skill.generate_excel(excel_skill.iter_input(source, chunksize=10), tmp_path / "out.xlsx",
+                                     engine=engine, brand=brand)
+    rows = read_rows(out)
+    assert rows[0] == ("ID", "Value")
+    assert [row[0] for row in rows[1:]] == [f"A{i}" for i in range(25)]
+
+
+@pytest.mark.parametrize("empty", [[], [{}]])
+def test_input_without_columns_is_rejected(tmp_path, brand, empty):
+    with pytest.raises(ValueError, match="no columns"):
+        excel_skill.generate_excel(empty, tmp_path / "out.xlsx", brand=brand)
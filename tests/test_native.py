@@ -0,0 +1,137 @@
+import datetime
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import excel_skill
+
+
+def tricky_frame():
+    return pd.DataFrame({
+        "ID": ["A<1>", "B&2", "C \"q\" 'x'", "D\x01ctl\x1f _x0041_ r\rx", "  lead", None],
+        "Int": pd.array([1, -2, 3, None, 2**40, 0], dtype="Int64"),
+        "Float": [1.5, float("nan"), -0.1, 1e300, 1 / 3, 2.0],
+        "Bool": [True, False, True, False, True, False],
+        "Date": pd.to_datetime(["2024-01-01", "2024-02-29 13:45:10", None, "1900-03-01", "2099-12-31",
+                                "2024-06-01"], format="ISO8601"),
+        "Cat": pd.Categorical(["x", "y", "x", None, "y", "x"]),
+        "Mixed": [1, "two", 3.5, None, True, datetime.date(2024, 1, 2)],
+        "Text": ["-SUM(A1)", "", "0123", "line\nbreak", "tab\tx", "é ü 日本 <&>"],
+    })
+
+
+def sheet_cells(path, sheet=0):
+    ws = openpyxl.load_workbook(path).worksheets[sheet]
+    return [[(cell.value, cell.data_type, cell.number_format) for cell in row] for row in ws.iter_rows()]
+
+
+def rgb(color):
+    return color.rgb[-6:] if color is not None and isinstance(color.rgb, str) else None
+
+
+def styles(path, sheet=0):
+    ws = openpyxl.load_workbook(path).worksheets[sheet]
+    return [[(cell.font.name, bool(cell.font.b), rgb(cell.font.color), cell.fill.fill_type,
+              rgb(cell.fill.fgColor) if cell.fill.fill_type else None, cell.number_format)
+             for cell in row] for row in ws.iter_rows()]
+
+
+def read(path, name):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return zf.read(name).decode("utf-8")
+
+
+@pytest.fixture
+def outputs(tmp_path, brand):
+    df = tricky_frame()
+    return {engine: excel_skill.generate_excel(df, tmp_path / f"{engine}.xlsx", engine=engine, brand=brand)
+            for engine in ("xlsxwriter", "native")}
+
+
+def test_values_and_types_match_xlsxwriter(outputs):
+    assert sheet_cells(outputs["native"]) == sheet_cells(outputs["xlsxwriter"])
+
+
+def test_values_and_types(outputs):
+    rows = sheet_cells(outputs["native"])
+    header, *data = rows
+    assert [value for value, _, _ in header] == list(tricky_frame().columns)
+    ids = [row[0][0] for row in data]
+    assert ids[:3] == ["A<1>", "B&2", "C \"q\" 'x'"]
+    # Control characters use Excel's _xHHHH_ escape; literal escapes are protected
+    assert ids[3] == "D_x0001_ctl_x001F_ _x0041_ r_x000D_x"
+    assert ids[4] == "  lead" and ids[5] is None
+    assert [row[1][:2] for row in data] == [(1, "n"), (-2, "n"), (3, "n"), (None, "n"), (2**40, "n"), (0, "n")]
+    assert [row[2][0] for row in data] == [1.5, None, -0.1, 1e300, 1 / 3, 2.0]
+    assert [row[3][:2] for row in data] == [(True, "b"), (False, "b")] * 3
+    dates = [row[4] for row in data]
+    assert dates[1][0] == datetime.datetime(2024, 2, 29, 13, 45, 10)
+    assert dates[3][0] == datetime.datetime(1900, 3, 1)
+    assert dates[2][0] is None
+    assert {fmt for value, _, fmt in dates if value is not None} == {"yyyy-mm-dd hh:mm:ss"}
+    assert [row[5][0] for row in data] == ["x", "y", "x", None, "y", "x"]
+    assert [row[6][0] for row in data] == [1, "two", 3.5, None, True, 45293]
+    # Text that looks like a number stays text; empty text is left blank
+    assert [row[7][:2] for row in data] == [("-SUM(A1)", "s"), (None, "n"), ("0123", "s"), ("line\nbreak", "s"),
+                                            ("tab\tx", "s"), ("é ü 日本 <&>", "s")]
+
+
+def test_shared_strings_are_escaped_like_xlsxwriter(outputs):
+    def items(path):
+        sst = read(path, "xl/sharedStrings.xml")
+        return sorted(re.findall(r"<si>(.*?)</si>", sst, re.DOTALL))
+
+    native = items(outputs["native"])
+    assert native == items(outputs["xlsxwriter"])
+    assert "<t>A&lt;1&gt;</t>" in native and "<t>B&amp;2</t>" in native
+    assert '<t xml:space="preserve">  lead</t>' in native
+    sst = read(outputs["native"], "xl/sharedStrings.xml")
+    assert re.search(r'uniqueCount="(\d+)"', sst).group(1) == str(len(native))
+
+
+def test_styles_match_xlsxwriter(outputs):
+    assert styles(outputs["native"]) == styles(outputs["xlsxwriter"])
+
+
+def test_values_match_openpyxl(tmp_path, brand):
+    # openpyxl rejects control characters and keeps dates in object columns as datetimes
+    df = tricky_frame().drop(columns=["ID", "Mixed"])
+    native = excel_skill.generate_excel(df, tmp_path / "native.xlsx", engine="native", brand=brand)
+    other = excel_skill.generate_excel(df, tmp_path / "openpyxl.xlsx", engine="openpyxl", brand=brand)
+    assert [[value for value, _, _ in row] for row in sheet_cells(native)] == \
+        [[value for value, _, _ in row] for row in sheet_cells(other)]
+
+
+def chart_refs(path):
+    with zipfile.ZipFile(path) as zf:
+        charts = [name for name in zf.namelist() if name.startswith("xl/charts/")]
+        refs = (ref for name in charts for ref in re.findall(r"<c:f>(.*?)</c:f>", zf.read(name).decode()))
+        return sorted(re.sub(r"^'([^' ]+)'!", r"\1!", ref) for ref in refs)
+
+
+@pytest.mark.parametrize("rows_per_sheet", [None, 40])
+def test_refs_match_xlsxwriter(tmp_path, brand, rows_per_sheet):
+    df = pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=100, freq="h"),
+        "Site": ["Basel", "Penzberg"] * 50,
+        "Yield": [80 + i % 20 for i in range(100)],
+        "P-Value": [(i % 10) / 100 for i in range(100)],
+    })
+    paths = {engine: excel_skill.generate_excel(df, tmp_path / f"{engine}.xlsx", engine=engine, brand=brand,
+                                                mode="stream", rows_per_sheet=rows_per_sheet)
+             for engine in ("xlsxwriter", "native")}
+    books = {engine: openpyxl.load_workbook(path) for engine, path in paths.items()}
+    assert books["native"].sheetnames == books["xlsxwriter"].sheetnames
+    for name in books["native"].sheetnames:
+        native, other = books["native"][name], books["xlsxwriter"][name]
+        assert native.max_row == other.max_row
+        assert [str(cf.sqref) for cf in native.conditional_formatting] == \
+            [str(cf.sqref) for cf in other.conditional_formatting]
+        assert [[c.value for c in row] for row in native.iter_rows()] == [[c.value for c in row] for row in other.iter_rows()]
+    assert chart_refs(paths["native"]) == chart_refs(paths["xlsxwriter"])
+    if rows_per_sheet:
+        assert [str(cf.sqref) for cf in books["native"]["Sheet1 (3)"].conditional_formatting] == ["D2:D21"]
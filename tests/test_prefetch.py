@@ -0,0 +1,35 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import excel_skill
+
+
+def test_reader_stops_when_consumer_stops_early():
+    closed = threading.Event()
+
+    def batches():
+        try:
+            for i in range(100):
+                yield pd.DataFrame({"n": [i]})
+        finally:
+            closed.set()
+
+    before = threading.active_count()
+    it = excel_skill._prefetch(batches(), depth=1)
+    assert next(it)["n"].tolist() == [0]
+    it.close()
+    assert closed.is_set()
+    assert threading.active_count() == before
+
+
+def test_reader_errors_reach_the_consumer():
+    def batches():
+        yield pd.DataFrame({"n": [0]})
+        raise OSError("disk gone")
+
+    it = excel_skill._prefetch(batches())
+    assert len(next(it)) == 1
+    with pytest.raises(OSError, match="disk gone"):
+        next(it)
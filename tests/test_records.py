@@ -0,0 +1,59 @@
+import json
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import excel_skill
+from conftest import ROOT
+
+PHARMA = ROOT / ".github" / "skills" / "excel-generation" / "examples" / "pharma_data.json"
+
+
+def color(value):
+    # openpyxl and xlsxwriter store the same RGB with different alpha bytes
+    return value.rgb[-6:].upper() if value is not None and isinstance(value.rgb, str) else None
+
+
+def formatting(path):
+    wb = openpyxl.load_workbook(path)
+    ws = wb.worksheets[0]
+    cells = {
+        cell.coordinate: (cell.value, cell.font.name, bool(cell.font.b), color(cell.font.color), cell.fill.fill_type,
+                          color(cell.fill.fgColor) if cell.fill.fill_type else None, cell.number_format,
+                          cell.alignment.horizontal)
+        for row in ws.iter_rows() for cell in row
+    }
+    rules = sorted((str(cf.sqref), rule.type, rule.operator, tuple(rule.formula or ()))
+                   for cf in ws.conditional_formatting for rule in cf.rules)
+    # Adjacent equal widths may be stored as one <col min max> range
+    widths = {idx: dim.width for dim in ws.column_dimensions.values() if dim.width
+              for idx in range(dim.min, dim.max + 1)}
+    return {
+        "sheets": wb.sheetnames,
+        "cells": cells,
+        "rules": rules,
+        "widths": widths,
+        "freeze": ws.freeze_panes,
+        "charts": [len(sheet._charts) for sheet in wb.worksheets],
+    }
+
+
+def test_records_fast_path_matches_dataframe_formatting(tmp_path, brand):
+    records = json.loads(PHARMA.read_text(encoding="utf-8"))
+    fast = formatting(excel_skill.generate_excel(records, tmp_path / "records.xlsx", brand=brand))
+    frame = formatting(excel_skill.generate_excel(pd.DataFrame(records), tmp_path / "frame.xlsx", brand=brand))
+
+    for key in ("sheets", "cells", "rules", "freeze", "charts"):
+        assert fast[key] == frame[key], key
+    # xlsxwriter stores the width Excel displays; openpyxl stores the raw character count
+    assert fast["widths"].keys() == frame["widths"].keys()
+    for col, width in frame["widths"].items():
+        assert fast["widths"][col] == pytest.approx(width, abs=1)
+
+
+def test_engine_openpyxl_skips_the_fast_path(tmp_path, brand, monkeypatch):
+    records = json.loads(PHARMA.read_text(encoding="utf-8"))
+    monkeypatch.setattr(excel_skill, "records_excel", None)
+    out = excel_skill.generate_excel(records, tmp_path / "out.xlsx", brand=brand, engine="openpyxl")
+    assert openpyxl.load_workbook(out).worksheets[0].max_row == len(records) + 1
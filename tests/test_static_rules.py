@@ -0,0 +1,133 @@
+import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import excel_skill
+
+BLANK = None
+HIGHLIGHT = "E5F9EB"
+
+# (condition, value, cell, whether Excel's cellIs rule formats the cell).
+# Excel compares blanks as the operand's empty value (0 or ""), orders
+# numbers < text < booleans, compares text case-insensitively and treats
+# dates as serial numbers.
+CELL_IS = [
+    ("lessThan", 0.05, 0.01, True),
+    ("lessThan", 0.05, 0.05, False),
+    ("lessThan", 0.05, BLANK, True),
+    ("lessThan", 0.05, "n/a", False),
+    ("lessThan", 0.05, True, False),
+    ("lessThanOrEqual", 0.05, 0.05, True),
+    ("greaterThan", 100, "n/a", True),
+    ("greaterThan", 100, True, True),
+    ("greaterThan", 100, BLANK, False),
+    ("greaterThan", -1, BLANK, True),
+    ("greaterThanOrEqual", 0, BLANK, True),
+    ("equal", 0, BLANK, True),
+    ("equal", 0, 0, True),
+    ("equal", "Passed", "PASSED", True),
+    ("equal", "Passed", "Pass", False),
+    ("equal", "", BLANK, True),
+    ("notEqual", "Passed", BLANK, True),
+    ("notEqual", "Passed", "passed", False),
+    ("lessThan", "b", "Apple", True),
+    ("lessThan", "b", 1000, True),
+    ("greaterThan", "b", True, True),
+    ("equal", "5", 5, True),
+    ("greaterThan", 45000, datetime.datetime(2024, 1, 1), True),
+    ("lessThan", 45000, datetime.date(2023, 1, 1), True),
+    ("between", [1, 3], 1, True),
+    ("between", [1, 3], 3, True),
+    ("between", [1, 3], 3.5, False),
+    ("between", [1, 3], BLANK, False),
+    ("between", [1, 3], "2", False),
+    ("between", [-1, 1], BLANK, True),
+    ("notBetween", [1, 3], BLANK, True),
+    ("notBetween", [1, 3], 2, False),
+    ("between", ["a", "m"], "Kiwi", True),
+    ("between", ["a", "m"], "zucchini", False),
+]
+
+
+def brand_with(rule, styling="static"):
+    return excel_skill.compile_brand({
+        "name": "Rules",
+        "colors": {"primary": "#0B41CD", "header_text": "#FFFFFF"},
+        "excel": {"rule_styling": styling},
+        "analytics": {"rules": [{"column_pattern": "value", "style": {"bg_color": HIGHLIGHT}, **rule}]},
+    })
+
+
+def matches(rule, cells, ranked=True):
+    static = excel_skill._StaticRules(brand_with(rule).rules, ["Value"], ranked=ranked)
+    if not static.targets:
+        return None
+    frame = pd.DataFrame({"Value": pd.Series(cells, dtype=object)})
+    [(_, code)] = static.codes(frame)
+    return (code >= 0).tolist()
+
+
+@pytest.mark.parametrize("condition, value, cell, expected", CELL_IS)
+def test_cell_is_follows_excel(condition, value, cell, expected):
+    assert matches({"condition": condition, "value": value}, [cell]) == [expected]
+
+
+@pytest.mark.parametrize("cells, expected", [
+    ([0.01, 0.2, None], [True, False, True]),
+    ([0.01, 0.2, float("nan")], [True, False, True]),
+])
+def test_typed_columns_match_object_columns(cells, expected):
+    rule = {"condition": "lessThan", "value": 0.05}
+    static = excel_skill._StaticRules(brand_with(rule).rules, ["Value"], ranked=True)
+    [(_, code)] = static.codes(pd.DataFrame({"Value": pd.Series(cells, dtype=float)}))
+    assert (code >= 0).tolist() == expected
+
+
+@pytest.mark.parametrize("rule, cells, expected", [
+    # Ties with the Nth value are included, as in Excel
+    ({"condition": "top", "value": 1}, [5, 5, 3, 1], [True, True, False, False]),
+    ({"condition": "bottom", "value": 2}, [5, 5, 3, 1], [False, False, True, True]),
+    ({"condition": "top", "value": 50, "percent": True}, [4, 3, 2, 1], [True, True, False, False]),
+    # Only numbers are ranked; text and blanks are never formatted
+    ({"condition": "top", "value": 1}, ["zzz", None, 2, 1], [False, False, True, False]),
+    ({"condition": "bottom", "value": 5}, [3, None, "a"], [True, False, False]),
+])
+def test_ranked_rules_follow_excel(rule, cells, expected):
+    assert matches(rule, cells) == expected
+
+
+def test_rules_excel_must_evaluate_stay_live():
+    assert matches({"condition": "greaterThan", "value": "=A1"}, [1]) is None
+    assert matches({"condition": "colorScale"}, [1]) is None
+    # Ranking needs the whole column on one sheet
+    assert matches({"condition": "top", "value": 1}, [1], ranked=False) is None
+
+
+def test_first_matching_rule_wins():
+    brand = excel_skill.compile_brand({
+        "name": "Rules",
+        "excel": {"rule_styling": "static"},
+        "analytics": {"rules": [
+            {"column_pattern": "value", "condition": "lessThan", "value": 10, "style": {"bg_color": "111111"}},
+            {"column_pattern": "value", "condition": "lessThan", "value": 100, "style": {"bg_color": "222222"}},
+        ]},
+    })
+    static = excel_skill._StaticRules(brand.rules, ["Value"], ranked=True)
+    [(_, code)] = static.codes(pd.DataFrame({"Value": [5, 50, 500]}))
+    assert code.tolist() == [0, 1, -1]
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter", "native"])
+def test_static_cells_match_the_table(tmp_path, engine):
+    cases = [case for case in CELL_IS if case[:2] == ("lessThan", 0.05)]
+    rule = {"condition": "lessThan", "value": 0.05}
+    df = pd.DataFrame({"ID": [f"R{i}" for i in range(len(cases))],
+                       "Value": pd.Series([cell for *_, cell, _ in cases], dtype=object)})
+    out = excel_skill.generate_excel(df, tmp_path / "static.xlsx", engine=engine, brand=brand_with(rule))
+
+    ws = openpyxl.load_workbook(out).worksheets[0]
+    assert not ws.conditional_formatting
+    filled = [(ws.cell(row, 2).fill.fgColor.rgb or "")[-6:].upper() == HIGHLIGHT for row in range(2, len(cases) + 2)]
+    assert filled == [expected for *_, expected in cases]
@@ -0,0 +1,138 @@
+import io
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import excel_skill
+
+
+def package_parts(path):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+        return names, {name: zf.read(name).decode("utf-8") for name in names
+                       if name.endswith((".xml", ".rels"))}
+
+
+def check_package(path):
+    """Content types and relationships are unique and point at parts that exist."""
+    names, parts = package_parts(path)
+    assert len(names) == len(set(names))
+    overrides = re.findall(r'<Override PartName="/([^"]*)"', parts["[Content_Types].xml"])
+    assert len(overrides) == len(set(overrides))
+    assert set(overrides) <= set(names)
+    defaults = re.findall(r'<Default Extension="([^"]*)"', parts["[Content_Types].xml"])
+    assert len(defaults) == len(set(defaults))
+    for name in names:
+        if name.endswith(".xml") and not name.startswith("[") and name not in overrides:
+            assert "xml" in defaults, name
+    for rels_name, rels in parts.items():
+        if not rels_name.endswith(".rels"):
+            continue
+        ids = re.findall(r'\bId="([^"]*)"', rels)
+        assert len(ids) == len(set(ids)), rels_name
+        base = rels_name.replace("_rels/", "").removesuffix(".rels")
+        folder = base.rsplit("/", 1)[0] if "/" in base else ""
+        for target in re.findall(r'Target="([^"]*)"', rels):
+            resolved = target.lstrip("/") if target.startswith("/") else excel_skill._resolve_part(base, target)
+            assert resolved in names, (rels_name, target, folder)
+    return parts
+
+
+def sheets_frames():
+    return {
+        "Sales": pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=6, freq="D"),
+            "Site": ["Basel", "Penzberg"] * 3,
+            "Yield": [81.5, 90.0, 95.25, 99.0, 85.5, 87.0],
+            "P-Value": [0.01, 0.2, 0.03, 0.5, 0.04, 0.9],
+        }),
+        "Returns": [{"BatchID": f"R{i}", "Site": "Mannheim", "Units": i * 10} for i in range(5)],
+        "Notes": pd.DataFrame({"Note": ["Basel first", "Penzberg second"]}),
+    }
+
+
+def rgb(color):
+    return (color.rgb or "")[-6:].upper() if isinstance(color.rgb, str) else None
+
+
+@pytest.mark.parametrize("mode", ["normal", "stream"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_assembled_sheets_keep_their_styles(tmp_path, brand, mode, workers):
+    frames = sheets_frames()
+    out = excel_skill.generate_workbook(frames, tmp_path / "multi.xlsx", brand=brand, mode=mode, workers=workers)
+    check_package(out)
+
+    primary = brand.data["colors"]["primary"].lstrip("#").upper()
+    alt = brand.xlsx_formats["alt"]["bg_color"].lstrip("#").upper()
+    wb = openpyxl.load_workbook(out)
+    assert wb.sheetnames == [*frames, "Insights"]
+    for name, data in frames.items():
+        ws = wb[name]
+        data = pd.DataFrame(data)
+        assert [cell.value for cell in ws[1]] == list(data.columns)
+        assert ws.max_row == len(data) + 1
+        for cell in ws[1]:
+            assert rgb(cell.fill.fgColor) == primary
+            assert cell.font.b
+        # The brand's alternating fill starts on the first data row
+        assert {rgb(cell.fill.fgColor) for cell in ws[2]} == {alt}
+        if ws.max_row > 2:
+            assert {cell.fill.fill_type for cell in ws[3]} == {None}
+
+    sales = wb["Sales"]
+    assert {sales.cell(row, 1).number_format for row in range(2, 8)} == {"yyyy-mm-dd hh:mm:ss"}
+    assert sales.cell(2, 1).value == pd.Timestamp("2024-01-01")
+    assert sales.cell(2, 2).number_format == "General"
+    assert [cell.value for cell in wb["Returns"]["A"][1:]] == [f"R{i}" for i in range(5)]
+    assert [str(cf.sqref) for cf in sales.conditional_formatting] == ["D2:D7"]
+
+
+def xlsxwriter_package(sheet, num_format, color, table_name=None):
+    import xlsxwriter
+
+    buf = io.BytesIO()
+    with xlsxwriter.Workbook(buf) as wb:
+        ws = wb.add_worksheet(sheet)
+        fmt = wb.add_format({"num_format": num_format, "bg_color": color})
+        ws.write_row(0, 0, ["Label", "Value"])
+        ws.write_row(1, 0, [f"{sheet} first", 0.25], fmt)
+        ws.write_row(2, 0, [f"{sheet} second", 0.75], fmt)
+        options = {"columns": [{"header": "Label"}, {"header": "Value"}]}
+        if table_name:
+            options["name"] = table_name
+        ws.add_table("A1:B3", options)
+    return buf.getvalue()
+
+
+def test_assembly_remaps_styles_and_renames_tables(tmp_path):
+    packages = [
+        xlsxwriter_package("Percent", "0.00%", "#FF0000"),
+        xlsxwriter_package("Money", "#,##0.00 [$CHF]", "#00FF00"),
+        xlsxwriter_package("Dates", "yyyy-mm-dd", "#0000FF"),
+        xlsxwriter_package("Named", "0.00%", "#FF0000", table_name="Batches"),
+    ]
+    out = excel_skill._assemble_workbook(packages, tmp_path / "assembled.xlsx")
+    parts = check_package(out)
+
+    tables = {name: xml for name, xml in parts.items() if name.startswith("xl/tables/")}
+    ids = [re.search(r'<table\b[^>]*\bid="(\d+)"', xml).group(1) for xml in tables.values()]
+    assert len(ids) == len(set(ids)) == 4
+
+    wb = openpyxl.load_workbook(out)
+    expected = {"Percent": ("0.00%", "FF0000", "Table1"), "Money": ("#,##0.00 [$CHF]", "00FF00", "Table1_2"),
+                "Dates": ("yyyy-mm-dd", "0000FF", "Table1_3"), "Named": ("0.00%", "FF0000", "Batches")}
+    for sheet, (num_format, color, table) in expected.items():
+        ws = wb[sheet]
+        assert list(ws.tables) == [table]
+        assert ws.tables[table].ref == "A1:B3"
+        for row in (2, 3):
+            for cell in ws[row]:
+                assert cell.number_format == num_format
+                assert rgb(cell.fill.fgColor) == color
+        assert ws["A2"].value == f"{sheet} first"
+    # Identical formats from different packages are stored once
+    assert wb["Percent"]["B2"].style_id == wb["Named"]["B2"].style_id